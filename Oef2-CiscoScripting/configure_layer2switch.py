@@ -1,74 +1,152 @@
 import csv
-from netmiko import ConnectHandler
+import os
+import sys
+import time
 
-def configure_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain):
-    print(f"Connecting to switch at {switch_ip}...")
-    cat3560 = {
-        'device_type': 'cisco_ios',
-        'host': switch_ip,
-        'username': 'admin',
-        'password': 'admin123',
-        'port': 22,
-    }
-    net_connect = ConnectHandler(**cat3560)
-    print("Connection established.")
-    
-    print(f"Configuring VTP mode to '{vtp_mode}' and domain to '{vtp_domain}'...")
-    vtp_commands = [
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import DEFAULT_PASSWORD, DEFAULT_POOL, DEFAULT_USERNAME, cisco_device, write_memory
+from common.fast_apply import send_config_chunked
+from common.rollout_journal import push_blocks_with_checkpoints
+
+def build_vtp_commands(vtp_mode, vtp_domain):
+    """Return the VTP configuration block."""
+    return [
         f"vtp mode {vtp_mode}",
         f"vtp domain {vtp_domain}",
         "vtp password secretpassword"
     ]
-    net_connect.send_config_set(vtp_commands)
-    
-    print(f"Reading CSV file: {csv_file}")
+
+def build_row_commands(row):
+    """Return the config-mode commands for one CSV row (without conf t / end / wr mem)."""
+    ip_address = row.get("IP Address", "")
+    vlan_id = row["Vlan"]
+    description = row["Description"]
+    ports = row["Ports"]
+
+    if not ip_address:
+        return [
+            f"vlan {vlan_id}",
+            f"name {description}",
+            f"interface range FastEthernet 0/{ports}",
+            "switchport mode access",
+            f"switchport access vlan {vlan_id}",
+            "no shut"
+        ]
+    return [
+        f"vlan {vlan_id}",
+        f"name {description}",
+        f"interface vlan{vlan_id}",
+        f"desc {description}",
+        f"ip address {ip_address} {row['Netmask']}",
+        "no shut"
+    ]
+
+def read_switch_rows(csv_file):
+    """Read the CSV file and yield (row_num, row) with stripped headers and values."""
     with open(csv_file, mode="r") as file:
         csv_reader = csv.DictReader(file, delimiter=';')
-        
         for row_num, row in enumerate(csv_reader, start=1):
-            row = {key.strip(): value.strip() for key, value in row.items()}
-            
+            yield row_num, {key.strip(): value.strip() for key, value in row.items()}
+
+def build_switch_batch(csv_file, vtp_mode, vtp_domain):
+    """
+    Compile the VTP block and every CSV row into one ordered command batch.
+    Returns a list of (label, commands) blocks; label is 'vtp' or the CSV row number.
+    """
+    batch = [("vtp", build_vtp_commands(vtp_mode, vtp_domain))]
+    for row_num, row in read_switch_rows(csv_file):
+        batch.append((row_num, build_row_commands(row)))
+    return batch
+
+def push_switch_batch(net_connect, batch):
+    """
+    Send a compiled batch in a single config session and save once at the end.
+    Returns a list of (label, seconds) timings, one per block.
+    """
+    timings = []
+    net_connect.config_mode()
+    for label, commands in batch:
+        start = time.perf_counter()
+        output = net_connect.send_config_set(commands, exit_config_mode=False)
+        timings.append((label, time.perf_counter() - start))
+        print(output)
+    net_connect.exit_config_mode()
+
+    start = time.perf_counter()
+    write_memory(net_connect)
+    timings.append(("save", time.perf_counter() - start))
+    return timings
+
+def print_batch_timings(timings):
+    """Print the per-row timing report of a batched push."""
+    print("Per-row timing (batched, single config session):")
+    for label, seconds in timings:
+        name = f"row {label}" if isinstance(label, int) else label
+        print(f"  {name:<10} {seconds * 1000:8.1f} ms")
+    rows = sum(1 for label, _ in timings if isinstance(label, int))
+    total = sum(seconds for _, seconds in timings)
+    print(f"Total: {total:.2f} s for {rows} rows; config sessions: 1 (was {rows + 1}), "
+          f"config saves: 1 (was {rows}).")
+
+def push_switch_batch_fast(net_connect, batch):
+    """
+    Write the whole batch in chunks without per-line pacing and save once. A line IOS
+    rejects raises ConfigApplyError with its CSV row number.
+    """
+    labeled = [(label, command) for label, commands in batch for command in commands]
+    print(send_config_chunked(net_connect, labeled))
+    write_memory(net_connect)
+    return labeled
+
+def configure_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain, batched=False, pool=DEFAULT_POOL,
+                              fast=False, checkpoint=None, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD,
+                              connect_options=None):
+    print(f"Connecting to switch at {switch_ip}...")
+    # connect_options: extra Netmiko parameters, e.g. the fleet runner's timeouts
+    cat3560 = cisco_device(switch_ip, username, password, **(connect_options or {}))
+    # The session stays open in the pool so a following verify/save reuses it
+    with pool.session(cat3560) as net_connect:
+        print("Connection established.")
+
+        if checkpoint is not None:
+            # Resumable rollout: rows confirmed (saved) in an earlier run are skipped
+            batch = build_switch_batch(csv_file, vtp_mode, vtp_domain)
+            sent = push_blocks_with_checkpoints(net_connect, batch, checkpoint)
+            print(f"Sent {len(sent)} of {len(batch)} blocks, {len(batch) - len(sent)} already confirmed.")
+            print("Configuration complete.")
+            return sent
+
+        if fast:
+            print(f"Writing VTP block and CSV file {csv_file} in chunks...")
+            labeled = push_switch_batch_fast(net_connect, build_switch_batch(csv_file, vtp_mode, vtp_domain))
+            print("Configuration complete.")
+            return labeled
+
+        if batched:
+            print(f"Compiling VTP block and CSV file {csv_file} into one batch...")
+            batch = build_switch_batch(csv_file, vtp_mode, vtp_domain)
+            timings = push_switch_batch(net_connect, batch)
+            print_batch_timings(timings)
+            print("Configuration complete.")
+            return timings
+
+        print(f"Configuring VTP mode to '{vtp_mode}' and domain to '{vtp_domain}'...")
+        net_connect.send_config_set(build_vtp_commands(vtp_mode, vtp_domain))
+
+        print(f"Reading CSV file: {csv_file}")
+        for row_num, row in read_switch_rows(csv_file):
             print(f"Processing row {row_num}: VLAN {row['Vlan']} - {row['Description']}")
-            
-            ip_address = row.get("IP Address", "")
-            vlan_id = row["Vlan"]
-            description = row["Description"]
-            ports = row["Ports"]
-
-            if not ip_address:
-                commands = [
-                    "conf t",
-                    f"vlan {vlan_id}",
-                    f"name {description}",
-                    f"interface range FastEthernet 0/{ports}",
-                    "switchport mode access",
-                    f"switchport access vlan {vlan_id}",
-                    "no shut",
-                    "end",
-                    "wr mem"
-                ]
-            else:
-                commands = [
-                    "conf t",
-                    f"vlan {vlan_id}",
-                    f"name {description}",
-                    f"interface vlan{vlan_id}",
-                    f"desc {description}",
-                    f"ip address {ip_address} {row['Netmask']}",
-                    "no shut",
-                    "end",
-                    "wr mem"
-                ]
-            
+
+            commands = ["conf t"] + build_row_commands(row) + ["end", "wr mem"]
             output = net_connect.send_config_set(commands)
             print(output)
-    
-    print("Configuration complete. Disconnecting...")
-    net_connect.disconnect()
+
+    print("Configuration complete.")
 
 if __name__ == "__main__":
-    csv_file = "layer2.csv" 
+    csv_file = "layer2.csv"
     switch_ip = "192.168.100.100"
-    vtp_mode = "transparent" 
+    vtp_mode = "transparent"
     vtp_domain = "howest"
-    configure_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain)
+    batched = True  # one config session and a single save instead of one per row
+    configure_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain, batched)
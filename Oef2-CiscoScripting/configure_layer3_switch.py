@@ -1,133 +1,205 @@
-import csv
-from netmiko import ConnectHandler
-
-def parse_vlan_range(vlan_range_str):
-    """Parse VLAN range (e.g., '300-400') and return a list of VLANs."""
-    vlan_list = []
-    if '-' in vlan_range_str:
-        start_vlan, end_vlan = vlan_range_str.split('-')
-        for vlan in range(int(start_vlan), int(end_vlan) + 1):
-            vlan_list.append(str(vlan))
-    else:
-        vlan_list.append(vlan_range_str)  # Single VLAN
-    return vlan_list
-
-def configure_layer3_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain):
-    # Connection setup
-    print(f"Connecting to Layer 3 switch at {switch_ip}...")
-    cat3560 = {
-        'device_type': 'cisco_ios',
-        'host': switch_ip,
-        'username': 'admin',
-        'password': 'admin123',
-        'port': 22,
-    }
-    net_connect = ConnectHandler(**cat3560)
-    print("Connection established.")
-    
-    # Configure VTP mode and domain
-    print(f"Configuring VTP mode to '{vtp_mode}' and domain to '{vtp_domain}'...")
-    vtp_commands = [
+import os
+import sys
+import tempfile
+
+from switch_intent import PORT_PREFIX, STACK_PORT_PREFIX, compile_switch_csv
+from test2 import render_layer3_switch_config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import DEFAULT_PASSWORD, DEFAULT_POOL, DEFAULT_USERNAME, cisco_device, write_memory
+from common.fast_apply import send_config_chunked
+from common.file_apply import apply_config_file, scp_transfer
+from common.running_config import diff_config, fetch_running_config, merge_labeled_blocks, split_sections
+
+def build_labeled_layer3_blocks(intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """
+    Build the intended configuration as (label, header, lines) blocks, header None for global
+    lines; the label is the CSV row number ('vtp' for the VTP block).
+    """
+    blocks = [("vtp", None, [
         f"vtp mode {vtp_mode}",
         f"vtp domain {vtp_domain}",
-        "vtp password secretpassword"  # Optionally add a VTP password
-    ]
-    net_connect.send_config_set(vtp_commands)
-    
-    # Read the CSV file and configure VLANs
+        "vtp password secretpassword"
+    ])]
+    for row in intent.rows:
+        for block in row.blocks(port_prefix):
+            blocks += [(row.row_num, header, lines) for header, lines in split_sections(block)]
+    return blocks
+
+def build_layer3_blocks(intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """
+    Build the intended configuration as (header, lines) blocks, header None for global lines.
+    Used by the diff-based apply to compare the CSV with the running-config.
+    """
+    return [(header, lines) for _, header, lines in
+            build_labeled_layer3_blocks(intent, vtp_mode, vtp_domain, port_prefix)]
+
+def _stream_order(block):
+    """VTP first, then VLAN definitions, SVIs, access port ranges and trunks last."""
+    _, header, lines = block
+    if header is None:
+        return 0
+    if header.startswith("vlan "):
+        return 1
+    if header.lower().startswith("interface vlan"):
+        return 2
+    if "switchport mode trunk" in lines:
+        return 4
+    return 3
+
+def build_labeled_layer3_stream(intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """
+    Coalesce all rows of the switch into one deduplicated, ordered command stream that is
+    sent in a single config session, as (label, command) pairs so errors map back to a row.
+    """
+    blocks = sorted(build_labeled_layer3_blocks(intent, vtp_mode, vtp_domain, port_prefix), key=_stream_order)
+    commands = []
+    for header, header_label, lines in merge_labeled_blocks(blocks):
+        if header:
+            commands.append((header_label, header))
+        commands += lines
+    return commands
+
+def build_layer3_stream(intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """The command stream of build_labeled_layer3_stream without the labels."""
+    return [command for _, command in build_labeled_layer3_stream(intent, vtp_mode, vtp_domain, port_prefix)]
+
+def count_row_by_row(intent):
+    """
+    Estimate (counted from the intent, not measured) of the commands and Netmiko calls the
+    old row-by-row apply needed: each row sent its commands, a separate port block for SVI
+    rows, an 'end' and then the same commands again.
+    """
+    commands = 3  # VTP block
+    calls = 1
+    for row in intent.rows:
+        blocks = row.blocks()
+        first = len(blocks[0]) + 1  # + 'conf t'
+        commands += 2 * first + sum(len(block) for block in blocks[1:]) + 1
+        calls += len(blocks) + 2
+    return commands, calls
+
+def apply_layer3_diff(net_connect, intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """Fetch the running-config once and only send the lines that are missing or changed."""
+    running = fetch_running_config(net_connect)
+    commands = diff_config(build_layer3_blocks(intent, vtp_mode, vtp_domain, port_prefix), running)
+    if not commands:
+        print("Switch already matches the CSV, nothing to send.")
+        return commands
+    print(f"Sending {len(commands)} changed lines...")
+    print(net_connect.send_config_set(commands))
+    write_memory(net_connect)
+    return commands
+
+def plan_layer3_partitions(intent, switch_ip, switch_hosts=None, stack=False):
+    """
+    Group the CSV rows by their Switch column and decide where each group goes.
+    `switch_hosts` maps a Switch value to the management IP of a separate switch; values
+    that are not in the mapping stay on `switch_ip`. With `stack`, the switches on one host
+    are members of a stack and their ports get the member number ('FastEthernet 2/0/10').
+    Returns {host: (intent, port_prefix)}; rows for the same host are sent as one stream.
+    """
+    switch_hosts = switch_hosts or {}
+    port_prefix = STACK_PORT_PREFIX if stack else PORT_PREFIX
+    hosts = {}
+    for switch, partition in intent.partition().items():
+        hosts.setdefault(switch_hosts.get(switch, switch_ip), []).extend(partition.rows)
+    return {host: (type(intent)(rows), port_prefix) for host, rows in hosts.items()}
+
+def push_layer3_partition(host, intent, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX, diff_only=False,
+                          pool=DEFAULT_POOL, fast=False, via_file=False, transfer=scp_transfer,
+                          username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD, connect_options=None):
+    """
+    Configure one switch (or stack) with its share of the rows and return the commands sent.
+    With `fast`, the stream is written in chunks without per-line pacing; a rejected line
+    raises ConfigApplyError naming its CSV row. With `via_file`, the rendered switch_config.txt
+    is copied to flash and merged with one 'copy' (nothing is typed, None is returned).
+    `connect_options` are extra Netmiko parameters, e.g. the fleet runner's timeouts.
+    """
+    # Connection setup; the session stays open in the pool for a following verify/save
+    print(f"Connecting to Layer 3 switch at {host}...")
+    cat3560 = cisco_device(host, username, password, **(connect_options or {}))
+    with pool.session(cat3560) as net_connect:
+        print(f"[{host}] Connection established.")
+
+        if diff_only:
+            return apply_layer3_diff(net_connect, intent, vtp_mode, vtp_domain, port_prefix)
+
+        if via_file:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                config_file = os.path.join(tmp_dir, "switch_config.txt")
+                with open(config_file, mode="w") as file:
+                    render_layer3_switch_config(intent, file, vtp_mode, vtp_domain, port_prefix)
+                count = apply_config_file(net_connect, config_file, "switch_config.txt", transfer)
+            print(f"[{host}] Merged {count} lines from flash in one copy.")
+            return None
+
+        if fast:
+            labeled = build_labeled_layer3_stream(intent, vtp_mode, vtp_domain, port_prefix)
+            print(f"[{host}] Writing {len(labeled)} commands in chunks...")
+            print(send_config_chunked(net_connect, labeled))
+            return [command for _, command in labeled]
+
+        # Send the whole switch as one ordered stream in a single config session
+        commands = build_layer3_stream(intent, vtp_mode, vtp_domain, port_prefix)
+        old_commands, old_calls = count_row_by_row(intent)
+        print(f"[{host}] Sending {len(commands)} commands for {len(intent.rows)} rows in one config session...")
+        output = net_connect.send_config_set(commands)
+        print(output)
+        print(f"[{host}] Sent {len(commands)} commands in one send_config_set call; by count_row_by_row "
+              f"the row-by-row apply would need {old_commands} commands in {old_calls} calls (estimate).")
+    return commands
+
+def configure_layer3_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain, diff_only=False,
+                                     pool=DEFAULT_POOL, switch_hosts=None, stack=False, max_workers=4,
+                                     fast=False, via_file=False, transfer=scp_transfer,
+                                     username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD, connect_options=None):
+    """
+    Configure the switch(es) in the CSV. Without `switch_hosts` every row goes to `switch_ip`
+    and the commands sent are returned; with it, every host gets its own rows, independent
+    hosts are configured concurrently and a {host: commands or exception} dict is returned,
+    so one failing host does not discard the results of the others.
+    """
+    # Compile the CSV once (cached on disk when unchanged)
     print(f"Reading CSV file: {csv_file}")
-    with open(csv_file, mode="r") as file:
-        csv_reader = csv.DictReader(file, delimiter=';')
-        
-        for row_num, row in enumerate(csv_reader, start=1):
-            # Clean headers and values (strip spaces)
-            row = {key.strip(): value.strip() for key, value in row.items()}
-            
-            print(f"Processing row {row_num}: VLAN {row['Vlan']} - {row['Description']}")
-            
-            # Determine VLAN and IP Address configuration
-            vlan_str = row["Vlan"]
-            description = row["Description"]
-            ip_address = row.get("IP Address", "")
-            netmask = row.get("Netmask", "")
-            ports = row["Ports"]
-            switch_num = row["Switch"]
-            
-            # Parse VLAN range if applicable
-            vlan_ids = parse_vlan_range(vlan_str)
-
-            # Command set for configuring VLAN interface and switch ports
-            if ip_address and netmask:  # If IP address and netmask are present
-                commands = [
-                    "conf t",
-                    f"vlan {vlan_ids[0]}",  # Assuming the first VLAN for interface configuration
-                    f"name {description}",
-                    f"interface vlan{vlan_ids[0]}",
-                    f"description {description}",
-                    f"ip address {ip_address} {netmask}",
-                    "no shut"
-                ]
-                # Send IP configuration for VLAN interface
-                net_connect.send_config_set(commands)
-                
-                # Configure port range for the switch (based on the 'Ports' field)
-                port_range = f"FastEthernet 0/{ports}"
-                port_commands = [
-                    f"interface range {port_range}",
-                    f"switchport mode access",
-                    f"switchport access vlan {vlan_ids[0]}",
-                    "no shut"
-                ]
-                net_connect.send_config_set(port_commands)
-                
-            else:  # If no IP address is provided, just configure the ports
-                # Check if 'trunk' or 'uplink' is in the Description
-                if 'trunk' in description.lower() or 'uplink' in description.lower():
-                    # If trunking is needed
-                    if vlan_ids:
-                        vlan_filtering = ",".join(vlan_ids)
-                        commands = [
-                            "conf t",
-                            f"interface range FastEthernet 0/{ports}",
-                            "switchport mode trunk",
-                            f"switchport trunk allowed vlan {vlan_filtering}",
-                            "no shut"
-                        ]
-                    else:
-                        commands = [
-                            "conf t",
-                            f"interface range FastEthernet 0/{ports}",
-                            "switchport mode trunk",
-                            "no shut"
-                        ]
-                else:
-                    commands = [
-                        "conf t",
-                        f"vlan {vlan_ids[0]}",  # For access port configuration
-                        f"name {description}",
-                        f"interface range FastEthernet 0/{ports}",
-                        f"switchport mode access",
-                        f"switchport access vlan {vlan_ids[0]}",
-                        "no shut"
-                    ]
-                
-                # Send the commands for trunk or access port
-                net_connect.send_config_set(commands)
-            
-            net_connect.send_command("end")
-            
-            print(f"VLAN {vlan_ids[0]} and ports {ports} configured successfully.")
-
-            output = net_connect.send_config_set(commands)
-            print(output)
-    
-    # Closing connection
-    print("Configuration complete. Disconnecting...")
-    net_connect.disconnect()
+    intent = compile_switch_csv(csv_file)
+    plan = plan_layer3_partitions(intent, switch_ip, switch_hosts, stack)
+
+    if not switch_hosts:
+        partition, port_prefix = plan[switch_ip]
+        commands = push_layer3_partition(switch_ip, partition, vtp_mode, vtp_domain, port_prefix, diff_only, pool,
+                                         fast, via_file, transfer, username, password, connect_options)
+        print("Configuration complete.")
+        return commands
+
+    from concurrent.futures import ThreadPoolExecutor  # only needed for several hosts; keeps offline imports light
+    print(f"Pushing {len(plan)} switches concurrently: {', '.join(plan)}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {host: executor.submit(push_layer3_partition, host, partition, vtp_mode, vtp_domain,
+                                         port_prefix, diff_only, pool, fast, via_file, transfer,
+                                         username, password, connect_options)
+                   for host, (partition, port_prefix) in plan.items()}
+        results = {}
+        for host, future in futures.items():
+            try:
+                results[host] = future.result()
+            except Exception as e:
+                print(f"[{host}] Failed: {type(e).__name__}: {e}")
+                results[host] = e
+    failed = [host for host, result in results.items() if isinstance(result, Exception)]
+    print(f"Configuration complete ({len(results) - len(failed)}/{len(results)} switches"
+          f"{', failed: ' + ', '.join(failed) if failed else ''}).")
+    return results
 
 if __name__ == "__main__":
     csv_file = "layer3.csv"
     switch_ip = "192.168.100.100"
-    vtp_mode = "transparent" 
+    vtp_mode = "transparent"
     vtp_domain = "howest"
-    configure_layer3_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain)
+    diff_only = True  # only push what differs from the running-config
+    # All rows go to switch_ip; map a Switch column value to its own host to split them,
+    # e.g. {"2": "192.168.100.101"} (or `python -m common l3 push ... --switch-host 2=...`)
+    switch_hosts = {}
+    stack = False
+    configure_layer3_switch_from_csv(csv_file, switch_ip, vtp_mode, vtp_domain, diff_only,
+                                     switch_hosts=switch_hosts, stack=stack)
@@ -0,0 +1,152 @@
+import csv
+import io
+import ipaddress
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.intent_cache import load_or_compile
+from common.vlan_ranges import VlanRangeSet
+
+INTENT_VERSION = "3"  # bump when the compiled rows change, so cached intents are not reused
+PORT_PREFIX = "FastEthernet 0/"  # standalone switch
+STACK_PORT_PREFIX = "FastEthernet {switch}/0/"  # stack: ports are numbered per stack member
+
+def parse_vlan_range(vlan_range_str):
+    """Parse VLAN range (e.g., '300-400' or '300-400,500') into a VlanRangeSet."""
+    return VlanRangeSet.parse(vlan_range_str)
+
+class SwitchRow:
+    """One validated row of a layer 3 switch CSV."""
+    __slots__ = ("row_num", "kind", "vlan", "vlans", "description", "ip_address", "netmask",
+                 "ports", "switch")
+
+    def __init__(self, row_num, kind, vlan, vlans, description, ip_address, netmask, ports,
+                 switch):
+        self.row_num = row_num
+        self.kind = kind  # 'svi', 'trunk' or 'access'
+        self.vlan = vlan  # VLAN column as written in the CSV
+        self.vlans = vlans  # VlanRangeSet
+        self.description = description
+        self.ip_address = ip_address
+        self.netmask = netmask
+        self.ports = ports
+        self.switch = switch
+
+    @property
+    def vlan_id(self):
+        """VLAN used for the SVI and access ports (the first one of a range)."""
+        return self.vlans.first()
+
+    def blocks(self, port_prefix=PORT_PREFIX):
+        """
+        Return the command blocks for this row (without 'conf t'). `port_prefix` may
+        contain '{switch}', which is filled in with the row's Switch column.
+        """
+        port_range = f"interface range {port_prefix.format(switch=self.switch or '1')}{self.ports}"
+        if self.kind == "svi":
+            return [
+                [
+                    f"vlan {self.vlan_id}",
+                    f"name {self.description}",
+                    f"interface vlan{self.vlan_id}",
+                    f"description {self.description}",
+                    f"ip address {self.ip_address} {self.netmask}",
+                    "no shut"
+                ],
+                [
+                    port_range,
+                    "switchport mode access",
+                    f"switchport access vlan {self.vlan_id}",
+                    "no shut"
+                ],
+            ]
+        if self.kind == "trunk":
+            return [[
+                port_range,
+                "switchport mode trunk",
+                f"switchport trunk allowed vlan {self.vlans}",
+                "no shut"
+            ]]
+        return [[
+            f"vlan {self.vlan_id}",
+            f"name {self.description}",
+            port_range,
+            "switchport mode access",
+            f"switchport access vlan {self.vlan_id}",
+            "no shut"
+        ]]
+
+class SwitchIntent:
+    """Compiled layer 3 switch CSV, shared by the text renderer and the Netmiko pusher."""
+    __slots__ = ("rows",)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def partition(self):
+        """Split the rows by their Switch column; rows without a switch belong to switch 1."""
+        partitions = {}
+        for row in self.rows:
+            partitions.setdefault(row.switch or "1", []).append(row)
+        return {switch: SwitchIntent(rows) for switch, rows in partitions.items()}
+
+def _compile_row(row_num, row):
+    """Validate one cleaned CSV row and turn it into a SwitchRow."""
+    try:
+        vlans = parse_vlan_range(row["Vlan"])
+    except ValueError:
+        vlans = None
+    if not vlans or vlans.first() < 1 or vlans.last() > 4094:
+        raise ValueError(f"Row {row_num}: invalid VLAN '{row['Vlan']}'")
+    description = row["Description"]
+    ip_address = row.get("IP Address", "")
+    netmask = row.get("Netmask", "")
+
+    if ip_address and netmask:
+        try:
+            ipaddress.IPv4Interface(f"{ip_address}/{netmask}")
+        except ValueError:
+            raise ValueError(f"Row {row_num}: invalid IP address/netmask '{ip_address} {netmask}'")
+        kind = "svi"
+    elif 'trunk' in description.lower() or 'uplink' in description.lower():
+        kind = "trunk"
+    else:
+        kind = "access"
+    return SwitchRow(row_num, kind, row["Vlan"], vlans, description, ip_address, netmask,
+                     row["Ports"], row.get("Switch", ""))
+
+def iter_switch_rows(lines):
+    """Parse and validate CSV lines (e.g. an open file) one row at a time, yielding SwitchRows."""
+    csv_reader = csv.DictReader(lines, delimiter=';')
+    for row_num, row in enumerate(csv_reader, start=1):
+        # Clean headers and values (strip spaces)
+        row = {key.strip(): (value or "").strip() for key, value in row.items()}
+        yield _compile_row(row_num, row)
+
+def merge_trunk_rows(rows):
+    """
+    Merge the trunk rows while streaming: other rows are passed through immediately, trunk
+    rows are held back (one per switch/ports; later rows add VLANs instead of overwriting the
+    allowed list) and yielded last. compile_switch_csv_text uses the same order, so a config
+    rendered from a SwitchIntent is identical to the streamed one.
+    """
+    trunks = {}
+    for switch_row in rows:
+        if switch_row.kind != "trunk":
+            yield switch_row
+            continue
+        first = trunks.get((switch_row.switch, switch_row.ports))
+        if first is None:
+            trunks[(switch_row.switch, switch_row.ports)] = switch_row
+        else:
+            first.vlans = first.vlans | switch_row.vlans
+    yield from trunks.values()
+
+def compile_switch_csv_text(text):
+    """Parse and validate the CSV text into a SwitchIntent."""
+    return SwitchIntent(list(merge_trunk_rows(iter_switch_rows(io.StringIO(text)))))
+
+def compile_switch_csv(csv_file):
+    """Return the SwitchIntent of a CSV file, reusing the on-disk cache when the CSV is unchanged."""
+    return load_or_compile(csv_file, "switch", INTENT_VERSION, compile_switch_csv_text)
@@ -1,15 +1,17 @@
-from netmiko import ConnectHandler
+import os
+import sys
 
-cat3560 = {
-    'device_type': 'cisco_ios',
-    'host': '192.168.100.100',
-    'username': '<username>',
-    'password': '<password>',
-    'port': 22,
-    }
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import DEFAULT_POOL, cisco_device
 
-ssh = ConnectHandler(**cat3560)
-ssh.enable()
+cat3560 = cisco_device('192.168.100.100', '<username>', '<password>')
 
-result = ssh.send_command('show ip int br')
-print(result)
\ No newline at end of file
+def show_ip_int_br(device=cat3560, pool=DEFAULT_POOL):
+    """Run 'show ip int br' over the pooled session (reused by configure/verify in the same run)."""
+    with pool.session(device) as ssh:
+        ssh.enable()
+        return ssh.send_command('show ip int br')
+
+if __name__ == "__main__":
+    result = show_ip_int_br()
+    print(result)
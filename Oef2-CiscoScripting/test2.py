@@ -1,94 +1,86 @@
-import csv
+import os
+import sys
 
-def parse_vlan_range(vlan_range_str):
-    """Parse VLAN range (e.g., '300-400') and return a list of VLANs."""
-    vlan_list = []
-    if '-' in vlan_range_str:
-        start_vlan, end_vlan = vlan_range_str.split('-')
-        for vlan in range(int(start_vlan), int(end_vlan) + 1):
-            vlan_list.append(str(vlan))
-    else:
-        vlan_list.append(vlan_range_str)  # Single VLAN
-    return vlan_list
+from switch_intent import PORT_PREFIX, iter_switch_rows, merge_trunk_rows
 
-def generate_layer3_switch_config(csv_file, output_file, vtp_mode, vtp_domain):
-    # Open the output file where we will save the configuration
-    with open(output_file, 'w') as config_file:
-        config_file.write(f"vtp mode {vtp_mode}\n")
-        config_file.write(f"vtp domain {vtp_domain}\n")
-        config_file.write("vtp password secretpassword\n")  # Optionally add a VTP password
-        config_file.write("!\n")  # Separator for clarity
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.render_cache import DEFAULT_RENDER_CACHE, format_stats
+from common.stream_render import ChunkedWriter, DeviceWriters, write_lines
 
-        # Read the CSV file and generate VLAN configuration
-        print(f"Reading CSV file: {csv_file}")
-        with open(csv_file, mode="r") as file:
-            csv_reader = csv.DictReader(file, delimiter=';')
-            
-            for row_num, row in enumerate(csv_reader, start=1):
-                # Clean headers and values (strip spaces)
-                row = {key.strip(): value.strip() for key, value in row.items()}
-                
-                print(f"Processing row {row_num}: VLAN {row['Vlan']} - {row['Description']}")
-                
-                # Determine VLAN and IP Address configuration
-                vlan_str = row["Vlan"]
-                description = row["Description"]
-                ip_address = row.get("IP Address", "")
-                netmask = row.get("Netmask", "")
-                ports = row["Ports"]
-                
-                # Parse VLAN range if applicable
-                vlan_ids = parse_vlan_range(vlan_str)
+RENDER_VERSION = "1"  # bump when the rendered output changes, so cached configs are not reused
 
-                # Write VLAN interface and port configuration to the output file
-                if ip_address and netmask:  # If IP address and netmask are present
-                    config_file.write(f"conf t\n")
-                    config_file.write(f"vlan {vlan_ids[0]}\n")
-                    config_file.write(f"name {description}\n")
-                    config_file.write(f"interface vlan{vlan_ids[0]}\n")
-                    config_file.write(f"description {description}\n")
-                    config_file.write(f"ip address {ip_address} {netmask}\n")
-                    config_file.write("no shut\n")
-                    config_file.write("!\n")
+def vtp_lines(vtp_mode, vtp_domain):
+    """Yield the VTP header every switch config starts with."""
+    yield f"vtp mode {vtp_mode}"
+    yield f"vtp domain {vtp_domain}"
+    yield "vtp password secretpassword"  # Optionally add a VTP password
+    yield "!"  # Separator for clarity
 
-                    # Configure port range for the switch (based on the 'Ports' field)
-                    port_range = f"FastEthernet 0/{ports}"
-                    config_file.write(f"interface range {port_range}\n")
-                    config_file.write(f"switchport mode access\n")
-                    config_file.write(f"switchport access vlan {vlan_ids[0]}\n")
-                    config_file.write("no shut\n")
-                    config_file.write("!\n")
-                else:  # If no IP address is provided, just configure the ports
-                    # Check if 'trunk' or 'uplink' is in the Description
-                    if 'trunk' in description.lower() or 'uplink' in description.lower():
-                        # If trunking is needed
-                        if vlan_ids:
-                            vlan_filtering = ",".join(vlan_ids)
-                            config_file.write(f"conf t\n")
-                            config_file.write(f"interface range FastEthernet 0/{ports}\n")
-                            config_file.write(f"switchport mode trunk\n")
-                            config_file.write(f"switchport trunk allowed vlan {vlan_filtering}\n")
-                            config_file.write("no shut\n")
-                            config_file.write("!\n")
-                        else:
-                            config_file.write(f"conf t\n")
-                            config_file.write(f"interface range FastEthernet 0/{ports}\n")
-                            config_file.write(f"switchport mode trunk\n")
-                            config_file.write("no shut\n")
-                            config_file.write("!\n")
-                    else:
-                        config_file.write(f"conf t\n")
-                        config_file.write(f"vlan {vlan_ids[0]}\n")
-                        config_file.write(f"name {description}\n")
-                        config_file.write(f"interface range FastEthernet 0/{ports}\n")
-                        config_file.write(f"switchport mode access\n")
-                        config_file.write(f"switchport access vlan {vlan_ids[0]}\n")
-                        config_file.write("no shut\n")
-                        config_file.write("!\n")
+def row_lines(row, port_prefix=PORT_PREFIX):
+    """Yield the lines of one row: VLAN interface and port configuration, each row starts its own 'conf t'."""
+    yield "conf t"
+    for block in row.blocks(port_prefix):
+        yield from block
+        yield "!"
 
-        # End of the configuration
-        config_file.write("end\n")
+def layer3_config_lines(rows, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """Yield the configuration lines for an iterable of SwitchRows, one row at a time."""
+    yield from vtp_lines(vtp_mode, vtp_domain)
+    for row in rows:
+        yield from row_lines(row, port_prefix)
+    # End of the configuration
+    yield "end"
+
+def render_layer3_switch_config(intent, config_file, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """
+    Write the configuration text for a compiled SwitchIntent to an open file.
+    Use STACK_PORT_PREFIX to number the ports per stack member.
+    """
+    writer = ChunkedWriter(config_file)
+    writer.write_lines(layer3_config_lines(intent.rows, vtp_mode, vtp_domain, port_prefix))
+    writer.flush()
+
+def stream_layer3_switch_config(csv_file, output_file, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX):
+    """
+    Stream the CSV to the output file: rows are parsed, rendered and written in chunks
+    one at a time, so memory does not grow with the size of the CSV.
+    """
+    with open(csv_file, mode="r", newline="", encoding="utf-8-sig") as file:
+        rows = merge_trunk_rows(iter_switch_rows(file))
+        return write_lines(output_file, layer3_config_lines(rows, vtp_mode, vtp_domain, port_prefix))
+
+def generate_layer3_switch_config(csv_file, output_file, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX,
+                                  cache=DEFAULT_RENDER_CACHE):
+    """Render the CSV to the output file; an unchanged CSV and parameters are served from the render cache."""
+    print(f"Reading CSV file: {csv_file}")
+    if cache is None:
+        stream_layer3_switch_config(csv_file, output_file, vtp_mode, vtp_domain, port_prefix)
         print(f"Configuration written to {output_file}.")
+        return
+    params = {"vtp_mode": vtp_mode, "vtp_domain": vtp_domain, "port_prefix": port_prefix}
+    hit = cache.render(csv_file, output_file, "layer3", RENDER_VERSION, stream_layer3_switch_config, params)
+    print(f"Configuration written to {output_file}{' (render cache hit)' if hit else ''}.")
+    cache.flush_stats()
+    print(format_stats(cache.stats()))
+
+def generate_layer3_switch_configs(csv_file, output_dir, vtp_mode, vtp_domain, port_prefix=PORT_PREFIX,
+                                   file_name="switch{switch}_config.txt"):
+    """
+    Write one config file per value of the Switch column in a single pass over the CSV.
+    Returns {switch: path}.
+    """
+    print(f"Reading CSV file: {csv_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    writers = DeviceWriters(lambda switch: os.path.join(output_dir, file_name.format(switch=switch)),
+                            header=lambda switch: vtp_lines(vtp_mode, vtp_domain),
+                            footer=lambda switch: ["end"])
+    with open(csv_file, mode="r", newline="", encoding="utf-8-sig") as file, writers:
+        for row in merge_trunk_rows(iter_switch_rows(file)):
+            writers.writer(row.switch or "1").write_lines(row_lines(row, port_prefix))
+        paths = writers.close()
+    for switch, path in paths.items():
+        print(f"Switch {switch}: configuration written to {path}.")
+    return paths
 
 if __name__ == "__main__":
     csv_file = "layer3.csv"  # Path to your CSV file
@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from configure_broadband_router import generate_cisco_config, push_rendered_config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import DEFAULT_POOL, ConnectionPool
+from common.file_apply import scp_transfer
+
+EXIT_OK = 0
+EXIT_PUSH_FAILED = 1  # one or more routers could not be configured
+EXIT_RENDER_FAILED = 3  # a profile did not validate; nothing was pushed to its routers
+# (exit code 2 is what argparse uses for invalid arguments)
+
+DEFAULT_USERNAME = "adminuser"
+DEFAULT_PASSWORD = "admin123"
+
+def parse_mapping(pairs):
+    """Turn ['192.168.100.1=config1.csv', ...] into [(router, profile), ...]."""
+    mapping = []
+    for pair in pairs:
+        router, sep, profile = pair.partition("=")
+        if not sep or not router or not profile:
+            raise ValueError(f"Expected ROUTER=PROFILE, got '{pair}'")
+        mapping.append((router.strip(), profile.strip()))
+    return mapping
+
+def load_mapping(mapping_file):
+    """Read a router;profile CSV; profile paths are relative to the mapping file."""
+    base_dir = os.path.dirname(os.path.abspath(mapping_file))
+    with open(mapping_file, mode="r") as file:
+        csv_reader = csv.DictReader(file, delimiter=';')
+        return [(row["router"].strip(), os.path.join(base_dir, row["profile"].strip())) for row in csv_reader]
+
+def rendered_name(profile):
+    """
+    File name of a rendered profile: its name plus a hash of its full path, so two config1.csv
+    files from different directories do not overwrite each other while rendering in parallel.
+    """
+    path_hash = hashlib.sha1(os.path.abspath(profile).encode()).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(profile))[0]}_{path_hash}_config.txt"
+
+def render_profile(profile, output_dir):
+    """Worker process: validate and render one profile, return (output_file, seconds)."""
+    output_file = os.path.join(output_dir, rendered_name(profile))
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_cisco_config(profile, output_file)
+    except Exception:
+        # do not leave a half-written config behind for a profile that did not validate
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    return output_file, time.perf_counter() - start
+
+def render_profiles(profiles, output_dir, workers=None):
+    """Render every distinct profile once, in parallel worker processes. Returns {profile: result}."""
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {profile: executor.submit(render_profile, profile, output_dir) for profile in dict.fromkeys(profiles)}
+        for profile, future in futures.items():
+            try:
+                output_file, seconds = future.result()
+                results[profile] = {"status": "ok", "output": output_file, "seconds": seconds, "error": ""}
+            except Exception as e:
+                results[profile] = {"status": "failed", "output": None, "seconds": 0.0, "error": str(e)}
+    return results
+
+def push_router(router, config_file, username, password, diff_only, pool, transfer=scp_transfer):
+    """Push one rendered config to a router over SSH and return its result dict."""
+    start = time.perf_counter()
+    try:
+        commands = push_rendered_config(config_file, router, username, password, diff_only, pool, transfer)
+    except Exception as e:
+        return {"status": "failed", "seconds": time.perf_counter() - start, "commands": None, "error": str(e)}
+    return {"status": "ok", "seconds": time.perf_counter() - start, "commands": commands, "error": ""}
+
+def run_batch(mapping, output_dir="rendered", username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD,
+              diff_only=True, render_workers=None, push_workers=10, render_only=False, pool=DEFAULT_POOL,
+              transfer=scp_transfer):
+    """
+    Render all profiles in parallel processes, then push the rendered file of every router
+    whose profile rendered cleanly through a thread pool of SSH sessions. Returns the report dict.
+    """
+    started = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    batch_start = time.perf_counter()
+    renders = render_profiles([profile for _, profile in mapping], output_dir, render_workers)
+    render_done = time.perf_counter()
+
+    routers = []
+    # silence the per-router prints once, here: redirect_stdout swaps the global sys.stdout,
+    # so doing it inside every push thread would restore the streams in the wrong order
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=push_workers) as executor:
+        futures = []
+        for router, profile in mapping:
+            render = renders[profile]
+            if render["status"] != "ok":
+                result = {"status": "skipped", "seconds": 0.0, "commands": None,
+                          "error": f"profile did not render: {render['error']}"}
+            elif render_only:
+                result = {"status": "rendered", "seconds": 0.0, "commands": None, "error": ""}
+            else:
+                result = executor.submit(push_router, router, render["output"], username, password, diff_only,
+                                         pool, transfer)
+            futures.append((router, profile, result))
+        for router, profile, result in futures:
+            if not isinstance(result, dict):
+                result = result.result()
+            routers.append(dict(result, router=router, profile=profile, config=renders[profile]["output"],
+                                render_seconds=renders[profile]["seconds"]))
+
+    if any(render["status"] != "ok" for render in renders.values()):
+        exit_code = EXIT_RENDER_FAILED
+    elif any(router["status"] == "failed" for router in routers):
+        exit_code = EXIT_PUSH_FAILED
+    else:
+        exit_code = EXIT_OK
+    return {
+        "started": started,
+        "exit_code": exit_code,
+        "render_seconds": render_done - batch_start,
+        "push_seconds": time.perf_counter() - render_done,
+        "wall_seconds": time.perf_counter() - batch_start,
+        "profiles": renders,
+        "routers": routers,
+    }
+
+def print_report(report):
+    """Print one line per router and the batch totals."""
+    for router in report["routers"]:
+        line = (f"  {router['router']:<16} {os.path.basename(router['profile']):<14} {router['status']:<8} "
+                f"render {router['render_seconds']:6.2f} s  push {router['seconds']:6.2f} s")
+        if router["error"]:
+            line += f"  {router['error']}"
+        print(line)
+    ok = sum(1 for router in report["routers"] if router["status"] in ("ok", "rendered"))
+    print(f"{ok}/{len(report['routers'])} routers done in {report['wall_seconds']:.2f} s "
+          f"(render {report['render_seconds']:.2f} s, push {report['push_seconds']:.2f} s), "
+          f"exit code {report['exit_code']}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render and push router profiles without prompting.")
+    parser.add_argument("routers", nargs="*", help="ROUTER=PROFILE pairs, e.g. 192.168.100.1=config1.csv")
+    parser.add_argument("--mapping", help="router;profile CSV instead of (or in addition to) the pairs")
+    parser.add_argument("--username", default=os.environ.get("ROUTER_USERNAME", DEFAULT_USERNAME))
+    parser.add_argument("--password", default=os.environ.get("ROUTER_PASSWORD", DEFAULT_PASSWORD))
+    parser.add_argument("--output-dir", default="rendered", help="directory for the rendered configs")
+    parser.add_argument("--render-workers", type=int, default=None, help="worker processes for rendering")
+    parser.add_argument("--workers", type=int, default=10, help="routers configured at once")
+    parser.add_argument("--full", action="store_true", help="send the whole profile instead of only the diff")
+    parser.add_argument("--render-only", action="store_true", help="validate and render, do not connect")
+    parser.add_argument("--report", help="write the JSON timing report to this file ('-' for stdout)")
+    parser.add_argument("--mock", action="store_true", help="push to simulated IOS devices (common/mock_ios.py)")
+    args = parser.parse_args()
+
+    try:
+        mapping = parse_mapping(args.routers) + (load_mapping(args.mapping) if args.mapping else [])
+    except (OSError, KeyError, ValueError) as e:
+        parser.error(str(e))
+    if not mapping:
+        parser.error("no routers given")
+
+    if args.mock:
+        from common.mock_ios import MockFleet, flash_transfer
+        pool = ConnectionPool(connect=MockFleet())
+        transfer = flash_transfer
+    else:
+        pool = DEFAULT_POOL
+        transfer = scp_transfer
+
+    report = run_batch(mapping, args.output_dir, args.username, args.password, not args.full,
+                       args.render_workers, args.workers, args.render_only, pool, transfer)
+    print_report(report)
+    if args.report == "-":
+        print(json.dumps(report, indent=2))
+    elif args.report:
+        with open(args.report, mode="w") as file:
+            json.dump(report, file, indent=2)
+    raise SystemExit(report["exit_code"])
@@ -1,113 +1,177 @@
-import csv
-from netmiko import ConnectHandler
-
-def generate_cisco_config(csv_file, output_file):
-    """Generate Cisco configuration from CSV."""
-    with open(csv_file, mode='r') as file:
-        csv_reader = csv.DictReader(file, delimiter=';')
-        
-        static_routes = []
-        wan_gateway = None
-
-        with open(output_file, mode='w') as out_file:
-            out_file.write("! Cisco Router Configuration\n")
-            out_file.write("! Generated from CSV\n\n")
-            
-            for row in csv_reader:
-                network_type = row['network'].strip()
-                interface = row['interface'].strip()
-                description = row['description'].strip()
-                vlan = row['vlan'].strip()
-                ip_address = row['ipaddress'].strip()
-                subnetmask = row['subnetmask'].strip()
-                default_gateway = row['defaultgateway'].strip()
-                
-                if interface:
-                    out_file.write(f"interface {interface}\n")
-                    out_file.write(f" description {description}\n")
-                    if ip_address.lower() == "dhcp":
-                        out_file.write(" ip address dhcp\n")
-                    elif ip_address and subnetmask:
-                        out_file.write(f" ip address {ip_address} {subnetmask}\n")
-                    if vlan != "0":
-                        out_file.write(f" switchport access vlan {vlan}\n")
-                    out_file.write(" no shutdown\n\n")
-                
-                #WAN conf
-                if network_type.lower() == "wan" and default_gateway:
-                    wan_gateway = default_gateway
-                
-                #handle static routes for LAN subnets
-                if network_type.lower() == "lan" and default_gateway:
-                    static_routes += handle_static_routes(ip_address, subnetmask, default_gateway)
-
-            #add routing
-            out_file.write("! Static Routes Configuration\n")
-            if wan_gateway:
-                out_file.write(f"ip route 0.0.0.0 0.0.0.0 {wan_gateway}\n")
-            for route in static_routes:
-                out_file.write(f"{route}\n")
-            out_file.write("! IP routing was enabled to allow internet access.\n")
-            out_file.write("! End of Configuration\n")
-            print(f"Configuration saved to {output_file}.")
-
-def configure_router_remotely(csv_file, router_ip, username, password):
-    """Configure router remotely using Netmiko."""
-    with open(csv_file, mode='r') as file:
-        csv_reader = csv.DictReader(file, delimiter=';')
-        
-        static_routes = []
-        wan_gateway = None
-
-        device = {
-            'device_type': 'cisco_ios',
-            'host': router_ip,
-            'username': username,
-            'password': password,
-            'port': 22,
-        }
-        
-        with ConnectHandler(**device) as net_connect:
-            print(f"Connected to {router_ip} via SSH.")
-            
-            for row in csv_reader:
-                network_type = row['network'].strip()
-                interface = row['interface'].strip()
-                description = row['description'].strip()
-                vlan = row['vlan'].strip()
-                ip_address = row['ipaddress'].strip()
-                subnetmask = row['subnetmask'].strip()
-                default_gateway = row['defaultgateway'].strip()
-                
-                commands = []
-
-                if interface:
-                    commands += [
-                        f"interface {interface}",
-                        f" description {description}",
-                    ]
-                    if ip_address.lower() == "dhcp":
-                        commands.append(" ip address dhcp")
-                    elif ip_address and subnetmask:
-                        commands.append(f" ip address {ip_address} {subnetmask}")
-                    if vlan != "0":
-                        commands.append(f" switchport access vlan {vlan}")
-                    commands.append(" no shutdown")
-                
-                if network_type.lower() == "wan" and default_gateway:
-                    wan_gateway = default_gateway
-                
-                if network_type.lower() == "lan" and default_gateway:
-                    static_routes += handle_static_routes(ip_address, subnetmask, default_gateway)
-                
-                if commands:
-                    net_connect.send_config_set(commands)
-            
-            routing_commands = handle_routing(wan_gateway) + static_routes
-            net_connect.send_config_set(routing_commands)
-            
-            net_connect.save_config()
+import os
+import shutil
+import sys
+import tempfile
+
+from router_intent import compile_router_csv, iter_router_records
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import DEFAULT_POOL, cisco_device, write_memory
+from common.fast_apply import send_config_chunked
+from common.file_apply import apply_config_file, scp_transfer
+from common.render_cache import DEFAULT_RENDER_CACHE, format_stats
+from common.rollout_journal import push_blocks_with_checkpoints
+from common.running_config import diff_config, fetch_running_config, split_sections
+from common.stream_render import ChunkedWriter
+
+RENDER_VERSION = "1"  # bump when the rendered output changes, so cached configs are not reused
+
+def routing_commands(intent):
+    """Return the default route followed by the static LAN routes of a compiled router CSV."""
+    static_routes = []
+    for network, subnet_mask, default_gateway in intent.static_routes:
+        static_routes += handle_static_routes(network, subnet_mask, default_gateway)
+    return handle_routing(intent.wan_gateway) + static_routes
+
+def render_cisco_config(csv_file, output_file):
+    """
+    Render the Cisco configuration of a CSV to a file. Rows are streamed: interfaces are written in
+    chunks as they are read and static routes are spooled to a temporary file until the
+    routing section, so memory does not grow with the size of the CSV.
+    """
+    wan_gateway = None
+    with open(csv_file, mode="r", newline="", encoding="utf-8-sig") as file, \
+            open(output_file, mode='w') as out_file, tempfile.TemporaryFile(mode="w+") as spool:
+        writer = ChunkedWriter(out_file)
+        routes = ChunkedWriter(spool)
+        writer.write_lines(["! Cisco Router Configuration", "! Generated from CSV", ""])
+
+        for kind, value in iter_router_records(file):
+            if kind == "interface":
+                writer.write_lines(value.commands())
+                writer.write_line("")
+            elif kind == "wan":
+                wan_gateway = value
+            else:
+                routes.write_lines(handle_static_routes(*value))
+
+        #add routing
+        writer.write_line("! Static Routes Configuration")
+        writer.write_lines(handle_routing(wan_gateway))
+        writer.flush()
+        routes.flush()
+        spool.seek(0)
+        shutil.copyfileobj(spool, out_file)
+        out_file.write("! IP routing was enabled to allow internet access.\n")
+        out_file.write("! End of Configuration\n")
+
+def generate_cisco_config(csv_file, output_file, cache=DEFAULT_RENDER_CACHE):
+    """Generate Cisco configuration from CSV; an unchanged CSV is served from the render cache."""
+    if cache is None:
+        render_cisco_config(csv_file, output_file)
+        print(f"Configuration saved to {output_file}.")
+        return
+    hit = cache.render(csv_file, output_file, "router", RENDER_VERSION, render_cisco_config)
+    print(f"Configuration saved to {output_file}{' (render cache hit)' if hit else ''}.")
+    cache.flush_stats()
+    print(format_stats(cache.stats()))
+
+def build_router_blocks(intent):
+    """Build the intended router configuration as (header, lines) blocks, header None for routes."""
+    blocks = []
+    for interface in intent.interfaces:
+        blocks += split_sections(interface.commands())
+    routes = routing_commands(intent)
+    if routes:
+        blocks.append((None, routes))
+    return blocks
+
+def apply_router_diff(net_connect, intent, blocks=None):
+    """Fetch the running-config once and only send the lines that are missing or changed."""
+    running = fetch_running_config(net_connect)
+    commands = diff_config(blocks if blocks is not None else build_router_blocks(intent), running)
+    if not commands:
+        print("Router already matches the CSV, nothing to send.")
+        return commands
+    print(f"Sending {len(commands)} changed lines...")
+    net_connect.send_config_set(commands)
+    write_memory(net_connect)
+    return commands
+
+def build_labeled_router_commands(intent):
+    """All router commands as (label, command); the label is the CSV row, 'routes' for routing."""
+    commands = []
+    for interface in intent.interfaces:
+        commands += [(interface.row_num, command) for command in interface.commands()]
+    commands += [("routes", command) for command in routing_commands(intent)]
+    return commands
+
+def configure_router_remotely(csv_file, router_ip, username, password, diff_only=False,
+                              pool=DEFAULT_POOL, fast=False, checkpoint=None, via_file=False,
+                              transfer=scp_transfer, connect_options=None):
+    """
+    Configure router remotely using Netmiko (the SSH session is kept in the pool for reuse).
+    `connect_options` are extra Netmiko parameters, e.g. the fleet runner's timeouts.
+    With `fast`, everything is written in chunks without per-line pacing (common/fast_apply.py).
+    With `via_file`, the rendered config is copied to flash and merged in one step (common/file_apply.py).
+    """
+    intent = compile_router_csv(csv_file)
+
+    device = cisco_device(router_ip, username, password, **(connect_options or {}))
+
+    with pool.session(device) as net_connect:
+        print(f"Connected to {router_ip} via SSH.")
+
+        if diff_only:
+            return apply_router_diff(net_connect, intent)
+
+        if checkpoint is not None:
+            # Resumable rollout: interfaces confirmed (saved) in an earlier run are skipped
+            blocks = [(interface.row_num, interface.commands()) for interface in intent.interfaces]
+            blocks.append(("routes", routing_commands(intent)))
+            sent = push_blocks_with_checkpoints(net_connect, blocks, checkpoint)
+            print(f"Sent {len(sent)} of {len(blocks)} blocks, {len(blocks) - len(sent)} already confirmed.")
+            return sent
+
+        if via_file:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                config_file = os.path.join(tmp_dir, "router_config.txt")
+                render_cisco_config(csv_file, config_file)
+                count = apply_config_file(net_connect, config_file, "router_config.txt", transfer)
+            write_memory(net_connect)
+            print(f"Configuration merged from flash ({count} lines).")
+            return
+
+        if fast:
+            commands = build_labeled_router_commands(intent)
+            send_config_chunked(net_connect, commands)
+            write_memory(net_connect)
             print("Configuration applied remotely.")
+            return [command for _, command in commands]
+
+        for interface in intent.interfaces:
+            net_connect.send_config_set(interface.commands())
+
+        net_connect.send_config_set(routing_commands(intent))
+
+        write_memory(net_connect)
+        print("Configuration applied remotely.")
+
+def read_rendered_config(config_file):
+    """The command lines of a rendered router_config.txt, without the comment and blank lines."""
+    with open(config_file, mode="r") as file:
+        return [line.rstrip("\n") for line in file if line.strip() and not line.lstrip().startswith("!")]
+
+def push_rendered_config(config_file, router_ip, username, password, diff_only=False, pool=DEFAULT_POOL,
+                         transfer=scp_transfer, connect_options=None):
+    """
+    Push a config that was already rendered by generate_cisco_config, without compiling its CSV
+    again. With `diff_only` only the lines missing from the running-config are sent, otherwise
+    the file is merged from flash in one step. Returns the number of lines sent.
+    """
+    device = cisco_device(router_ip, username, password, **(connect_options or {}))
+
+    with pool.session(device) as net_connect:
+        print(f"Connected to {router_ip} via SSH.")
+
+        if diff_only:
+            blocks = split_sections(read_rendered_config(config_file))
+            return len(apply_router_diff(net_connect, None, blocks))
+
+        count = apply_config_file(net_connect, config_file, "router_config.txt", transfer)
+        write_memory(net_connect)
+        print(f"Configuration merged from flash ({count} lines).")
+        return count
 
 #handle static routes for specific subnets
 def handle_static_routes(network, subnet_mask, default_gateway):
@@ -133,6 +197,7 @@ if __name__ == "__main__":
         router_ip = "192.168.100.100"
         username = "adminuser"
         password = "admin123"
-        configure_router_remotely(csv_file, router_ip, username, password)
+        diff_only = True  # only push what differs from the running-config
+        configure_router_remotely(csv_file, router_ip, username, password, diff_only)
     else:
         print("Invalid input. Please choose 'R' for remote or 'L' for local.")
@@ -0,0 +1,106 @@
+import csv
+import io
+import ipaddress
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.intent_cache import load_or_compile
+
+INTENT_VERSION = "2"
+
+class RouterInterface:
+    """One interface row of a router CSV."""
+    __slots__ = ("name", "description", "vlan", "ip_address", "subnetmask", "row_num")
+
+    def __init__(self, name, description, vlan, ip_address, subnetmask, row_num=None):
+        self.name = name
+        self.description = description
+        self.vlan = vlan
+        self.ip_address = ip_address
+        self.subnetmask = subnetmask
+        self.row_num = row_num
+
+    def commands(self):
+        """Return the interface commands, indented the way they appear in router_config.txt."""
+        commands = [
+            f"interface {self.name}",
+            f" description {self.description}",
+        ]
+        if self.ip_address.lower() == "dhcp":
+            commands.append(" ip address dhcp")
+        elif self.ip_address and self.subnetmask:
+            commands.append(f" ip address {self.ip_address} {self.subnetmask}")
+        if self.vlan != "0":
+            commands.append(f" switchport access vlan {self.vlan}")
+        commands.append(" no shutdown")
+        return commands
+
+class RouterIntent:
+    """Compiled router CSV, shared by generate_cisco_config and configure_router_remotely."""
+    __slots__ = ("interfaces", "wan_gateway", "static_routes")
+
+    def __init__(self, interfaces, wan_gateway, static_routes):
+        self.interfaces = interfaces
+        self.wan_gateway = wan_gateway
+        self.static_routes = static_routes  # list of (network, subnetmask, gateway)
+
+def _check_address(row_num, value, what):
+    """Raise a ValueError with the row number when value is not an IPv4 address."""
+    try:
+        ipaddress.IPv4Address(value)
+    except ValueError:
+        raise ValueError(f"Row {row_num}: invalid {what} '{value}'")
+
+def iter_router_records(lines):
+    """
+    Parse and validate CSV lines (e.g. an open file) one row at a time. Yields
+    ("interface", RouterInterface), ("wan", gateway) and ("route", (network, mask, gateway)).
+    """
+    csv_reader = csv.DictReader(lines, delimiter=';')
+    for row_num, row in enumerate(csv_reader, start=1):
+        network_type = row['network'].strip().lower()
+        interface = row['interface'].strip()
+        description = row['description'].strip()
+        vlan = row['vlan'].strip()
+        ip_address = row['ipaddress'].strip()
+        subnetmask = row['subnetmask'].strip()
+        default_gateway = (row['defaultgateway'] or "").strip()
+
+        if not vlan.isdigit() or int(vlan) > 4094:
+            raise ValueError(f"Row {row_num}: invalid VLAN '{vlan}'")
+        if ip_address and ip_address.lower() != "dhcp":
+            _check_address(row_num, ip_address, "IP address")
+        if subnetmask:
+            _check_address(row_num, subnetmask, "subnet mask")
+        if default_gateway:
+            _check_address(row_num, default_gateway, "default gateway")
+
+        if interface:
+            yield "interface", RouterInterface(interface, description, vlan, ip_address, subnetmask, row_num)
+
+        #WAN conf
+        if network_type == "wan" and default_gateway:
+            yield "wan", default_gateway
+
+        #static routes for LAN subnets
+        if network_type == "lan" and default_gateway and ip_address and subnetmask:
+            yield "route", (ip_address, subnetmask, default_gateway)
+
+def compile_router_csv_text(text):
+    """Parse and validate the CSV text into a RouterIntent."""
+    interfaces = []
+    static_routes = []
+    wan_gateway = None
+    for kind, value in iter_router_records(io.StringIO(text)):
+        if kind == "interface":
+            interfaces.append(value)
+        elif kind == "wan":
+            wan_gateway = value
+        else:
+            static_routes.append(value)
+    return RouterIntent(interfaces, wan_gateway, static_routes)
+
+def compile_router_csv(csv_file):
+    """Return the RouterIntent of a CSV file, reusing the on-disk cache when the CSV is unchanged."""
+    return load_or_compile(csv_file, "router", INTENT_VERSION, compile_router_csv_text)
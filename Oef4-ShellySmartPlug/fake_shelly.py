@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class FakeShellyHandler(BaseHTTPRequestHandler):
+    """Answers the Shelly API v1 endpoints used by set_shelly_plug.py (keep-alive enabled)."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        params = dict(parse_qsl(urlsplit(self.path).query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+        return params
+
+    def _reply(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        path = urlsplit(self.path).path.rstrip("/")
+        params = self._params()
+        with server.lock:
+            server.requests.append(path)
+            if path == "/settings":
+                server.settings.update(params)
+                self._reply(server.settings)
+            elif path.startswith("/settings/relay/"):
+                server.relay.update(params)
+                self._reply(server.relay)
+            elif path == "/settings/sta":
+                server.sta.update(params)
+                self._reply(server.sta)
+            elif path in ("/settings/reboot", "/reboot"):
+                server.reboots += 1
+                self._reply({"ok": True})
+            elif path == "/status":
+                server.status["uptime"] = int(time.monotonic() - server.started)
+                self._reply(server.status)
+            else:
+                self._reply({"error": "not found"}, status=404)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class FakeShelly(ThreadingHTTPServer):
+    """Local stand-in for a Shelly Plug S; use start()/stop() or as a context manager."""
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), FakeShellyHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []
+        self.settings = {}
+        self.relay = {}
+        self.sta = {}
+        self.reboots = 0
+        self.started = time.monotonic()
+        self.status = {
+            "wifi_sta": {"connected": True, "ip": host},
+            "relays": [{"ison": False}],
+            "meters": [{"power": 0.0, "total": 0}],
+            "uptime": 0,
+        }
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def set_meter(self, power, ison=True):
+        """Change what /status reports as the current load and relay state."""
+        with self.lock:
+            self.status["meters"][0]["power"] = power
+            self.status["relays"][0]["ison"] = ison
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def stop_all(fakes):
+    """Stop many fakes in parallel; shutdown() waits up to half a second per server."""
+    threads = [threading.Thread(target=fake.stop) for fake in fakes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
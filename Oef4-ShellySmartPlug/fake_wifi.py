@@ -0,0 +1,61 @@
+import time
+
+from pywifi import const
+
+
+class FakeScanResult:
+    def __init__(self, ssid):
+        self.ssid = ssid
+
+
+class FakeInterface:
+    """
+    Stand-in for a pywifi interface: scan results and connections only show up after
+    the configured delays, like a real adapter, so the wait layer can be exercised offline.
+    """
+
+    def __init__(self, ssids, scan_delay=0.3, connect_delay=0.5, disconnect_delay=0.1,
+                 clock=time.monotonic):
+        self.ssids = list(ssids)
+        self.scan_delay = scan_delay
+        self.connect_delay = connect_delay
+        self.disconnect_delay = disconnect_delay
+        self.clock = clock
+        self.scans = 0
+        self.connected_ssid = None
+        self._scan_ready_at = None
+        self._state = const.IFACE_DISCONNECTED
+        self._state_at = 0.0
+        self._target_state = const.IFACE_DISCONNECTED
+        self._profiles = []
+
+    def scan(self):
+        self.scans += 1
+        self._scan_ready_at = self.clock() + self.scan_delay
+
+    def scan_results(self):
+        if self._scan_ready_at is None or self.clock() < self._scan_ready_at:
+            return []
+        return [FakeScanResult(ssid) for ssid in self.ssids]
+
+    def add_network_profile(self, profile):
+        self._profiles.append(profile)
+        return profile
+
+    def remove_all_network_profiles(self):
+        self._profiles.clear()
+
+    def connect(self, profile):
+        self._state_at = self.clock() + self.connect_delay
+        self._target_state = const.IFACE_CONNECTED if profile.ssid in self.ssids else const.IFACE_DISCONNECTED
+        self.connected_ssid = profile.ssid if profile.ssid in self.ssids else None
+
+    def disconnect(self):
+        self._state_at = self.clock() + self.disconnect_delay
+        self._target_state = const.IFACE_DISCONNECTED
+        self.connected_ssid = None
+
+    def status(self):
+        if self.clock() >= self._state_at:
+            self._state = self._target_state
+        return self._state
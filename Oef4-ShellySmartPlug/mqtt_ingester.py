@@ -0,0 +1,297 @@
+import argparse
+import collections
+import json
+import threading
+import time
+
+from shelly_client import PLUG_SETTINGS
+from timeseries_store import STORE_DIR, TimeSeriesStore
+
+MQTT_PORT = 1883
+TOPIC_FILTER = "shellies/#"  # setup_mqtt/provision set mqtt_id, the plug publishes under shellies/<mqtt_id>/
+BATCH_SIZE = 1000  # messages decoded and written per store call
+FLUSH_INTERVAL = 0.1  # seconds a message waits at most for its batch
+MAX_QUEUED = 100000  # messages held while the writer is behind; newer ones are dropped (and counted)
+REPORT_EVERY = 5.0
+
+
+def topic_matches(pattern, topic):
+    """MQTT wildcard match: '+' is one level, a trailing '#' any number of levels."""
+    pattern_levels = pattern.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(pattern_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels) or (level != "+" and level != topic_levels[index]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class LocalBroker:
+    """
+    In-process stand-in for an MQTT broker: publish() calls the callback of every matching
+    subscription on the publisher's thread, like paho calls on_message on its network thread.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, pattern, callback):
+        with self._lock:
+            self.subscriptions.append((pattern, callback))
+
+    def publish(self, topic, payload):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        for pattern, callback in self.subscriptions:
+            if topic_matches(pattern, topic):
+                callback(topic, payload)
+
+
+def connect_paho(host, port, on_message, topic_filter=TOPIC_FILTER):
+    """Subscribe to a real broker with paho-mqtt (optional, only needed for --broker)."""
+    try:
+        import paho.mqtt.client as mqtt
+    except ImportError:
+        raise SystemExit("paho-mqtt is not installed: pip install paho-mqtt (or use --bench)")
+    try:
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    except AttributeError:
+        client = mqtt.Client()  # paho-mqtt 1.x
+    # (re)subscribe on every connect, so a broker restart does not silently stop the feed
+    client.on_connect = lambda client, *args: client.subscribe(topic_filter, qos=0)
+    client.on_message = lambda client, userdata, message: on_message(message.topic, message.payload)
+    client.connect(host, port)
+    client.loop_start()
+    return client
+
+
+class MqttIngester:
+    """
+    Turns Shelly Plug S MQTT messages into samples in a TimeSeriesStore.
+    on_message() only appends (received time, topic, payload) to a queue, so the MQTT network
+    thread never waits on decoding or disk. A writer thread drains the queue in batches of
+    up to `batch_size`, decodes them and writes each batch with one append_many call.
+    Every power, relay or info message becomes a sample with the plug's latest state.
+    At most `max_queued` messages wait; when the store falls that far behind, new messages
+    are dropped and counted instead of growing memory without bound.
+    """
+
+    def __init__(self, store, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_queued=MAX_QUEUED):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self.state = {}  # mqtt_id -> [power W, relay on, uptime s]
+        self.counters = collections.Counter()
+        self.max_lag = 0.0
+        self.last_error = None
+        self._queue = collections.deque()
+        self._drop_lock = threading.Lock()  # publishers of the LocalBroker call on_message concurrently
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._writer = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._writer.start()
+        return self
+
+    def stop(self):
+        """Write what is still queued, then flush the store."""
+        self._stop.set()
+        self._wake.set()
+        self._writer.join()
+        self.store.flush()
+
+    def on_message(self, topic, payload):
+        if len(self._queue) >= self.max_queued:
+            with self._drop_lock:
+                self.counters["dropped"] += 1
+            return
+        self._queue.append((time.time(), topic, payload))
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set() or self._queue:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                try:
+                    self._write(batch)
+                except Exception as e:  # keep draining: a dead writer would let the queue fill up silently
+                    self.counters["write_errors"] += 1
+                    self.counters["lost"] += len(batch)
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+    def decode(self, received, topic, payload):
+        """Update the plug's state from one message; returns a sample tuple or None."""
+        parts = topic.split("/", 2)
+        if len(parts) < 3 or parts[0] != "shellies":
+            self.counters["ignored"] += 1
+            return None
+        device, path = parts[1], parts[2]
+        state = self.state.get(device)
+        if state is None:
+            state = self.state[device] = [0.0, False, 0]
+        if path == "relay/0/power":
+            state[0] = float(payload)
+        elif path == "relay/0":
+            state[1] = payload == b"on"
+        elif path == "info":
+            info = json.loads(payload)
+            state[0] = float((info.get("meters") or [{}])[0].get("power", state[0]))
+            state[1] = bool((info.get("relays") or [{}])[0].get("ison", state[1]))
+            state[2] = int(info.get("uptime", state[2]))
+        else:
+            self.counters["ignored"] += 1  # energy, temperature, online, announce, ...
+            return None
+        return device, received, state[0], state[1], state[2]
+
+    def _write(self, batch):
+        samples = []
+        for received, topic, payload in batch:
+            try:
+                sample = self.decode(received, topic, payload)
+            except (ValueError, TypeError, AttributeError, IndexError):
+                self.counters["errors"] += 1
+                continue
+            if sample is not None:
+                samples.append(sample)
+        self.store.append_many(samples)
+        self.counters["processed"] += len(batch)
+        self.counters["samples"] += len(samples)
+        self.counters["batches"] += 1
+        self.max_lag = max(self.max_lag, time.time() - batch[0][0])
+
+    def stats(self):
+        """Throughput and lag counters; lag is the age of the oldest message still queued."""
+        queue = self._queue
+        try:
+            oldest = queue[0][0]
+        except IndexError:  # empty, or drained by the writer since the check
+            oldest = None
+        elapsed = time.perf_counter() - self._started
+        return {
+            "processed": self.counters["processed"],
+            "samples": self.counters["samples"],
+            "ignored": self.counters["ignored"],
+            "errors": self.counters["errors"],
+            "dropped": self.counters["dropped"],
+            "write_errors": self.counters["write_errors"],
+            "lost": self.counters["lost"],
+            "last_error": self.last_error,
+            "batches": self.counters["batches"],
+            "queued": len(queue),
+            "lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+            "max_lag_seconds": self.max_lag,
+            "messages_per_second": self.counters["processed"] / elapsed if elapsed else 0.0,
+            "plugs": len(self.state),
+        }
+
+
+def print_stats(stats):
+    print(f"{stats['processed']} messages ({stats['messages_per_second']:.0f}/s) from {stats['plugs']} plugs, "
+          f"{stats['samples']} samples in {stats['batches']} batches, {stats['ignored']} ignored, "
+          f"{stats['errors']} errors; queued {stats['queued']}, lag {stats['lag_seconds'] * 1000:.0f} ms "
+          f"(max {stats['max_lag_seconds'] * 1000:.0f} ms)")
+    if stats["dropped"] or stats["write_errors"]:
+        print(f"  {stats['dropped']} dropped on a full queue, {stats['write_errors']} failed writes "
+              f"({stats['lost']} messages lost), last error: {stats['last_error']}")
+
+
+def publish_plug_telemetry(broker, mqtt_ids, messages, rate=None):
+    """
+    Publish `messages` messages like Shelly Plug S firmware does: mostly relay/0/power,
+    with relay/0, relay/0/energy and info in between. With `rate` (messages per second)
+    the publisher is paced, otherwise it publishes as fast as it can.
+    """
+    start = time.perf_counter()
+    for index in range(messages):
+        mqtt_id = mqtt_ids[index % len(mqtt_ids)]
+        kind = index // len(mqtt_ids) % 10
+        topic = f"shellies/{mqtt_id}"
+        if kind == 0:
+            broker.publish(f"{topic}/relay/0", "on" if index % 3 else "off")
+        elif kind == 5:
+            broker.publish(f"{topic}/info", json.dumps({"uptime": index, "relays": [{"ison": True}],
+                                                        "meters": [{"power": index % 2000 / 10}]}))
+        elif kind == 9:
+            broker.publish(f"{topic}/relay/0/energy", str(index))
+        else:
+            broker.publish(f"{topic}/relay/0/power", f"{index % 20000 / 10:.2f}")
+        if rate:
+            ahead = (index + 1) / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def benchmark_ingest(messages, plugs, publishers, store_dir, rate=None, batch_size=BATCH_SIZE):
+    """Publish through a LocalBroker from `publishers` threads and report ingest throughput and lag."""
+    mqtt_ids = [PLUG_SETTINGS["mqtt_topic"].format(index=index) for index in range(1, plugs + 1)]
+    with TimeSeriesStore(store_dir) as store:
+        ingester = MqttIngester(store, batch_size=batch_size).start()
+        broker = LocalBroker()
+        broker.subscribe(TOPIC_FILTER, ingester.on_message)
+        per_thread = messages // publishers
+        threads = [threading.Thread(target=publish_plug_telemetry,
+                                    args=(broker, mqtt_ids[index::publishers], per_thread,
+                                          rate / publishers if rate else None))
+                   for index in range(publishers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        published = time.perf_counter() - start
+        ingester.stop()
+        total = time.perf_counter() - start
+        stats = ingester.stats()
+    print(f"Published {per_thread * publishers} messages from {publishers} threads in {published:.2f} s "
+          f"({per_thread * publishers / published:.0f}/s); all ingested after {total:.2f} s "
+          f"({stats['processed'] / total:.0f} messages/s end to end)")
+    print_stats(stats)
+    return stats
+
+
+def run_ingester(host, port=MQTT_PORT, store_dir=STORE_DIR, duration=None, report_every=REPORT_EVERY):
+    """Ingest from a real broker until `duration` seconds passed (or Ctrl+C), printing the counters."""
+    with TimeSeriesStore(store_dir) as store:
+        ingester = MqttIngester(store).start()
+        client = connect_paho(host, port, ingester.on_message)
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                remaining = report_every if deadline is None else deadline - time.monotonic()
+                time.sleep(max(0, min(report_every, remaining)))
+                print_stats(ingester.stats())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.loop_stop()
+            client.disconnect()
+            ingester.stop()
+        print_stats(ingester.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store the MQTT telemetry of the Shelly plugs.")
+    parser.add_argument("--broker", default=PLUG_SETTINGS["mqtt_broker"], help="MQTT broker host[:port]")
+    parser.add_argument("--store", default=STORE_DIR, help="directory of the time-series store")
+    parser.add_argument("--duration", type=float, help="seconds to run (default: until Ctrl+C)")
+    parser.add_argument("--bench", type=int, metavar="MESSAGES",
+                        help="benchmark against the in-process broker instead")
+    parser.add_argument("--plugs", type=int, default=500, help="plugs simulated by --bench")
+    parser.add_argument("--publishers", type=int, default=4, help="publisher threads for --bench")
+    parser.add_argument("--rate", type=float, help="messages per second for --bench (default: unpaced)")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark_ingest(args.bench, args.plugs, args.publishers, args.store, args.rate)
+    else:
+        host, _, port = args.broker.partition(":")
+        run_ingester(host, int(port or MQTT_PORT), args.store, args.duration)
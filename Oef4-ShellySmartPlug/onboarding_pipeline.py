@@ -0,0 +1,196 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from set_shelly_plug import (WIFI_SSID, WIFI_PASSWORD, connect_to_ap, connect_to_originl_network,
+                             get_interface, scan_shelly_devices)
+from shelly_client import DEFAULT_CONCURRENCY, PLUG_SETTINGS, ShellyClient
+from wifi_waits import ScanCache
+
+STATE_FILE = "onboarding_state.json"
+SHELLY_AP_URL = "http://192.168.33.1"  #default adres op het AP van de plug
+CONFIRM_DEADLINE = 180  # seconds a plug gets to show up on the production LAN
+CONFIRM_INTERVAL = 3  # seconds between /status probes
+
+
+def default_ap_url(ssid):
+    """Every plug answers on the same address on its own access point."""
+    return SHELLY_AP_URL
+
+
+def default_lan_url(ssid, hostname):
+    """Shelly v1 plugs register their hostname (e.g. shellyplug-s-7C87CE) on the LAN."""
+    return f"http://{hostname or ssid}.local"
+
+
+class OnboardingState:
+    """
+    Resumable per-plug progress, stored as JSON after every stage:
+    {ssid: {"stage": "handed_off" | "confirmed" | "failed", "index": n, "hostname": ..., "timings": {...}}}
+    The index numbers the plug's name and MQTT topic; it is assigned once and kept.
+    A handed-off plug that did not show up on the LAN in time stays "handed_off" (with an
+    error), because it no longer broadcasts its AP: the next run probes it again.
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.plugs = {}
+        if os.path.exists(path):
+            with open(path, mode="r") as file:
+                self.plugs = json.load(file)
+
+    def stage(self, ssid):
+        return self.plugs.get(ssid, {}).get("stage")
+
+    def index(self, ssid):
+        """The plug's stored index, or max(stored indices) + 1 for a plug seen for the first time."""
+        index = self.plugs.get(ssid, {}).get("index")
+        if index is None:
+            index = max((plug.get("index", 0) for plug in self.plugs.values()), default=0) + 1
+            self.update(ssid, index=index)
+        return index
+
+    def update(self, ssid, **fields):
+        plug = self.plugs.setdefault(ssid, {"timings": {}})
+        timings = fields.pop("timings", {})
+        plug.update(fields)
+        plug["timings"].update(timings)
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(self.plugs, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def configure_on_ap(ssid, index, iface, scan_cache, state, ap_url, settings):
+    """
+    Stage 1+2: connect to the plug's AP, push all settings and hand it over to WIFI_SSID.
+    Returns right after the Wi-Fi call; the plug reboots and joins the LAN on its own
+    while the next plug is already being configured.
+    """
+    start = time.perf_counter()
+    if not connect_to_ap(ssid, iface, scan_cache):
+        state.update(ssid, stage="failed", error="could not connect to AP")
+        return False
+    connected = time.perf_counter()
+
+    plug_settings = dict(settings)
+    for key in ("name", "mqtt_topic"):
+        if plug_settings.get(key):
+            plug_settings[key] = plug_settings[key].format(index=index)
+
+    client = ShellyClient(ap_url(ssid))
+    try:
+        response = asyncio.run(client.provision(**plug_settings))
+        configured = time.perf_counter()
+        asyncio.run(client.update_wifi(WIFI_SSID, WIFI_PASSWORD))
+    except (requests.RequestException, ValueError) as e:
+        state.update(ssid, stage="failed", error=str(e))
+        return False
+    finally:
+        client.close()
+
+    hostname = response.get("device", {}).get("hostname") or ssid
+    state.update(ssid, stage="handed_off", hostname=hostname, handed_off_at=time.time(), timings={
+        "connect_ap": connected - start,
+        "configure": configured - connected,
+        "handoff": time.perf_counter() - configured,
+    })
+    return True
+
+
+async def _confirm_one(ssid, state, lan_url, deadline, interval, started, executor):
+    plug = state.plugs[ssid]
+    client = ShellyClient(lan_url(ssid, plug.get("hostname")), timeout=interval, executor=executor)
+    # the deadline runs from the hand-off, but never from before this confirmation began:
+    # a long AP stage or a resumed run must not expire plugs that were never probed
+    end = max(plug.get("handed_off_at", started), started) + deadline
+    try:
+        while True:
+            try:
+                status = await client.get("/status")
+            except (requests.RequestException, ValueError) as e:
+                client.recorder.record("retry", client.host, "GET /status", error=type(e).__name__)
+                if time.time() >= end:
+                    break
+                await asyncio.sleep(interval)
+                continue
+            join_time = time.time() - plug.get("handed_off_at", time.time())
+            state.update(ssid, stage="confirmed", ip=status.get("wifi_sta", {}).get("ip"), error=None,
+                         timings={"join_lan": join_time})
+            return True
+        state.update(ssid, error=f"not on the LAN after {deadline} s, probed again on the next run")
+        return False
+    finally:
+        client.close()
+
+
+async def confirm_on_lan(ssids, state, lan_url, deadline=CONFIRM_DEADLINE, interval=CONFIRM_INTERVAL):
+    """Stage 3: probe /status of all handed-off plugs concurrently until they answer on the LAN."""
+    executor = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENCY, thread_name_prefix="confirm")
+    started = time.time()
+    try:
+        results = await asyncio.gather(*(_confirm_one(ssid, state, lan_url, deadline, interval, started, executor)
+                                         for ssid in ssids))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return dict(zip(ssids, results))
+
+
+def run_pipeline(iface=None, state_file=STATE_FILE, ap_url=default_ap_url, lan_url=default_lan_url,
+                 settings=PLUG_SETTINGS, confirm_deadline=CONFIRM_DEADLINE,
+                 confirm_interval=CONFIRM_INTERVAL):
+    """
+    Onboard every plug in range: configure them one after another on their AP (the radio
+    can only be on one AP at a time) without waiting for reboots, then switch back to the
+    production network and confirm all plugs there concurrently. Finished plugs in the
+    state file are skipped, so a crashed batch resumes where it stopped.
+    """
+    state = OnboardingState(state_file)
+    iface = iface or get_interface()
+    scan_cache = ScanCache(iface)
+    start = time.perf_counter()
+
+    found = scan_shelly_devices(iface, scan_cache)
+    todo = [ssid for ssid in found if state.stage(ssid) not in ("handed_off", "confirmed")]
+    print(f"{len(found)} plugs in range, {len(found) - len(todo)} already done or handed off.")
+
+    for ssid in todo:
+        # not the scan position: handed-off plugs no longer broadcast their AP, so that
+        # would hand out names and MQTT topics of plugs already on the LAN again
+        index = state.index(ssid)
+        print(f"[{ssid}] configuring on AP...")
+        if configure_on_ap(ssid, index, iface, scan_cache, state, ap_url, settings):
+            print(f"[{ssid}] handed off to {WIFI_SSID}, moving on while it reboots.")
+    configure_done = time.perf_counter()
+
+    connect_to_originl_network(iface=iface, scan_cache=scan_cache)
+    pending = [ssid for ssid, plug in state.plugs.items() if plug.get("stage") == "handed_off"]
+    asyncio.run(confirm_on_lan(pending, state, lan_url, confirm_deadline, confirm_interval))
+
+    print_stage_report(state, configure_done - start, time.perf_counter() - configure_done)
+    return state
+
+
+def print_stage_report(state, configure_seconds, confirm_seconds):
+    """Print per-plug stage timings and the batch totals."""
+    print("\nOnboarding report:")
+    for ssid, plug in state.plugs.items():
+        timings = " ".join(f"{stage}={seconds:.1f}s" for stage, seconds in plug.get("timings", {}).items())
+        error = f" ({plug['error']})" if plug.get("stage") != "confirmed" and plug.get("error") else ""
+        print(f"  {ssid:<24} {plug.get('stage', '?'):<10} {timings}{error}")
+    confirmed = sum(1 for plug in state.plugs.values() if plug.get("stage") == "confirmed")
+    print(f"{confirmed}/{len(state.plugs)} plugs confirmed on {WIFI_SSID}; "
+          f"AP stage {configure_seconds:.1f} s, LAN confirmation {confirm_seconds:.1f} s.")
+
+
+if __name__ == "__main__":
+    run_pipeline()
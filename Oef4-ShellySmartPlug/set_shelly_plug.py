@@ -1,31 +1,46 @@
+import os
+import sys
+from urllib.parse import urlsplit
+
 import requests
-import time
 from pywifi import PyWiFi, const, Profile
 
+from wifi_waits import ScanCache, connect, disconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrumentation import RECORDER
+
 WIFI_SSID = 'Howest-IoT'
 WIFI_PASSWORD = 'LZe5buMyZUcDpLY' #wachtwoord
+REQUEST_TIMEOUT = 10  # seconds, a plug that dropped off the AP should not hang the script
 
 
 def send_request(url, method='get', data=None):
     """
-    Helper function to send HTTP requests.
+    Helper function to send HTTP requests. Every call is recorded as an 'http' event.
     """
-    try:
-        if method.lower() == 'post':
-            response = requests.post(url, data=data)
-        else:
-            response = requests.get(url, params=data)
+    parts = urlsplit(url)
+    with RECORDER.timed("http", parts.netloc, f"{method.upper()} {parts.path}") as event:
+        try:
+            if method.lower() == 'post':
+                response = requests.post(url, data=data, timeout=REQUEST_TIMEOUT)
+            else:
+                response = requests.get(url, params=data, timeout=REQUEST_TIMEOUT)
 
-        print(f"Request URL: {url}")
-        print(f"Response status code: {response.status_code}")
-        print(f"Response text: {response.text}")
+            event.update(bytes_sent=len(response.request.url) + len(response.request.body or b""),
+                         bytes_received=len(response.content), ok=response.ok,
+                         status=response.status_code)
+            print(f"Request URL: {url}")
+            print(f"Response status code: {response.status_code}")
+            print(f"Response text: {response.text}")
 
-        if response.status_code == 200:
-            print("Request successful.")
-        else:
-            print("Request failed.")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+            if response.status_code == 200:
+                print("Request successful.")
+            else:
+                print("Request failed.")
+        except Exception as e:
+            event.update(ok=False, error=type(e).__name__)
+            print(f"An error occurred: {str(e)}")
 
 
 def configure_led_settings(ip_address, status_led=None, power_led=None):
@@ -100,110 +115,97 @@ def reboot(ip_address):
     send_request(url, method='post')
 
 
-def scan_shelly_devices():
+def get_interface():
+    """
+    Return the first Wi-Fi interface.
+    """
+    return PyWiFi().interfaces()[0]
+
+
+def scan_shelly_devices(iface=None, scan_cache=None):
     """
     Scan for Shelly devices and return their SSIDs.
     """
-    wifi = PyWiFi()
-    iface = wifi.interfaces()[0]
-    iface.scan()
-    time.sleep(2)
+    scan_cache = scan_cache or ScanCache(iface or get_interface())
 
     shelly_devices = [
         result.ssid
-        for result in iface.scan_results()
+        for result in scan_cache.results()
         if result.ssid.startswith("shellyplug")
     ]
     return shelly_devices
 
 
-def connect_to_ap(ssid):
+def connect_to_ap(ssid, iface=None, scan_cache=None):
     """
     Connect to a Wi-Fi Access Point with the specified SSID.
     """
-    wifi = PyWiFi()
-    iface = wifi.interfaces()[0]
-    iface.disconnect()
-    time.sleep(2)
-    #scan voor ssids
-    iface.scan()
-    time.sleep(2)
-    scan_results = iface.scan_results()
-
-    for result in scan_results:
-        if ssid in result.ssid:
-            print(f"Attempting to connect to {result.ssid}...")
-            profile = Profile()
-            profile.ssid = result.ssid
-            profile.auth = const.AUTH_ALG_OPEN
-            profile.akm.append(const.AKM_TYPE_NONE)
-            profile.cipher = const.CIPHER_TYPE_NONE
-
-            # iface.remove_all_network_profiles()
-            temp_profile = iface.add_network_profile(profile)
-
-            iface.connect(temp_profile)
-            time.sleep(5)
-
-            if iface.status() == const.IFACE_CONNECTED:
-                print(f"Connected to {result.ssid}")
-                return True
-            else:
-                print(f"Failed to connect to {result.ssid}")
+    iface = iface or get_interface()
+    scan_cache = scan_cache or ScanCache(iface)
+    disconnect(iface)
+    #ssid opzoeken in de (gecachte) scan
+    result = scan_cache.find(ssid)
+
+    if result is not None:
+        print(f"Attempting to connect to {result.ssid}...")
+        profile = Profile()
+        profile.ssid = result.ssid
+        profile.auth = const.AUTH_ALG_OPEN
+        profile.akm.append(const.AKM_TYPE_NONE)
+        profile.cipher = const.CIPHER_TYPE_NONE
+
+        # iface.remove_all_network_profiles()
+        if connect(iface, profile):
+            print(f"Connected to {result.ssid}")
+            return True
+        else:
+            print(f"Failed to connect to {result.ssid}")
     return False
 
 
-def connect_to_originl_network(ssid=WIFI_SSID, password=WIFI_PASSWORD):
+def connect_to_originl_network(ssid=WIFI_SSID, password=WIFI_PASSWORD, iface=None, scan_cache=None):
     """
     Connect to the Howest-IoT network using the specified SSID and password.
     """
-    wifi = PyWiFi()
-    iface = wifi.interfaces()[0]
-    iface.disconnect()
-    time.sleep(2)
-    
-    # Scan for available networks
-    iface.scan()
-    time.sleep(2)
-    scan_results = iface.scan_results()
-
-    if scan_results:
-        for result in scan_results:
-            if ssid in result.ssid:
-                print(f"Attempting to connect to {ssid}...")
-                profile = Profile()
-                profile.ssid = ssid
-                profile.auth = const.AUTH_ALG_OPEN
-                profile.akm.append(const.AKM_TYPE_WPA2PSK)
-                profile.cipher = const.CIPHER_TYPE_CCMP
-                profile.key = password  # Add the password here
-
-                # Add and connect to the network
-                iface.remove_all_network_profiles()  # Clear existing profiles
-                temp_profile = iface.add_network_profile(profile)
-
-                iface.connect(temp_profile)
-                time.sleep(5)
-
-                if iface.status() == const.IFACE_CONNECTED:
-                    print(f"Connected to {ssid}")
-                    return True
-                else:
-                    print(f"Failed to connect to {ssid}")
+    iface = iface or get_interface()
+    scan_cache = scan_cache or ScanCache(iface)
+    disconnect(iface)
+
+    # Look the network up in the (cached) scan results
+    result = scan_cache.find(ssid)
+
+    if result is not None:
+        print(f"Attempting to connect to {ssid}...")
+        profile = Profile()
+        profile.ssid = ssid
+        profile.auth = const.AUTH_ALG_OPEN
+        profile.akm.append(const.AKM_TYPE_WPA2PSK)
+        profile.cipher = const.CIPHER_TYPE_CCMP
+        profile.key = password  # Add the password here
+
+        # Add and connect to the network
+        iface.remove_all_network_profiles()  # Clear existing profiles
+        if connect(iface, profile):
+            print(f"Connected to {ssid}")
+            return True
+        else:
+            print(f"Failed to connect to {ssid}")
     return False
 
 
 
 if __name__ == "__main__":
     try:
-        shelly_devices = scan_shelly_devices()
+        iface = get_interface()
+        scan_cache = ScanCache(iface)  # one scan for the whole batch
+        shelly_devices = scan_shelly_devices(iface, scan_cache)
         if not shelly_devices:
             print("No Shelly devices found.")
         else:
             print(f"the following Shelly devices has been found:{shelly_devices}")
             for device_ssid in shelly_devices:
                 print(f"Attempting to connect to {device_ssid}...")
-                if connect_to_ap(device_ssid):
+                if connect_to_ap(device_ssid, iface, scan_cache):
                     SHELLY_IP = "http://192.168.33.1"  #default
                     configure_led_settings(SHELLY_IP, status_led=True, power_led=True)
                     rename_device(SHELLY_IP, f"Cardoen-Olivier-Plug")
@@ -216,6 +218,6 @@ if __name__ == "__main__":
                     update_wifi(SHELLY_IP, WIFI_SSID, WIFI_PASSWORD)
                 else:
                     print(f"Could not connect to {device_ssid}.")
-            connect_to_originl_network()
+            connect_to_originl_network(iface=iface, scan_cache=scan_cache)
     except Exception as e:
         print(f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import collections
+import functools
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrumentation import RECORDER
+
+REQUEST_TIMEOUT = 5  # seconds per HTTP call
+DEFAULT_CONCURRENCY = 20
+MAX_LATENCIES = 1000  # latencies kept per client, so long-running pollers stay bounded
+
+PLUG_SETTINGS = {
+    "status_led": True,
+    "power_led": True,
+    "name": "Cardoen-Olivier-Plug{index}",
+    "max_power": 2200,
+    "relay_default": "off",
+    "mqtt_broker": "172.23.83.254",
+    "mqtt_topic": "Cardoen-Olivier-Outlet{index}",
+}
+
+
+class ShellyClient:
+    """
+    Shelly API v1 client for one plug.
+    All calls go over a single requests.Session, so the TCP connection is kept alive
+    between calls. The client is thread-backed, not natively async: every call is a
+    blocking requests call run on `executor` (the loop's default executor when None),
+    so the number of plugs served at once is bounded by that pool's worker threads.
+    """
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT, recorder=RECORDER, executor=None):
+        self.base_url = base_url.rstrip("/")
+        self.host = urlsplit(self.base_url).netloc
+        self.timeout = timeout
+        self.recorder = recorder
+        self.executor = executor
+        self.session = requests.Session()
+        self.latencies = collections.deque(maxlen=MAX_LATENCIES)  # (path, seconds) per call
+
+    def _request(self, method, path, params):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", params=params,
+                                            timeout=self.timeout)
+        except requests.RequestException as e:
+            if self.recorder is not None:
+                self.recorder.record("http", self.host, f"{method} {path}", time.perf_counter() - start,
+                                     ok=False, error=type(e).__name__)
+            raise
+        seconds = time.perf_counter() - start
+        self.latencies.append((path, seconds))
+        if self.recorder is not None:
+            request = response.request
+            self.recorder.record("http", self.host, f"{method} {path}", seconds,
+                                 bytes_sent=len(request.url) + len(request.body or b""),
+                                 bytes_received=len(response.content), ok=response.ok,
+                                 status=response.status_code)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    async def _call(self, method, path, params):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(self._request, method, path, params))
+
+    async def get(self, path, params=None):
+        return await self._call("GET", path, params)
+
+    async def post(self, path, params=None):
+        return await self._call("POST", path, params)
+
+    def close(self):
+        self.session.close()
+
+    async def update_wifi(self, ssid, password, expect_disconnect=True):
+        """
+        Point the plug at another Wi-Fi network. The plug may drop the connection before
+        answering; with `expect_disconnect` that counts as success.
+        """
+        try:
+            return await self.post("/settings/sta", {"enabled": 1, "ssid": ssid, "key": password,
+                                                     "ipv4_method": "dhcp"})
+        except (requests.ConnectionError, requests.Timeout):
+            if not expect_disconnect:
+                raise
+            return {}
+
+    async def provision(self, name=None, max_power=None, status_led=None, power_led=None,
+                        relay_default=None, mqtt_broker=None, mqtt_topic=None,
+                        wifi_ssid=None, wifi_password=None, reboot=False):
+        """
+        Apply the same settings as set_shelly_plug.py in as few calls as API v1 allows:
+        one /settings call (LEDs, name, power limit, MQTT), one relay call and one
+        Wi-Fi call (sent last because the plug drops the connection afterwards).
+        Returns the /settings response (empty when no settings were sent).
+        """
+        settings = {}
+        if status_led is not None:
+            settings["led_status_disable"] = str(status_led).lower()
+        if power_led is not None:
+            settings["led_power_disable"] = str(power_led).lower()
+        if name is not None:
+            settings["name"] = name
+        if max_power is not None:
+            settings["max_power"] = max_power
+        if mqtt_broker is not None:
+            settings.update({
+                "mqtt_server": mqtt_broker,
+                "mqtt_enable": "true",
+                "mqtt_user": "",
+                "mqtt_pass": "",
+                "mqtt_id": mqtt_topic,
+                "mqtt_max_qos": 0,
+                "mqtt_retain": "false",
+            })
+        response = {}
+        if settings:
+            response = await self.get("/settings", settings)
+        if relay_default is not None:
+            await self.post("/settings/relay/0", {"default_state": relay_default})
+        if reboot:
+            await self.post("/settings/reboot")
+        if wifi_ssid is not None:
+            await self.update_wifi(wifi_ssid, wifi_password)
+        return response
+
+
+async def _provision_one(semaphore, executor, base_url, settings, clients, results):
+    async with semaphore:
+        client = ShellyClient(base_url, executor=executor)
+        clients.append(client)
+        try:
+            await client.provision(**settings)
+            results[base_url] = "ok"
+        except (requests.RequestException, ValueError) as e:
+            results[base_url] = f"failed: {e}"
+        finally:
+            client.close()
+
+
+async def provision_many(base_urls, settings, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Provision many plugs that are already on the LAN concurrently.
+    `settings` are the keyword arguments of ShellyClient.provision; a '{index}' in the
+    name or MQTT topic is replaced by the plug's position in the list.
+    Returns (results per url, report dict).
+    """
+    # a private pool sized to the concurrency, so calls never queue behind each other
+    # and the loop's default executor is left alone
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="shelly")
+    semaphore = asyncio.Semaphore(concurrency)
+    clients = []
+    results = {}
+    start = time.perf_counter()
+    tasks = []
+    for index, base_url in enumerate(base_urls, start=1):
+        plug_settings = dict(settings)
+        for key in ("name", "mqtt_topic"):
+            if plug_settings.get(key):
+                plug_settings[key] = plug_settings[key].format(index=index)
+        tasks.append(_provision_one(semaphore, executor, base_url, plug_settings, clients, results))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    elapsed = time.perf_counter() - start
+    return results, latency_report(clients, elapsed)
+
+
+def latency_report(clients, elapsed):
+    """Summarize per-call latency and total throughput over all clients."""
+    latencies = [seconds for client in clients for _, seconds in client.latencies]
+    if not latencies:
+        return {"calls": 0, "seconds": elapsed}
+    latencies.sort()
+    return {
+        "plugs": len(clients),
+        "calls": len(latencies),
+        "seconds": elapsed,
+        "calls_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "plugs_per_second": len(clients) / elapsed if elapsed else 0.0,
+        "latency_ms_median": statistics.median(latencies) * 1000,
+        "latency_ms_p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "latency_ms_max": latencies[-1] * 1000,
+    }
+
+
+def print_report(results, report):
+    for base_url, status in results.items():
+        if status != "ok":
+            print(f"{base_url}: {status}")
+    ok = sum(1 for status in results.values() if status == "ok")
+    print(f"{ok}/{len(results)} plugs provisioned, {report['calls']} calls in {report['seconds']:.2f} s")
+    if report["calls"]:
+        print(f"  {report['plugs_per_second']:.1f} plugs/s, {report['calls_per_second']:.1f} calls/s")
+        print(f"  latency median {report['latency_ms_median']:.1f} ms, "
+              f"p95 {report['latency_ms_p95']:.1f} ms, max {report['latency_ms_max']:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Provision Shelly plugs that are already on the LAN.")
+    parser.add_argument("plugs", nargs="*", help="plug addresses, e.g. http://172.23.83.10")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--fake", type=int, default=0, help="start N local fake plugs instead")
+    parser.add_argument("--latency", type=float, default=0.02, help="latency of the fake plugs (s)")
+    args = parser.parse_args()
+
+    fakes = []
+    if args.fake:
+        from fake_shelly import FakeShelly
+        fakes = [FakeShelly(latency=args.latency).start() for _ in range(args.fake)]
+    urls = args.plugs + [fake.url for fake in fakes]
+    try:
+        print_report(*asyncio.run(provision_many(urls, PLUG_SETTINGS, args.concurrency)))
+    finally:
+        for fake in fakes:
+            fake.stop()
@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from shelly_client import ShellyClient, latency_report
+from timeseries_store import STORE_DIR, TimeSeriesStore
+
+POLL_TIMEOUT = 2  # seconds per /status call; a slow plug is retried on its next turn
+DEFAULT_CONCURRENCY = 50
+MIN_INTERVAL = 1.0  # seconds between polls of a plug whose load is changing
+BASE_INTERVAL = 5.0
+MAX_INTERVAL = 60.0  # idle plugs and unreachable plugs back off to this
+IDLE_FACTOR = 1.5  # interval growth per poll without change
+POWER_CHANGE = 5.0  # W difference that counts as activity
+
+
+def parse_status(status):
+    """(power W, relay on, uptime s) from a Shelly API v1 /status response."""
+    meters = status.get("meters") or [{}]
+    relays = status.get("relays") or [{}]
+    return float(meters[0].get("power", 0.0)), bool(relays[0].get("ison")), int(status.get("uptime", 0))
+
+
+def next_interval(interval, previous, sample):
+    """
+    Adaptive poll interval: a plug whose relay flipped or whose power moved by at least
+    POWER_CHANGE is polled again after MIN_INTERVAL, a steady plug a bit later every time
+    and an unreachable plug twice as late, both up to MAX_INTERVAL.
+    """
+    if sample is None:
+        return min(interval * 2, MAX_INTERVAL)
+    if previous is None or sample[1] != previous[1] or abs(sample[0] - previous[0]) >= POWER_CHANGE:
+        return MIN_INTERVAL
+    return min(interval * IDLE_FACTOR, MAX_INTERVAL)
+
+
+class StatusPoller:
+    """
+    Polls /status on many plugs concurrently and stores every sample in a TimeSeriesStore.
+    Every plug has its own poll loop and interval (see next_interval); a semaphore caps
+    the number of requests in flight so hundreds of plugs share the poller's own bounded
+    thread pool (ShellyClient is thread-backed). A poller runs once: run() closes it.
+    """
+
+    def __init__(self, base_urls, store, concurrency=DEFAULT_CONCURRENCY, timeout=POLL_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="poller")
+        self.clients = [ShellyClient(base_url, timeout=timeout, executor=self.executor) for base_url in base_urls]
+        self.store = store
+        self.concurrency = concurrency
+        self.polls = {client.host: 0 for client in self.clients}
+        self.failures = {client.host: 0 for client in self.clients}
+        self.intervals = {client.host: BASE_INTERVAL for client in self.clients}
+
+    async def _poll_plug(self, semaphore, client, deadline):
+        host = client.host
+        previous = None
+        # spread the first polls so the plugs don't all answer in the same tick
+        await asyncio.sleep(random.uniform(0, min(BASE_INTERVAL, max(0, deadline - time.monotonic()))))
+        while time.monotonic() < deadline:
+            async with semaphore:
+                try:
+                    sample = parse_status(await client.get("/status"))
+                except (requests.RequestException, ValueError):
+                    sample = None
+            self.polls[host] += 1
+            if sample is None:
+                self.failures[host] += 1
+            else:
+                self.store.append(host, time.time(), *sample)
+            self.intervals[host] = next_interval(self.intervals[host], previous, sample)
+            previous = sample or previous
+            await asyncio.sleep(min(self.intervals[host], max(0, deadline - time.monotonic())))
+
+    async def run(self, duration):
+        """Poll every plug for `duration` seconds; returns a report dict."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        deadline = time.monotonic() + duration
+        try:
+            await asyncio.gather(*(self._poll_plug(semaphore, client, deadline) for client in self.clients))
+        finally:
+            for client in self.clients:
+                client.close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.store.flush()
+        elapsed = time.perf_counter() - start
+        report = latency_report(self.clients, elapsed)
+        report["polls"] = sum(self.polls.values())
+        report["failures"] = sum(self.failures.values())
+        report["intervals"] = sorted(self.intervals.values())
+        return report
+
+
+def print_poll_report(report):
+    print(f"{report['polls']} polls of {len(report['intervals'])} plugs in {report['seconds']:.1f} s, "
+          f"{report['failures']} failed")
+    if report["calls"]:
+        print(f"  {report['calls_per_second']:.1f} polls/s, latency median {report['latency_ms_median']:.1f} ms, "
+              f"p95 {report['latency_ms_p95']:.1f} ms")
+    intervals = report["intervals"]
+    if intervals:
+        print(f"  poll interval now: min {intervals[0]:.1f} s, median {intervals[len(intervals) // 2]:.1f} s, "
+              f"max {intervals[-1]:.1f} s")
+
+
+def print_fleet_overview(store, start, end, top=5):
+    """Mean power per plug over [start, end] from the rollups, highest first."""
+    query_start = time.perf_counter()
+    rollups = store.rollups(start, end)
+    seconds = time.perf_counter() - query_start
+    means = []
+    for device, minutes in rollups.items():
+        samples = sum(minute[4] for minute in minutes)
+        means.append((sum(minute[3] * minute[4] for minute in minutes) / samples, device))
+    means.sort(reverse=True)
+    print(f"Rollups of {len(rollups)} plugs read in {seconds * 1000:.1f} ms; highest mean power:")
+    for mean, device in means[:top]:
+        print(f"  {device:<24} {mean:8.1f} W")
+
+
+def simulate_load(fakes, stop, interval=1.0):
+    """Switch random fake plugs on and off so the poller has changing load to follow."""
+    while not stop.wait(interval):
+        for fake in random.sample(fakes, max(1, len(fakes) // 10)):
+            on = random.random() < 0.5
+            fake.set_meter(random.uniform(20, 2000) if on else 0.0, on)
+
+
+def benchmark_store(plugs, seconds, step, directory):
+    """Write `seconds` of synthetic samples every `step` s for `plugs` plugs, then query them back."""
+    store = TimeSeriesStore(directory)
+    start = time.time() // 3600 * 3600
+    write_start = time.perf_counter()
+    count = 0
+    for offset in range(0, seconds, step):
+        for plug in range(plugs):
+            on = (offset // 300 + plug) % 3 == 0
+            store.append(f"plug{plug}", start + offset, 100.0 + plug % 50 if on else 0.0, on, offset)
+            count += 1
+    store.flush()
+    write_seconds = time.perf_counter() - write_start
+    data, meta = store.disk_usage()
+    print(f"Wrote {count} samples of {plugs} plugs in {write_seconds:.2f} s "
+          f"({count / write_seconds:.0f} samples/s); {data / count:.2f} bytes/sample on disk "
+          f"(+{meta / count:.2f} index/rollup), raw arrays would take 25")
+    query_start = time.perf_counter()
+    history = store.samples("plug0", start, start + seconds)
+    print(f"Raw history of one plug ({len(history)} samples) read in "
+          f"{(time.perf_counter() - query_start) * 1000:.1f} ms")
+    print_fleet_overview(store, start, start + seconds)
+    store.close()
+
+
+def run_poller(base_urls, store_dir=STORE_DIR, duration=30, concurrency=DEFAULT_CONCURRENCY, fake=0,
+               latency=0.02):
+    """Poll the plugs (plus `fake` local fake plugs with changing load) and print the reports."""
+    fakes = []
+    stop = threading.Event()
+    if fake:
+        from fake_shelly import FakeShelly, stop_all
+        fakes = [FakeShelly(latency=latency).start() for _ in range(fake)]
+        threading.Thread(target=simulate_load, args=(fakes, stop), daemon=True).start()
+    try:
+        with TimeSeriesStore(store_dir) as store:
+            print_poll_report(asyncio.run(StatusPoller(list(base_urls) + [plug.url for plug in fakes], store,
+                                                       concurrency).run(duration)))
+            print_fleet_overview(store, time.time() - 3600, time.time())
+    finally:
+        stop.set()
+        if fakes:
+            stop_all(fakes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll /status of Shelly plugs and store the samples.")
+    parser.add_argument("plugs", nargs="*", help="plug addresses, e.g. http://172.23.83.10")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to poll")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--store", default=STORE_DIR, help="directory of the time-series store")
+    parser.add_argument("--fake", type=int, default=0, help="start N local fake plugs instead")
+    parser.add_argument("--latency", type=float, default=0.02, help="latency of the fake plugs (s)")
+    parser.add_argument("--bench-store", type=int, metavar="PLUGS",
+                        help="benchmark the store with an hour of synthetic samples (every 5 s) per plug")
+    args = parser.parse_args()
+
+    if args.bench_store:
+        benchmark_store(args.bench_store, 3600, 5, args.store)
+        raise SystemExit
+
+    run_poller(args.plugs, args.store, args.duration, args.concurrency, args.fake, args.latency)
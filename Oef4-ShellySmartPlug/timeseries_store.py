@@ -0,0 +1,291 @@
+import os
+import struct
+import sys
+import threading
+from array import array
+from itertools import accumulate
+
+STORE_DIR = "shelly_timeseries"
+BLOCK_SAMPLES = 512  # samples per device buffered before a block is written
+SEGMENT_SECONDS = 3600  # one set of files per hour; a block never spans two segments
+ROLLUP_SECONDS = 60
+DEVICES_FILE = "devices.txt"
+
+# count, first timestamp (ms), first power (deciwatt), first uptime (s)
+BLOCK_HEADER = struct.Struct("<Hqqq")
+# device id, first ms, last ms, offset in the .dat file, block length
+INDEX_RECORD = struct.Struct("<IqqQI")
+# device id, minute start (s), min W, max W, sum W, samples, samples with the relay on
+ROLLUP_RECORD = struct.Struct("<IqfffII")
+# narrowest signed array type that holds all deltas of a column
+DELTA_TYPECODES = (("b", 2 ** 7), ("h", 2 ** 15), ("i", 2 ** 31), ("q", 2 ** 63))
+
+
+def _encode_deltas(values):
+    """Typecode byte + the deltas between consecutive values as the narrowest signed array."""
+    deltas = [b - a for a, b in zip(values, values[1:])]
+    low, high = (min(deltas), max(deltas)) if deltas else (0, 0)
+    typecode = next(code for code, limit in DELTA_TYPECODES if -limit <= low and high < limit)
+    column = array(typecode, deltas)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return typecode.encode() + column.tobytes()
+
+
+def _decode_deltas(data, pos, first, count):
+    """Inverse of _encode_deltas; returns (values, position after the column)."""
+    column = array(chr(data[pos]))
+    end = pos + 1 + column.itemsize * (count - 1)
+    column.frombytes(data[pos + 1:end])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return list(accumulate(column, initial=first)), end
+
+
+def encode_block(ts, power, relay, uptime):
+    """
+    One block of samples: the first value of each column in the header, then the
+    delta-encoded timestamp, power and uptime columns and the relay states as bytes.
+    Polls at a steady interval give near-constant deltas, so most columns fit in 1-2 bytes.
+    """
+    return b"".join((BLOCK_HEADER.pack(len(ts), ts[0], power[0], uptime[0]), _encode_deltas(ts),
+                     _encode_deltas(power), _encode_deltas(uptime), bytes(relay)))
+
+
+def decode_block(data):
+    """Returns the ts (ms), power (dW), relay and uptime columns of a block."""
+    count, ts0, power0, uptime0 = BLOCK_HEADER.unpack_from(data)
+    ts, pos = _decode_deltas(data, BLOCK_HEADER.size, ts0, count)
+    power, pos = _decode_deltas(data, pos, power0, count)
+    uptime, pos = _decode_deltas(data, pos, uptime0, count)
+    return ts, power, list(data[pos:pos + count]), uptime
+
+
+def rollup_samples(ts, power, relay):
+    """Per-minute {minute: [min W, max W, sum W, count, on count]} of raw columns."""
+    minutes = {}
+    for ms, deciwatt, on in zip(ts, power, relay):
+        watt = deciwatt / 10
+        minute = ms // 1000 // ROLLUP_SECONDS * ROLLUP_SECONDS
+        entry = minutes.get(minute)
+        if entry is None:
+            minutes[minute] = [watt, watt, watt, 1, on]
+        else:
+            entry[0] = min(entry[0], watt)
+            entry[1] = max(entry[1], watt)
+            entry[2] += watt
+            entry[3] += 1
+            entry[4] += on
+    return minutes
+
+
+def _merge_rollup(target, key, low, high, total, count, on):
+    entry = target.get(key)
+    if entry is None:
+        target[key] = [low, high, total, count, on]
+    else:
+        entry[0] = min(entry[0], low)
+        entry[1] = max(entry[1], high)
+        entry[2] += total
+        entry[3] += count
+        entry[4] += on
+
+
+class _Buffer:
+    """Unwritten samples of one device, as compact arrays."""
+
+    def __init__(self):
+        self.ts = array("q")
+        self.power = array("q")
+        self.relay = array("B")
+        self.uptime = array("q")
+
+    def __len__(self):
+        return len(self.ts)
+
+
+class TimeSeriesStore:
+    """
+    Append-only store for plug samples (power, relay state, uptime) on local disk.
+    Samples are buffered per device in arrays and written as delta-encoded blocks to one
+    .dat file per hour; an .idx file locates each block (device, time range, offset) and
+    an .rollup file holds per-minute min/max/sum per device. A query only reads the index
+    and the blocks it needs, and a fleet-wide overview only reads the rollups, so an hour
+    of 500 plugs never has to be loaded as a whole.
+    """
+
+    def __init__(self, directory=STORE_DIR, block_samples=BLOCK_SAMPLES):
+        self.directory = directory
+        self.block_samples = block_samples
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._index_cache = {}  # segment -> (.idx size, {device id: [records]})
+        self.devices = {}
+        self.names = []
+        path = os.path.join(directory, DEVICES_FILE)
+        if os.path.exists(path):
+            with open(path, mode="r") as file:
+                for line in file:
+                    self._add_name(line.rstrip("\n"))
+        self._devices_file = open(path, mode="a")
+
+    def _add_name(self, device):
+        self.devices[device] = len(self.names)
+        self.names.append(device)
+
+    def _device_id(self, device):
+        if device not in self.devices:
+            self._add_name(device)
+            self._devices_file.write(device + "\n")
+            self._devices_file.flush()
+        return self.devices[device]
+
+    def _path(self, segment, extension):
+        return os.path.join(self.directory, f"{segment}.{extension}")
+
+    def append(self, device, timestamp, power, relay, uptime):
+        """Add one sample; `timestamp` in seconds, `power` in W, `relay` on/off, `uptime` in s."""
+        with self._lock:
+            self._append(device, timestamp, power, relay, uptime)
+
+    def append_many(self, samples):
+        """Add (device, timestamp, power, relay, uptime) samples under a single lock acquisition."""
+        with self._lock:
+            for sample in samples:
+                self._append(*sample)
+
+    def _append(self, device, timestamp, power, relay, uptime):
+        ms = int(timestamp * 1000)
+        buffer = self._buffers.get(device)
+        if buffer is not None and ms // 1000 // SEGMENT_SECONDS != buffer.ts[0] // 1000 // SEGMENT_SECONDS:
+            self._write_block(device, buffer)
+            buffer = None
+        if buffer is None:
+            buffer = self._buffers[device] = _Buffer()
+        buffer.ts.append(ms)
+        buffer.power.append(round(power * 10))
+        buffer.relay.append(1 if relay else 0)
+        buffer.uptime.append(int(uptime))
+        if len(buffer) >= self.block_samples:
+            self._write_block(device, buffer)
+
+    def _write_block(self, device, buffer):
+        device_id = self._device_id(device)
+        segment = buffer.ts[0] // 1000 // SEGMENT_SECONDS * SEGMENT_SECONDS
+        block = encode_block(buffer.ts, buffer.power, buffer.relay, buffer.uptime)
+        with open(self._path(segment, "dat"), mode="ab") as file:
+            offset = file.tell()
+            file.write(block)
+        with open(self._path(segment, "idx"), mode="ab") as file:
+            file.write(INDEX_RECORD.pack(device_id, min(buffer.ts), max(buffer.ts), offset, len(block)))
+        with open(self._path(segment, "rollup"), mode="ab") as file:
+            for minute, (low, high, total, count, on) in rollup_samples(buffer.ts, buffer.power,
+                                                                       buffer.relay).items():
+                file.write(ROLLUP_RECORD.pack(device_id, minute, low, high, total, count, on))
+        del self._buffers[device]
+
+    def flush(self):
+        """Write every buffered sample to disk."""
+        with self._lock:
+            for device, buffer in list(self._buffers.items()):
+                self._write_block(device, buffer)
+
+    def close(self):
+        self.flush()
+        self._devices_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _segments(self, start, end):
+        first = int(start) // SEGMENT_SECONDS * SEGMENT_SECONDS
+        return range(first, int(end) + 1, SEGMENT_SECONDS)
+
+    def _index(self, segment):
+        """Index records of a segment grouped per device; re-read only when the .idx file grew."""
+        path = self._path(segment, "idx")
+        if not os.path.exists(path):
+            return {}
+        size = os.path.getsize(path)
+        cached = self._index_cache.get(segment)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        per_device = {}
+        with open(path, mode="rb") as file:
+            for record in INDEX_RECORD.iter_unpack(file.read(size)):
+                per_device.setdefault(record[0], []).append(record)
+        self._index_cache[segment] = (size, per_device)
+        return per_device
+
+    def samples(self, device, start, end):
+        """[(timestamp s, power W, relay, uptime s), ...] of one device between start and end."""
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        columns = []
+        with self._lock:
+            device_id = self.devices.get(device)
+            if device_id is not None:
+                for segment in self._segments(start, end):
+                    records = [record for record in self._index(segment).get(device_id, ())
+                               if record[2] >= start_ms and record[1] <= end_ms]
+                    if not records:
+                        continue
+                    with open(self._path(segment, "dat"), mode="rb") as file:
+                        for _, _, _, offset, length in records:
+                            file.seek(offset)
+                            columns.append(decode_block(file.read(length)))
+            buffer = self._buffers.get(device)
+            if buffer:
+                columns.append((list(buffer.ts), list(buffer.power), list(buffer.relay), list(buffer.uptime)))
+        result = []
+        for ts, power, relay, uptime in columns:
+            result += [(ms / 1000, deciwatt / 10, bool(on), up) for ms, deciwatt, on, up
+                       in zip(ts, power, relay, uptime) if start_ms <= ms <= end_ms]
+        result.sort()
+        return result
+
+    def rollups(self, start, end, devices=None):
+        """
+        Per-minute rollups between start and end, read from the .rollup files only:
+        {device: [(minute, min W, max W, mean W, samples, fraction with the relay on), ...]}.
+        A read never writes: a device that only has buffered samples is not given an id yet.
+        """
+        first_minute = int(start) // ROLLUP_SECONDS * ROLLUP_SECONDS
+        wanted = None
+        merged = {}
+        with self._lock:
+            if devices is not None:
+                wanted = {self.devices[device] for device in devices if device in self.devices}
+            for segment in self._segments(start, end):
+                path = self._path(segment, "rollup")
+                if not os.path.exists(path):
+                    continue
+                with open(path, mode="rb") as file:
+                    data = file.read()
+                for device_id, minute, low, high, total, count, on in ROLLUP_RECORD.iter_unpack(data):
+                    if first_minute <= minute <= end and (wanted is None or device_id in wanted):
+                        _merge_rollup(merged, (self.names[device_id], minute), low, high, total, count, on)
+            for device, buffer in self._buffers.items():
+                if wanted is not None and device not in devices:
+                    continue
+                for minute, entry in rollup_samples(buffer.ts, buffer.power, buffer.relay).items():
+                    if first_minute <= minute <= end:
+                        _merge_rollup(merged, (device, minute), *entry)
+        result = {}
+        for (device, minute), (low, high, total, count, on) in sorted(merged.items()):
+            result.setdefault(device, []).append((minute, low, high, total / count, count, on / count))
+        return result
+
+    def disk_usage(self):
+        """(bytes in .dat files, bytes in .idx and .rollup files)."""
+        data = meta = 0
+        for name in os.listdir(self.directory):
+            size = os.path.getsize(os.path.join(self.directory, name))
+            if name.endswith(".dat"):
+                data += size
+            else:
+                meta += size
+        return data, meta
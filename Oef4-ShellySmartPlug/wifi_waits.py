@@ -0,0 +1,88 @@
+import time
+
+from pywifi import const
+
+DEFAULT_DEADLINE = 10.0  # seconds before a wait gives up
+DEFAULT_INTERVAL = 0.1  # first poll interval
+DEFAULT_BACKOFF = 1.5  # poll interval multiplier
+MAX_INTERVAL = 1.0
+SCAN_MAX_AGE = 60.0  # seconds a cached scan stays valid
+
+
+def wait_for(predicate, deadline=DEFAULT_DEADLINE, interval=DEFAULT_INTERVAL,
+             backoff=DEFAULT_BACKOFF, max_interval=MAX_INTERVAL, sleep=time.sleep,
+             clock=time.monotonic):
+    """
+    Poll `predicate` until it returns something truthy or the deadline passes.
+    The poll interval starts small and grows by `backoff`, so a fast state change
+    returns almost immediately. Returns the predicate's result, or None on timeout.
+    """
+    end = clock() + deadline
+    while True:
+        result = predicate()
+        if result:
+            return result
+        remaining = end - clock()
+        if remaining <= 0:
+            return None
+        sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+def wait_for_status(iface, statuses, deadline=DEFAULT_DEADLINE, **kwargs):
+    """Wait until iface.status() is one of `statuses`; returns True when it got there."""
+    if isinstance(statuses, int):
+        statuses = (statuses,)
+    return bool(wait_for(lambda: iface.status() in statuses, deadline, **kwargs))
+
+
+def disconnect(iface, deadline=DEFAULT_DEADLINE, **kwargs):
+    """Disconnect and return as soon as the interface reports it is no longer connected."""
+    iface.disconnect()
+    return wait_for_status(iface, (const.IFACE_DISCONNECTED, const.IFACE_INACTIVE), deadline, **kwargs)
+
+
+def scan(iface, deadline=DEFAULT_DEADLINE, **kwargs):
+    """Start a scan and return the results as soon as the interface has any (empty list on timeout)."""
+    iface.scan()
+    return wait_for(iface.scan_results, deadline, **kwargs) or []
+
+
+def connect(iface, profile, deadline=DEFAULT_DEADLINE, **kwargs):
+    """Connect with a profile and return as soon as the interface reports IFACE_CONNECTED."""
+    iface.connect(iface.add_network_profile(profile))
+    return wait_for_status(iface, const.IFACE_CONNECTED, deadline, **kwargs)
+
+
+class ScanCache:
+    """Scan once and reuse the results for every SSID lookup until they are older than `max_age`."""
+
+    def __init__(self, iface, max_age=SCAN_MAX_AGE, deadline=DEFAULT_DEADLINE, clock=time.monotonic):
+        self.iface = iface
+        self.max_age = max_age
+        self.deadline = deadline
+        self.clock = clock
+        self._results = None
+        self._scanned_at = 0.0
+        self.scans = 0
+
+    def results(self):
+        if self._results is None or self.clock() - self._scanned_at > self.max_age:
+            self._results = scan(self.iface, self.deadline)
+            self._scanned_at = self.clock()
+            self.scans += 1
+        return self._results
+
+    def find(self, ssid):
+        """Return the first cached scan result whose SSID contains `ssid`, rescanning once if missing."""
+        for result in self.results():
+            if ssid in result.ssid:
+                return result
+        self.invalidate()
+        for result in self.results():
+            if ssid in result.ssid:
+                return result
+        return None
+
+    def invalidate(self):
+        self._results = None
@@ -0,0 +1 @@
+"""Shared helpers for the Cisco and Shelly exercises (fleet runs, connection handling, ...)."""
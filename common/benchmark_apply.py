@@ -0,0 +1,162 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from common.connection_pool import ConnectionPool
+from common.intent_cache import CACHE_ENV
+from common.mock_ios import MockFleet, flash_transfer
+from common.paths import add_exercise_paths
+
+add_exercise_paths()
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_LATENCY = 0.002  # seconds per simulated round trip
+
+
+def write_layer2_csv(path, rows):
+    """Synthetic layer2.csv: access VLANs on port pairs plus one management SVI."""
+    with open(path, mode="w") as file:
+        file.write("Vlan;Description;IP Address;Netmask;Switch;Ports\n")
+        for i in range(rows - 1):
+            port = (i % 24) * 2 + 1
+            file.write(f"{100 + i};ACCESS-{i};;;1;{port}-{port + 1}\n")
+        file.write("1967;CD-Management;172.19.67.13;255.255.255.0;;\n")
+
+
+def write_layer3_csv(path, rows):
+    """Synthetic layer3.csv: SVIs with access ports, plain access ports and one trunk."""
+    with open(path, mode="w") as file:
+        file.write("Vlan;Description;IP Address;Netmask;Switch;Ports\n")
+        for i in range(rows - 1):
+            vlan = 100 + i
+            port = i % 48 + 1
+            if i % 2 == 0:
+                file.write(f"{vlan};SVI-{i};10.{vlan // 256}.{vlan % 256}.1;255.255.255.0;1;{port}\n")
+            else:
+                file.write(f"{vlan};ACCESS-{i};;;2;{port}\n")
+        file.write("300-400;CD-Trunk;;;1;48\n")
+
+
+def write_router_csv(path, rows):
+    """Synthetic router CSV: WAN, LAN subinterfaces and static routes."""
+    with open(path, mode="w") as file:
+        file.write("network;interface;description;vlan;ipaddress;subnetmask;defaultgateway\n")
+        file.write("wan;gi0/0;WAN;0;172.23.80.200;255.255.254.0;172.23.80.1\n")
+        for i in range(rows - 1):
+            third, fourth = divmod(i, 256)
+            if i % 2 == 0:
+                file.write(f"lan;gi0/1.{i + 10};LAN-{i};{i % 4000 + 10};192.{168 + third}.{fourth}.1;255.255.255.0;\n")
+            else:
+                file.write(f"lan;;ROUTE-{i};0;10.{third}.{fourth}.0;255.255.255.0;192.168.0.1\n")
+
+
+def _configurators():
+    from configure_layer2switch import configure_switch_from_csv
+    from configure_layer3_switch import configure_layer3_switch_from_csv
+    from configure_broadband_router import configure_router_remotely
+
+    return [
+        ("layer2", "per-row", write_layer2_csv,
+         lambda csv_file, pool: configure_switch_from_csv(csv_file, "10.0.0.2", "transparent", "howest", pool=pool)),
+        ("layer2", "batched", write_layer2_csv,
+         lambda csv_file, pool: configure_switch_from_csv(csv_file, "10.0.0.2", "transparent", "howest",
+                                                          batched=True, pool=pool)),
+        ("layer2", "fast", write_layer2_csv,
+         lambda csv_file, pool: configure_switch_from_csv(csv_file, "10.0.0.2", "transparent", "howest",
+                                                          fast=True, pool=pool)),
+        ("layer3", "stream", write_layer3_csv,
+         lambda csv_file, pool: configure_layer3_switch_from_csv(csv_file, "10.0.0.3", "transparent", "howest",
+                                                                 pool=pool)),
+        ("layer3", "diff", write_layer3_csv,
+         lambda csv_file, pool: configure_layer3_switch_from_csv(csv_file, "10.0.0.3", "transparent", "howest",
+                                                                 diff_only=True, pool=pool)),
+        ("layer3", "fast", write_layer3_csv,
+         lambda csv_file, pool: configure_layer3_switch_from_csv(csv_file, "10.0.0.3", "transparent", "howest",
+                                                                 pool=pool, fast=True)),
+        ("layer3", "file", write_layer3_csv,
+         lambda csv_file, pool: configure_layer3_switch_from_csv(csv_file, "10.0.0.3", "transparent", "howest",
+                                                                 pool=pool, via_file=True, transfer=flash_transfer)),
+        ("router", "per-row", write_router_csv,
+         lambda csv_file, pool: configure_router_remotely(csv_file, "10.0.0.1", "admin", "admin123", pool=pool)),
+        ("router", "diff", write_router_csv,
+         lambda csv_file, pool: configure_router_remotely(csv_file, "10.0.0.1", "admin", "admin123",
+                                                          diff_only=True, pool=pool)),
+        ("router", "fast", write_router_csv,
+         lambda csv_file, pool: configure_router_remotely(csv_file, "10.0.0.1", "admin", "admin123",
+                                                          pool=pool, fast=True)),
+        ("router", "file", write_router_csv,
+         lambda csv_file, pool: configure_router_remotely(csv_file, "10.0.0.1", "admin", "admin123",
+                                                          pool=pool, via_file=True, transfer=flash_transfer)),
+    ]
+
+
+def run_once(apply, csv_file, latency, line_delay, fleet=None):
+    """Apply one CSV to a (fresh or given) mock fleet and return the counters and wall time."""
+    fleet = fleet or MockFleet(latency, line_delay)
+    pool = ConnectionPool(connect=fleet)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        apply(csv_file, pool)
+    seconds = time.perf_counter() - start
+    pool.close_all()
+    result = fleet.totals()
+    result["seconds"] = seconds
+    return result, fleet
+
+
+@contextlib.contextmanager
+def _intent_cache_in(directory):
+    """Compile intents into `directory` instead of .intent_cache/ for the duration of the block."""
+    previous = os.environ.get(CACHE_ENV)
+    os.environ[CACHE_ENV] = directory
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ[CACHE_ENV]
+        else:
+            os.environ[CACHE_ENV] = previous
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, latency=DEFAULT_LATENCY, line_delay=0.0, rerun=True):
+    """
+    Run every configurator/mode against the mock device for each CSV size.
+    With `rerun`, a second apply on the now-converged device is measured as well.
+    The synthetic CSVs are cached in the temp dir, so they never evict real intents.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir, _intent_cache_in(os.path.join(tmp_dir, "intent_cache")):
+        for kind, mode, write_csv, apply in _configurators():
+            for rows in sizes:
+                csv_file = os.path.join(tmp_dir, f"{kind}-{rows}.csv")
+                write_csv(csv_file, rows)
+                first, fleet = run_once(apply, csv_file, latency, line_delay)
+                results.append(dict(first, configurator=kind, mode=mode, rows=rows, run="first"))
+                if rerun:
+                    before = fleet.totals()
+                    second, _ = run_once(apply, csv_file, latency, line_delay, fleet)
+                    for key in ("connections", "commands", "round_trips", "bytes_sent"):
+                        second[key] -= before[key]
+                    results.append(dict(second, configurator=kind, mode=mode, rows=rows, run="rerun"))
+    return results
+
+
+def print_results(results):
+    print(f"{'configurator':<12} {'mode':<8} {'rows':>5} {'run':<6} {'commands':>9} {'round trips':>12} {'wall (s)':>9}")
+    for result in results:
+        print(f"{result['configurator']:<12} {result['mode']:<8} {result['rows']:>5} {result['run']:<6} "
+              f"{result['commands']:>9} {result['round_trips']:>12} {result['seconds']:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the configurators against a mock IOS device.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="CSV row counts")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="seconds per round trip")
+    parser.add_argument("--line-delay", type=float, default=0.0, help="seconds of pacing per config line")
+    parser.add_argument("--no-rerun", action="store_true", help="skip the second run on the converged device")
+    args = parser.parse_args()
+
+    print_results(run_benchmarks(args.sizes, args.latency, args.line_delay, not args.no_rerun))
@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common.paths import add_exercise_paths
+from common.stream_render import peak_rss_kb
+
+add_exercise_paths()
+
+DEFAULT_ROWS = 100_000
+DEFAULT_SWITCHES = 8
+
+
+def write_campus_layer3_csv(path, rows, switches=DEFAULT_SWITCHES):
+    """Synthetic site-wide layer3.csv: SVIs and access ports spread over `switches` switches."""
+    with open(path, mode="w") as file:
+        file.write("Vlan;Description;IP Address;Netmask;Switch;Ports\n")
+        for i in range(rows - 1):
+            vlan = 100 + i % 3900
+            switch = i % switches + 1
+            port = i % 48 + 1
+            if i % 2 == 0:
+                file.write(f"{vlan};SVI-{i};10.{vlan // 256}.{vlan % 256}.1;255.255.255.0;{switch};{port}\n")
+            else:
+                file.write(f"{vlan};ACCESS-{i};;;{switch};{port}\n")
+        file.write("300-400;CD-Trunk;;;1;48\n")
+
+
+def write_campus_router_csv(path, rows):
+    """Synthetic router CSV with a WAN row, LAN subinterfaces and static routes."""
+    with open(path, mode="w") as file:
+        file.write("network;interface;description;vlan;ipaddress;subnetmask;defaultgateway\n")
+        file.write("wan;gi0/0;WAN;0;172.23.80.200;255.255.254.0;172.23.80.1\n")
+        for i in range(rows - 1):
+            network = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            if i % 2 == 0:
+                file.write(f"lan;gi0/1.{i + 10};LAN-{i};{i % 4000 + 10};{network};255.255.255.0;\n")
+            else:
+                file.write(f"lan;;ROUTE-{i};0;{network};255.255.255.0;192.168.0.1\n")
+
+
+def _render_switch_stream(csv_file, out_dir):
+    from test2 import generate_layer3_switch_configs
+    generate_layer3_switch_configs(csv_file, out_dir, "transparent", "howest")
+
+
+def _render_switch_in_memory(csv_file, out_dir):
+    """The intent-based path: the whole CSV is compiled to a list of rows first."""
+    from switch_intent import compile_switch_csv_text
+    from test2 import render_layer3_switch_config
+    with open(csv_file, mode="r") as file:
+        intent = compile_switch_csv_text(file.read())
+    with open(os.path.join(out_dir, "switch_config.txt"), mode="w") as config_file:
+        render_layer3_switch_config(intent, config_file, "transparent", "howest")
+
+
+def _render_router_stream(csv_file, out_dir):
+    from configure_broadband_router import render_cisco_config
+    render_cisco_config(csv_file, os.path.join(out_dir, "router_config.txt"))
+
+
+RENDERERS = {
+    "switch-stream": (write_campus_layer3_csv, _render_switch_stream),
+    "switch-in-memory": (write_campus_layer3_csv, _render_switch_in_memory),
+    "router-stream": (write_campus_router_csv, _render_router_stream),
+}
+
+
+def _measure(name, rows, tmp_dir):
+    """Runs in a fresh worker process, so the peak RSS belongs to this renderer alone."""
+    write_csv, render = RENDERERS[name]
+    csv_file = os.path.join(tmp_dir, f"{name}.csv")
+    out_dir = os.path.join(tmp_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+    write_csv(csv_file, rows)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        render(csv_file, out_dir)
+    seconds = time.perf_counter() - start
+    output_bytes = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    return {"renderer": name, "rows": rows, "seconds": seconds, "rows_per_s": rows / seconds,
+            "peak_rss_kb": peak_rss_kb(), "output_bytes": output_bytes}
+
+
+def run_benchmarks(rows=DEFAULT_ROWS, renderers=tuple(RENDERERS)):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in renderers:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(_measure, name, rows, tmp_dir).result())
+    return results
+
+
+def print_results(results):
+    print(f"{'renderer':<18} {'rows':>8} {'seconds':>8} {'rows/s':>10} {'peak RSS (MiB)':>15} {'output (MiB)':>13}")
+    for result in results:
+        peak = result["peak_rss_kb"]
+        peak = f"{peak / 1024:>15.1f}" if peak is not None else f"{'n/a':>15}"
+        print(f"{result['renderer']:<18} {result['rows']:>8} {result['seconds']:>8.2f} "
+              f"{result['rows_per_s']:>10,.0f} {peak} "
+              f"{result['output_bytes'] / 1024 / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the config renderers on a synthetic CSV.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="CSV row count")
+    parser.add_argument("--renderers", nargs="+", choices=list(RENDERERS), default=list(RENDERERS))
+    args = parser.parse_args()
+
+    print_results(run_benchmarks(args.rows, args.renderers))
@@ -0,0 +1,293 @@
+import argparse
+import os
+import sys
+
+from common.paths import CISCO_DIR, REPO_ROOT, ROUTER_DIR, SHELLY_DIR, add_exercise_paths
+
+add_exercise_paths()
+
+# Every command imports what it needs inside its handler (even json and subprocess), so an
+# offline render never loads netmiko/paramiko/cryptography or requests/pywifi.
+HEAVY_MODULES = ("netmiko", "paramiko", "cryptography", "requests", "pywifi", "paho")
+STARTUP_RUNS = 5
+
+
+def _cache(args):
+    if args.no_cache:
+        return None
+    from common.render_cache import DEFAULT_RENDER_CACHE
+    return DEFAULT_RENDER_CACHE
+
+
+def _pool(args):
+    """The shared SSH pool, or simulated IOS devices with --mock."""
+    if args.mock:
+        from common.connection_pool import ConnectionPool
+        from common.mock_ios import MockFleet
+        return ConnectionPool(connect=MockFleet())
+    from common.connection_pool import DEFAULT_POOL
+    return DEFAULT_POOL
+
+
+def _transfer(args):
+    if args.mock:
+        from common.mock_ios import flash_transfer
+        return flash_transfer
+    from common.file_apply import scp_transfer
+    return scp_transfer
+
+
+def _switch_hosts(pairs):
+    """['2=192.168.100.101', ...] -> {'2': '192.168.100.101'}."""
+    hosts = {}
+    for pair in pairs or ():
+        switch, sep, host = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected SWITCH=HOST, got '{pair}'")
+        hosts[switch.strip()] = host.strip()
+    return hosts
+
+
+def l2_render(args):
+    # layer2.csv has the same columns as layer3.csv, so the layer 3 renderer covers both
+    from test2 import generate_layer3_switch_config
+    generate_layer3_switch_config(args.csv, args.output, args.vtp_mode, args.vtp_domain, cache=_cache(args))
+
+
+def l2_push(args):
+    from configure_layer2switch import configure_switch_from_csv
+    configure_switch_from_csv(args.csv, args.host, args.vtp_mode, args.vtp_domain, batched=args.batched,
+                              pool=_pool(args), fast=args.fast)
+
+
+def l3_render(args):
+    from switch_intent import PORT_PREFIX, STACK_PORT_PREFIX
+    from test2 import generate_layer3_switch_config, generate_layer3_switch_configs
+    port_prefix = STACK_PORT_PREFIX if args.stack else PORT_PREFIX
+    if args.per_switch:
+        generate_layer3_switch_configs(args.csv, args.per_switch, args.vtp_mode, args.vtp_domain, port_prefix)
+    else:
+        generate_layer3_switch_config(args.csv, args.output, args.vtp_mode, args.vtp_domain, port_prefix,
+                                      cache=_cache(args))
+
+
+def l3_push(args):
+    from configure_layer3_switch import configure_layer3_switch_from_csv
+    results = configure_layer3_switch_from_csv(args.csv, args.host, args.vtp_mode, args.vtp_domain, args.diff,
+                                               pool=_pool(args), switch_hosts=_switch_hosts(args.switch_host),
+                                               stack=args.stack, fast=args.fast, via_file=args.via_file,
+                                               transfer=_transfer(args))
+    if isinstance(results, dict) and any(isinstance(result, Exception) for result in results.values()):
+        sys.exit(1)
+
+
+def router_render(args):
+    from configure_broadband_router import generate_cisco_config
+    generate_cisco_config(args.csv, args.output, cache=_cache(args))
+
+
+def router_push(args):
+    from configure_broadband_router import configure_router_remotely
+    configure_router_remotely(args.csv, args.host, args.username, args.password, args.diff, pool=_pool(args),
+                              fast=args.fast, via_file=args.via_file, transfer=_transfer(args))
+
+
+def shelly_provision(args):
+    import asyncio
+    from shelly_client import PLUG_SETTINGS, print_report, provision_many
+    fakes = []
+    if args.fake:
+        from fake_shelly import FakeShelly
+        fakes = [FakeShelly().start() for _ in range(args.fake)]
+    try:
+        print_report(*asyncio.run(provision_many(args.plugs + [fake.url for fake in fakes], PLUG_SETTINGS,
+                                                 args.concurrency)))
+    finally:
+        for fake in fakes:
+            fake.stop()
+
+
+def shelly_onboard(args):
+    from onboarding_pipeline import run_pipeline
+    run_pipeline(state_file=args.state)
+
+
+def shelly_poll(args):
+    from status_poller import run_poller
+    run_poller(args.plugs, args.store, args.duration, args.concurrency, args.fake)
+
+
+def shelly_ingest(args):
+    from mqtt_ingester import MQTT_PORT, benchmark_ingest, run_ingester
+    if args.bench:
+        benchmark_ingest(args.bench, args.plugs, args.publishers, args.store, args.rate)
+    else:
+        host, _, port = args.broker.partition(":")
+        run_ingester(host, int(port or MQTT_PORT), args.store, args.duration)
+
+
+def shelly_state(args):
+    """Offline: show the onboarding progress file without loading the Wi-Fi/HTTP stack."""
+    import json
+    if not os.path.exists(args.state):
+        print(f"No onboarding state in {args.state}.")
+        return
+    with open(args.state, mode="r") as file:
+        plugs = json.load(file)
+    for ssid, plug in plugs.items():
+        print(f"  {ssid:<28} {plug.get('stage', '-'):<12} {plug.get('hostname') or ''}")
+    print(f"{len(plugs)} plugs in {args.state}.")
+
+
+def logs_report(args):
+    import time
+    from common.log_analyzer import analyze_logs, print_report
+    start = time.perf_counter()
+    stats = analyze_logs(args.logs or [os.path.join(CISCO_DIR, "netmiko_debug.log")], args.workers, top=args.top)
+    print_report(stats, time.perf_counter() - start)
+
+
+def _startup_cases(tmp_dir):
+    config1 = os.path.join(ROUTER_DIR, "config1.csv")
+    layer3 = os.path.join(CISCO_DIR, "layer3.csv")
+    cli = ["-m", "common.cli"]
+    return [
+        ("python -c pass", ["-c", "pass"], REPO_ROOT),
+        ("script: import configure_broadband_router", ["-c", "import configure_broadband_router"], ROUTER_DIR),
+        ("script: import configure_layer3_switch", ["-c", "import configure_layer3_switch"], CISCO_DIR),
+        ("script: import shelly_client", ["-c", "import shelly_client"], SHELLY_DIR),
+        ("eager transport: import netmiko", ["-c", "import netmiko"], REPO_ROOT),
+        ("cli --help", cli + ["--help"], REPO_ROOT),
+        ("cli router render", cli + ["router", "render", config1, "-o", os.path.join(tmp_dir, "r.txt"),
+                                     "--no-cache"], REPO_ROOT),
+        ("cli l3 render", cli + ["l3", "render", layer3, "-o", os.path.join(tmp_dir, "s.txt"), "--no-cache"],
+         REPO_ROOT),
+        ("cli shelly state", cli + ["shelly", "state", "--state", os.path.join(tmp_dir, "none.json")], REPO_ROOT),
+    ]
+
+
+def _heavy_modules(argv, cwd):
+    """Run once with -X importtime and return the heavy transport modules that were imported."""
+    import subprocess
+    result = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=cwd, capture_output=True, text=True)
+    loaded = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    return [module for module in HEAVY_MODULES if module in loaded]
+
+
+def bench_startup(args):
+    """Cold-start wall time (median of fresh interpreters) of the old scripts next to the CLI commands."""
+    import statistics
+    import subprocess
+    import tempfile
+    import time
+    print(f"{'command':<44} {'median ms':>10} {'min ms':>8}  heavy modules")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, argv, cwd in _startup_cases(tmp_dir):
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable] + argv, cwd=cwd, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+                times.append((time.perf_counter() - start) * 1000)
+            heavy = ", ".join(_heavy_modules(argv, cwd)) or "-"
+            print(f"{name:<44} {statistics.median(times):>10.1f} {min(times):>8.1f}  {heavy}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m common",
+                                     description="One entry point for the switch, router and Shelly tools.")
+    tools = parser.add_subparsers(dest="tool", required=True)
+
+    def action(tool, name, func, help_text, remote=False):
+        sub = tool.add_parser(name, help=help_text)
+        sub.set_defaults(func=func)
+        if remote:
+            sub.add_argument("--mock", action="store_true", help="use simulated IOS devices (common/mock_ios.py)")
+        return sub
+
+    for tool_name, csv_help in (("l2", "layer2.csv"), ("l3", "layer3.csv")):
+        tool = tools.add_parser(tool_name, help=f"{'layer 2' if tool_name == 'l2' else 'layer 3'} switch "
+                                                f"from {csv_help}").add_subparsers(dest="action", required=True)
+        render = action(tool, "render", l2_render if tool_name == "l2" else l3_render, "write the config offline")
+        push = action(tool, "push", l2_push if tool_name == "l2" else l3_push, "configure the switch over SSH",
+                      remote=True)
+        for sub in (render, push):
+            sub.add_argument("csv")
+            sub.add_argument("--vtp-mode", default="transparent")
+            sub.add_argument("--vtp-domain", default="howest")
+        render.add_argument("-o", "--output", default="switch_config.txt")
+        render.add_argument("--no-cache", action="store_true", help="always render, skip .render_cache/")
+        push.add_argument("host")
+        push.add_argument("--fast", action="store_true", help="chunked writes without per-line pacing")
+        if tool_name == "l2":
+            push.add_argument("--batched", action="store_true", help="one config session and a single save")
+        else:
+            render.add_argument("--per-switch", metavar="DIR", help="one config file per Switch column value")
+            for sub in (render, push):
+                sub.add_argument("--stack", action="store_true", help="number the ports per stack member")
+            push.add_argument("--diff", action="store_true", help="only send what differs from the running-config")
+            push.add_argument("--via-file", action="store_true", help="copy the rendered file to flash and merge it")
+            push.add_argument("--switch-host", action="append", metavar="SWITCH=HOST",
+                              help="send the rows of one Switch value to a separate host")
+
+    router = tools.add_parser("router", help="broadband router from config*.csv").add_subparsers(
+        dest="action", required=True)
+    render = action(router, "render", router_render, "write router_config.txt offline")
+    render.add_argument("csv")
+    render.add_argument("-o", "--output", default="router_config.txt")
+    render.add_argument("--no-cache", action="store_true", help="always render, skip .render_cache/")
+    push = action(router, "push", router_push, "configure the router over SSH", remote=True)
+    push.add_argument("csv")
+    push.add_argument("host")
+    push.add_argument("--username", default=os.environ.get("ROUTER_USERNAME", "adminuser"))
+    push.add_argument("--password", default=os.environ.get("ROUTER_PASSWORD", "admin123"))
+    push.add_argument("--diff", action="store_true", help="only send what differs from the running-config")
+    push.add_argument("--fast", action="store_true", help="chunked writes without per-line pacing")
+    push.add_argument("--via-file", action="store_true", help="copy the rendered file to flash and merge it")
+
+    shelly = tools.add_parser("shelly", help="Shelly Plug S tools").add_subparsers(dest="action", required=True)
+    provision = action(shelly, "provision", shelly_provision, "provision plugs that are already on the LAN")
+    provision.add_argument("plugs", nargs="*", help="plug addresses, e.g. http://172.23.83.10")
+    provision.add_argument("--concurrency", type=int, default=20)
+    provision.add_argument("--fake", type=int, default=0, help="start N local fake plugs instead")
+    poll = action(shelly, "poll", shelly_poll, "poll /status into the local time-series store")
+    poll.add_argument("plugs", nargs="*", help="plug addresses, e.g. http://172.23.83.10")
+    poll.add_argument("--duration", type=float, default=30, help="seconds to poll")
+    poll.add_argument("--concurrency", type=int, default=50)
+    poll.add_argument("--store", default="shelly_timeseries", help="directory of the time-series store")
+    poll.add_argument("--fake", type=int, default=0, help="start N local fake plugs instead")
+    ingest = action(shelly, "ingest", shelly_ingest, "store the MQTT telemetry (shellies/<mqtt_id>/...)")
+    ingest.add_argument("--broker", default="172.23.83.254", help="MQTT broker host[:port]")
+    ingest.add_argument("--store", default="shelly_timeseries", help="directory of the time-series store")
+    ingest.add_argument("--duration", type=float, help="seconds to run (default: until Ctrl+C)")
+    ingest.add_argument("--bench", type=int, metavar="MESSAGES", help="benchmark against the in-process broker")
+    ingest.add_argument("--plugs", type=int, default=500, help="plugs simulated by --bench")
+    ingest.add_argument("--publishers", type=int, default=4, help="publisher threads for --bench")
+    ingest.add_argument("--rate", type=float, help="messages per second for --bench (default: unpaced)")
+    for name, func, help_text in (("onboard", shelly_onboard, "onboard every plug in Wi-Fi range"),
+                                  ("state", shelly_state, "show the onboarding progress (offline)")):
+        action(shelly, name, func, help_text).add_argument("--state", default="onboarding_state.json")
+
+    logs = tools.add_parser("logs", help="rank the slowest commands and devices in netmiko debug logs")
+    logs.set_defaults(func=logs_report)
+    logs.add_argument("logs", nargs="*", help="debug logs (default: Oef2-CiscoScripting/netmiko_debug.log)")
+    logs.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    logs.add_argument("--top", type=int, default=15, help="rows per ranking")
+
+    bench = tools.add_parser("bench-startup", help="cold-start time of the scripts and the CLI commands")
+    bench.set_defaults(func=bench_startup)
+    bench.add_argument("--runs", type=int, default=STARTUP_RUNS)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
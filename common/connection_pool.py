@@ -0,0 +1,207 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+from common.instrumentation import RECORDER, InstrumentedConnection
+
+IDLE_TIMEOUT = 300  # seconds an unused session stays open
+MAX_SESSIONS = 32  # open sessions (and device VTY lines) at most; the least recently used idle one is closed
+HEALTH_CHECK_AFTER = 30  # seconds idle before a session is checked before reuse
+SAVE_DELAY_FACTOR = 4  # 'Building configuration...' takes a few seconds on a Catalyst
+DEFAULT_USERNAME = "admin"
+DEFAULT_PASSWORD = "admin123"
+
+
+def cisco_device(host, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD, port=22, **extra):
+    """Return the Netmiko connection parameters used by all the Cisco scripts."""
+    device = {
+        'device_type': 'cisco_ios',
+        'host': host,
+        'username': username,
+        'password': password,
+        'port': port,
+    }
+    device.update(extra)
+    return device
+
+
+def netmiko_connect(**device):
+    """Open a new Netmiko session (netmiko is only imported when a device is actually contacted)."""
+    from netmiko import ConnectHandler
+    return ConnectHandler(**device)
+
+
+def write_memory(net_connect):
+    """
+    Save the running-config with 'write memory' from exec mode and wait for the prompt.
+    Netmiko 1.4 (requirements.txt) has no save_config(), so the command is sent as is.
+    """
+    return net_connect.send_command("write memory", delay_factor=SAVE_DELAY_FACTOR)
+
+
+def is_alive(net_connect):
+    """Cheap health check: the session still answers with a prompt."""
+    if hasattr(net_connect, "is_alive"):
+        try:
+            return net_connect.is_alive()
+        except Exception:
+            return False
+    try:
+        return bool(net_connect.find_prompt())
+    except Exception:
+        return False
+
+
+class _Session:
+    __slots__ = ("connection", "lock", "last_used")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Keeps one authenticated Netmiko session per host alive, so verify, apply and save
+    steps reuse it instead of paying the SSH handshake and prompt detection again.
+    A session is used by one thread at a time, health-checked after it sat idle and
+    closed once it was idle longer than `idle_timeout`. At most `max_sessions` sessions
+    stay open: opening one more closes the least recently used idle session first.
+    Connects, reconnects and every device call are recorded on `recorder` (None to turn that off).
+    """
+
+    def __init__(self, connect=netmiko_connect, idle_timeout=IDLE_TIMEOUT,
+                 health_check_after=HEALTH_CHECK_AFTER, recorder=RECORDER, max_sessions=MAX_SESSIONS):
+        self.connect = connect
+        self.recorder = recorder
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(device):
+        return (device["host"], device.get("port", 22), device.get("username"))
+
+    @contextmanager
+    def session(self, device):
+        """
+        Borrow the session for `device` (opened on first use). When the body raises, the
+        session is closed because its prompt/config-mode state is unknown.
+        """
+        self.evict_idle()
+        key = self._key(device)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = self._sessions[key] = _Session(None)
+        with entry.lock:
+            idle = time.monotonic() - entry.last_used
+            if entry.connection is not None and idle > self.health_check_after \
+                    and not is_alive(entry.connection):
+                self._close(entry)
+                if self.recorder is not None:
+                    self.recorder.record("retry", device["host"], "reconnect", error="health check failed")
+            if entry.connection is None:
+                self._make_room(entry)
+                entry.connection = self._open(device)
+                with self._lock:
+                    cancelled = self._sessions.get(key) is not entry
+                if cancelled:
+                    # close_host() dropped the entry while we were connecting: nobody would
+                    # close this connection later, so close it now instead of handing it out
+                    self._close(entry)
+                    raise ConnectionError(f"session to {device['host']} was closed while connecting")
+                counter = "opened"
+            else:
+                counter = "reused"
+            with self._lock:
+                setattr(self, counter, getattr(self, counter) + 1)
+            connection = entry.connection
+            if self.recorder is not None:
+                connection = InstrumentedConnection(connection, device["host"], self.recorder)
+            try:
+                yield connection
+            except BaseException:
+                self._close(entry)
+                raise
+            finally:
+                entry.last_used = time.monotonic()
+
+    def _open(self, device):
+        """SSH handshake, login and prompt detection, timed as one 'connect' event."""
+        if self.recorder is None:
+            return self.connect(**device)
+        with self.recorder.timed("connect", device["host"], device.get("device_type", "connect")):
+            return self.connect(**device)
+
+    def evict_idle(self):
+        """Close sessions that have not been used for `idle_timeout` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [(key, entry) for key, entry in self._sessions.items()
+                    if entry.connection is not None and now - entry.last_used > self.idle_timeout]
+        for key, entry in idle:
+            if entry.lock.acquire(blocking=False):
+                try:
+                    self._close(entry)
+                finally:
+                    entry.lock.release()
+
+    def _make_room(self, opening):
+        """Close least recently used idle sessions until a new one fits under max_sessions."""
+        with self._lock:
+            open_entries = sorted((entry for entry in self._sessions.values()
+                                   if entry.connection is not None and entry is not opening),
+                                  key=lambda entry: entry.last_used)
+        excess = len(open_entries) + 1 - self.max_sessions
+        for entry in open_entries:
+            if excess <= 0:
+                break
+            if entry.lock.acquire(blocking=False):  # sessions in use are never closed
+                try:
+                    if entry.connection is not None:
+                        self._close(entry)
+                        excess -= 1
+                finally:
+                    entry.lock.release()
+
+    def close_host(self, host, force=False):
+        """
+        Close and forget the sessions of `host`, e.g. when a fleet run is done with it.
+        A session in use is waited for, unless `force`: then it is disconnected under the
+        running call, which makes that call fail instead of hanging.
+        """
+        with self._lock:
+            entries = [self._sessions.pop(key) for key in list(self._sessions) if key[0] == host]
+        for entry in entries:
+            if force:
+                self._close(entry)
+                continue
+            with entry.lock:
+                self._close(entry)
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            self._close(entry)
+
+    @staticmethod
+    def _close(entry):
+        connection, entry.connection = entry.connection, None
+        if connection is not None:
+            try:
+                connection.disconnect()
+            except Exception:
+                pass
+
+
+DEFAULT_POOL = ConnectionPool()
+atexit.register(DEFAULT_POOL.close_all)
@@ -0,0 +1,82 @@
+import re
+import time
+
+CHUNK_LINES = 64  # config lines written per channel write
+PROMPT_TIMEOUT = 30  # seconds to wait for the prompts of one chunk
+ERROR_MARKERS = ("% Invalid input", "% Incomplete command", "% Ambiguous command", "% Unrecognized command")
+
+
+class ConfigApplyError(Exception):
+    """IOS rejected one or more lines; `errors` holds (label, command, message) per rejected line."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"{label}: '{command}' -> {message}" for label, command, message in errors)
+        super().__init__(f"{len(errors)} config lines rejected ({details})")
+
+
+def prompt_pattern(net_connect):
+    """Regex for every prompt of this device: 'Switch#', 'Switch(config)#', 'Switch(config-if)#', ..."""
+    base = net_connect.find_prompt().strip().rstrip("#>")
+    return re.compile(re.escape(base) + r"(?:\([^)\r\n]*\))?[#>]")
+
+
+def _read_prompts(net_connect, pattern, expected, timeout):
+    """Read from the channel until `expected` prompts came back (one per line sent)."""
+    output = ""
+    delay = 0.01
+    deadline = time.monotonic() + timeout
+    while len(pattern.findall(output)) < expected:
+        data = net_connect.read_channel()
+        if data:
+            output += data
+            delay = 0.01
+            continue
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"only {len(pattern.findall(output))} of {expected} prompts after {timeout} s")
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
+    return output
+
+
+def find_errors(output, pattern, labeled_chunk):
+    """
+    Split the echoed output of one chunk at the prompts: the text before the n-th prompt is
+    the echo and response of the n-th line, so an error message maps to its line and label.
+    """
+    errors = []
+    segments = pattern.split(output)
+    for (label, command), segment in zip(labeled_chunk, segments):
+        for line in segment.splitlines():
+            if line.strip().startswith(ERROR_MARKERS):
+                errors.append((label, command, line.strip()))
+    return errors
+
+
+def send_config_chunked(net_connect, labeled_commands, chunk_lines=CHUNK_LINES, timeout=PROMPT_TIMEOUT,
+                        stop_on_error=True):
+    """
+    Fast alternative to send_config_set: enter config mode once and write the commands
+    `chunk_lines` at a time with a single write_channel each, without Netmiko's per-line
+    pacing. Only at the end of a chunk the prompts are counted and the echoed output is
+    scanned for IOS errors. `labeled_commands` is a list of (label, command); a rejected
+    line raises ConfigApplyError carrying the label (the CSV row) after its chunk finished.
+    Returns the collected output.
+    """
+    pattern = prompt_pattern(net_connect)
+    output = net_connect.config_mode()
+    errors = []
+    try:
+        for start in range(0, len(labeled_commands), chunk_lines):
+            chunk = labeled_commands[start:start + chunk_lines]
+            net_connect.write_channel("".join(f"{command}\n" for _, command in chunk))
+            chunk_output = _read_prompts(net_connect, pattern, len(chunk), timeout)
+            output += chunk_output
+            errors += find_errors(chunk_output, pattern, chunk)
+            if errors and stop_on_error:
+                break
+    finally:
+        output += net_connect.exit_config_mode()
+    if errors:
+        raise ConfigApplyError(errors)
+    return output
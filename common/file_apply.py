@@ -0,0 +1,116 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from common.fast_apply import ERROR_MARKERS, ConfigApplyError
+
+FILE_SYSTEM = "flash:"
+EXEC_ONLY_LINES = ("conf t", "config term", "configure terminal", "end")
+MD5_TIMEOUT_FACTOR = 4  # 'verify /md5' of a large file takes a while on the device
+COPY_TIMEOUT_FACTOR = 8  # merging a large file into the running-config takes longer still
+# any exec prompt: the merged config may change the hostname, and so the prompt
+EXEC_PROMPT = r"\S+#\s*$"
+
+
+class FileTransferError(Exception):
+    """The file on the device is missing or its MD5 differs from the local copy."""
+
+
+def sanitize_config(lines):
+    """
+    Yield the lines of a rendered config that can be merged into the running-config:
+    exec-mode lines ('conf t', 'end') are dropped and a single 'end' closes the file.
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip().lower() in EXEC_ONLY_LINES:
+            continue
+        yield line
+    yield "end"
+
+
+def write_sanitized(config_file, output_file):
+    """Write the sanitized copy of a rendered config; returns (md5, line count)."""
+    digest = hashlib.md5()
+    count = 0
+    with open(config_file, mode="r") as source, open(output_file, mode="w", newline="\n") as target:
+        for line in sanitize_config(source):
+            data = f"{line}\n"
+            target.write(data)
+            digest.update(data.encode())
+            count += 1
+    return digest.hexdigest(), count
+
+
+def scp_transfer(net_connect, source_file, dest_file, file_system=FILE_SYSTEM):
+    """Copy a local file to the device in one SCP transfer (needs 'ip scp server enable')."""
+    from netmiko import FileTransfer
+    with FileTransfer(net_connect, source_file=source_file, dest_file=dest_file,
+                      file_system=file_system) as transfer:
+        if not transfer.verify_space_available():
+            raise FileTransferError(f"Not enough space on {file_system} for {dest_file}")
+        transfer.transfer_file()
+
+
+def remote_md5(net_connect, path):
+    """MD5 of a file on the device, from 'verify /md5 flash:file'."""
+    output = net_connect.send_command(f"verify /md5 {path}", delay_factor=MD5_TIMEOUT_FACTOR)
+    match = re.search(r"=\s*([0-9a-fA-F]{32})", output)
+    if not match:
+        raise FileTransferError(f"Could not verify {path}: {output.strip()}")
+    return match.group(1).lower()
+
+
+def find_copy_errors(output, path):
+    """IOS prints a rejected line, a '^' marker line and the error; returns (file, line, message)."""
+    errors = []
+    command = ""
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(ERROR_MARKERS):
+            errors.append((path, command, stripped))
+        elif stripped and stripped != "^":
+            command = stripped
+    return errors
+
+
+def merge_into_running(net_connect, path):
+    """
+    'copy <path> running-config', answering the destination prompt; returns the merge output.
+    Both steps wait for their prompt instead of for a quiet channel, so a merge that pauses
+    between lines is not cut short (and the file is not deleted while it is still being read).
+    """
+    output = net_connect.send_command(f"copy {path} running-config",
+                                      expect_string=r"Destination filename|" + EXEC_PROMPT)
+    if "Destination filename" in output:
+        output = net_connect.send_command("\n", expect_string=EXEC_PROMPT, delay_factor=COPY_TIMEOUT_FACTOR)
+    return output
+
+
+def apply_config_file(net_connect, config_file, dest_file, transfer=scp_transfer, file_system=FILE_SYSTEM,
+                      keep_file=False):
+    """
+    Apply a rendered config file in one step instead of typing it line by line: sanitize it,
+    transfer it to flash in one bulk copy, compare the MD5 on the device with the local one
+    and merge it with a single 'copy flash:<file> running-config'. Rejected lines raise
+    ConfigApplyError after the merge. Returns the number of lines merged.
+    """
+    path = f"{file_system}{dest_file}"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sanitized = os.path.join(tmp_dir, os.path.basename(dest_file))
+        local_md5, count = write_sanitized(config_file, sanitized)
+        transfer(net_connect, sanitized, dest_file, file_system)
+
+    device_md5 = remote_md5(net_connect, path)
+    if device_md5 != local_md5:
+        net_connect.send_command(f"delete /force {path}")
+        raise FileTransferError(f"MD5 of {path} is {device_md5}, expected {local_md5}; not merged")
+
+    output = merge_into_running(net_connect, path)
+    if not keep_file:
+        net_connect.send_command(f"delete /force {path}")
+    errors = find_copy_errors(output, path)
+    if errors:
+        raise ConfigApplyError(errors)
+    return count
@@ -0,0 +1,252 @@
+import argparse
+import csv
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+from common.connection_pool import DEFAULT_PASSWORD, DEFAULT_POOL, DEFAULT_USERNAME
+from common.paths import add_exercise_paths
+from common.preflight import EXIT_PREFLIGHT_FAILED, preflight, print_problems
+from common.rollout_journal import RolloutJournal, csv_digest
+
+add_exercise_paths()
+
+DEFAULT_WORKERS = 10
+DEFAULT_TIMEOUT = 300  # seconds per device
+
+
+def connect_options(timeout):
+    """
+    Netmiko timeouts for a device with `timeout` seconds: the TCP/SSH connect, every read
+    and the wait for the session lock give up within that time instead of blocking forever.
+    """
+    return {"timeout": timeout, "session_timeout": timeout}
+
+
+def run_layer2(device, checkpoint=None, options=None):
+    """Run the layer 2 configurator for one inventory entry."""
+    from configure_layer2switch import configure_switch_from_csv
+    return configure_switch_from_csv(device["csv"], device["host"], device["vtp_mode"],
+                                     device["vtp_domain"], batched=True, checkpoint=checkpoint,
+                                     username=device["username"], password=device["password"],
+                                     connect_options=options)
+
+
+def run_layer3(device, checkpoint=None, options=None):
+    """
+    Run the layer 3 configurator for one inventory entry. The whole switch is one stream,
+    so a device that was interrupted before resumes with a diff against its running-config.
+    """
+    from configure_layer3_switch import configure_layer3_switch_from_csv
+    resumed = checkpoint is not None and checkpoint.resumed
+    return configure_layer3_switch_from_csv(device["csv"], device["host"], device["vtp_mode"],
+                                            device["vtp_domain"], diff_only=resumed,
+                                            username=device["username"], password=device["password"],
+                                            connect_options=options)
+
+
+def run_router(device, checkpoint=None, options=None):
+    """Run the broadband router configurator for one inventory entry."""
+    from configure_broadband_router import configure_router_remotely
+    return configure_router_remotely(device["csv"], device["host"], device["username"],
+                                     device["password"], checkpoint=checkpoint, connect_options=options)
+
+
+FLEET_TASKS = {
+    "layer2": run_layer2,
+    "layer3": run_layer3,
+    "router": run_router,
+}
+
+
+def verify_device(device, options=None):
+    """Read the device back with one batch of show commands; returns the mismatches."""
+    from common.verify import verify_router, verify_switch
+    if device["role"] == "router":
+        return verify_router(device["csv"], device["host"], device["username"], device["password"],
+                             connect_options=options)
+    return verify_switch(device["csv"], device["host"], username=device["username"],
+                         password=device["password"], connect_options=options)
+
+
+def load_inventory(inventory_file):
+    """
+    Read the inventory CSV (host;role;csv;username;password;vtp_mode;vtp_domain).
+    CSV paths are resolved relative to the inventory file; empty credentials fall back
+    to the defaults of cisco_device.
+    """
+    base_dir = os.path.dirname(os.path.abspath(inventory_file))
+    devices = []
+    with open(inventory_file, mode="r") as file:
+        csv_reader = csv.DictReader(file, delimiter=';')
+        for row in csv_reader:
+            row = {key.strip(): (value or "").strip() for key, value in row.items()}
+            if row["role"] not in FLEET_TASKS:
+                raise ValueError(f"Unknown role '{row['role']}' for {row['host']}")
+            row["csv"] = os.path.join(base_dir, row["csv"])
+            row["username"] = row.get("username") or DEFAULT_USERNAME
+            row["password"] = row.get("password") or DEFAULT_PASSWORD
+            row["vtp_mode"] = row.get("vtp_mode") or "transparent"
+            row["vtp_domain"] = row.get("vtp_domain") or "howest"
+            devices.append(row)
+    return devices
+
+
+def journal_key(device):
+    return f"{device['role']}:{device['host']}"
+
+
+def _timed_task(index, device, started, finished, verify=False, journal=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Run the configurator for one device and record when it actually started and finished.
+    With `verify`, the device is read back afterwards; returns the mismatches.
+    With a journal, the device resumes from its checkpoint and is marked finished on success.
+    The device's pooled session is closed afterwards, so a big fleet does not keep one open per device.
+    """
+    started[index] = time.perf_counter()
+    try:
+        checkpoint = journal.checkpoint(journal_key(device), csv_digest(device["csv"])) if journal else None
+        options = connect_options(timeout)
+        FLEET_TASKS[device["role"]](device, checkpoint, options)
+        mismatches = verify_device(device, options) if verify else []
+        if checkpoint is not None and not mismatches:
+            checkpoint.finish()
+        return mismatches
+    finally:
+        finished[index] = time.perf_counter()
+        DEFAULT_POOL.close_host(device["host"])
+
+
+def _start_workers(jobs, max_workers):
+    """
+    Run (future, function, args) jobs on at most `max_workers` daemon threads. Unlike the
+    workers of a ThreadPoolExecutor they are not joined at exit, so a device that hangs
+    past its timeout cannot keep the interpreter from exiting.
+    """
+    work = queue.Queue()
+    for job in jobs:
+        work.put(job)
+
+    def worker():
+        while True:
+            try:
+                future, function, args = work.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    for _ in range(min(max_workers, len(jobs))):
+        threading.Thread(target=worker, daemon=True).start()
+
+
+def run_fleet(devices, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, verify=False, journal=None):
+    """
+    Configure all devices with a bounded pool of worker threads (and verify them with `verify`).
+    With a RolloutJournal, devices that finished in an earlier run are skipped and
+    interrupted devices resume from their last confirmed checkpoint.
+    Every Netmiko connect and read of a device gives up after `timeout` seconds (see
+    connect_options). A device that still runs longer than `timeout` in total is reported
+    as 'timeout' and its session is disconnected under it, so its worker fails on the next
+    read and frees its slot instead of running on (or keeping the interpreter from exiting).
+    Returns a list of result dicts (host, role, status, seconds, error).
+    """
+    results = {}
+    started = {}
+    finished = {}
+    fleet_start = time.perf_counter()
+    jobs = []
+    futures = {}
+    for index, device in enumerate(devices):
+        if journal and journal.is_finished(journal_key(device), csv_digest(device["csv"])):
+            results[index] = {"host": device["host"], "role": device["role"], "status": "skipped",
+                              "seconds": 0.0, "error": "finished in an earlier run"}
+            continue
+        future = Future()
+        jobs.append((future, _timed_task, (index, device, started, finished, verify, journal, timeout)))
+        futures[future] = index
+    _start_workers(jobs, max_workers)
+    pending = set(futures)
+
+    while pending:
+        done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            index = futures[future]
+            device = devices[index]
+            seconds = finished.get(index, now) - started.get(index, now)
+            error = future.exception()
+            mismatches = [] if error else future.result()
+            results[index] = {
+                "host": device["host"],
+                "role": device["role"],
+                "status": "failed" if error else "mismatch" if mismatches else "ok",
+                "seconds": seconds,
+                "error": str(error) if error else
+                         f"{len(mismatches)} checks failed, first: {mismatches[0]['check']}" if mismatches else "",
+            }
+        for future in list(pending):
+            index = futures[future]
+            device = devices[index]
+            start = started.get(index)
+            if start is not None and now - start > timeout:
+                pending.discard(future)
+                DEFAULT_POOL.close_host(device["host"], force=True)
+                results[index] = {
+                    "host": device["host"],
+                    "role": device["role"],
+                    "status": "timeout",
+                    "seconds": now - start,
+                    "error": f"no result after {timeout} s",
+                }
+
+    wall_time = time.perf_counter() - fleet_start
+    ordered = [results[index] for index in range(len(devices))]
+    print_fleet_summary(ordered, wall_time)
+    return ordered
+
+
+def print_fleet_summary(results, wall_time):
+    """Print one line per device and the fleet totals."""
+    print("\nFleet summary:")
+    for result in results:
+        line = f"  {result['host']:<16} {result['role']:<7} {result['status']:<8} {result['seconds']:8.2f} s"
+        if result["error"]:
+            line += f"  {result['error']}"
+        print(line)
+    ok = sum(1 for result in results if result["status"] in ("ok", "skipped"))
+    device_time = sum(result["seconds"] for result in results)
+    print(f"{ok}/{len(results)} devices configured in {wall_time:.2f} s wall-clock "
+          f"({device_time:.2f} s of device time).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the switch/router configurators against an inventory.")
+    parser.add_argument("inventory", help="inventory CSV (host;role;csv;username;password;vtp_mode;vtp_domain)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="max devices configured at once")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per device")
+    parser.add_argument("--verify", action="store_true", help="read every device back after configuring it")
+    parser.add_argument("--journal", help="rollout journal (JSONL); a rerun resumes where this one stopped")
+    parser.add_argument("--skip-preflight", action="store_true", help="do not check the CSVs before connecting")
+    args = parser.parse_args()
+
+    inventory = load_inventory(args.inventory)
+    if not args.skip_preflight:
+        checked = preflight([device["csv"] for device in inventory])
+        if checked.problems:
+            print(f"Pre-flight found {len(checked.problems)} problems, no device was contacted:")
+            print_problems(checked.problems)
+            raise SystemExit(EXIT_PREFLIGHT_FAILED)
+    rollout_journal = RolloutJournal(args.journal) if args.journal else None
+    try:
+        fleet_results = run_fleet(inventory, args.workers, args.timeout, args.verify, rollout_journal)
+    finally:
+        if rollout_journal is not None:
+            rollout_journal.close()
+    raise SystemExit(0 if all(result["status"] in ("ok", "skipped") for result in fleet_results) else 1)
@@ -0,0 +1,226 @@
+import argparse
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+MAX_EVENTS = 100_000  # oldest events are dropped beyond this
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+LOG_ENV = "INSTRUMENTATION_LOG"  # set to a path to export the events of a run as JSONL
+
+
+class Recorder:
+    """
+    Collects structured timing events from the device clients. Every event is a dict:
+    kind ('connect', 'command', 'http', 'retry'), device, name (method or URL path),
+    seconds, bytes_sent, bytes_received, ok, error and a wall-clock 'ts'.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = collections.deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def record(self, kind, device, name, seconds=0.0, bytes_sent=0, bytes_received=0, ok=True, error="",
+               **extra):
+        event = {"ts": time.time(), "kind": kind, "device": device, "name": name, "seconds": seconds,
+                 "bytes_sent": bytes_sent, "bytes_received": bytes_received, "ok": ok, "error": error}
+        event.update(extra)
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    @contextmanager
+    def timed(self, kind, device, name, **extra):
+        """
+        Time the body and record one event. The body may fill in bytes_sent/bytes_received
+        (or any other field) on the yielded dict; an exception is recorded as ok=False.
+        """
+        fields = dict(extra)
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            fields.update(ok=False, error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.record(kind, device, name, time.perf_counter() - start, **fields)
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+
+    def export_jsonl(self, path):
+        with self._lock:
+            events = list(self.events)
+        with open(path, mode="a") as file:
+            for event in events:
+                file.write(json.dumps(event) + "\n")
+        return len(events)
+
+    def summary(self):
+        return summarize(list(self.events))
+
+
+def _bucket(seconds):
+    ms = seconds * 1000
+    for limit in BUCKETS_MS:
+        if ms < limit:
+            return f"<{limit}ms"
+    return f">={BUCKETS_MS[-1]}ms"
+
+
+def summarize(events):
+    """
+    Aggregate events per (kind, name): count, errors, total/median/p95/max latency,
+    bytes and a latency histogram. Returned sorted by total time, slowest first.
+    """
+    groups = collections.defaultdict(list)
+    for event in events:
+        groups[(event["kind"], event["name"])].append(event)
+    rows = []
+    for (kind, name), group in groups.items():
+        latencies = sorted(event["seconds"] for event in group)
+        histogram = collections.Counter(_bucket(seconds) for seconds in latencies)
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "count": len(group),
+            "errors": sum(1 for event in group if not event["ok"]),
+            "total_s": sum(latencies),
+            "median_ms": latencies[(len(latencies) - 1) // 2] * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "bytes_sent": sum(event["bytes_sent"] for event in group),
+            "bytes_received": sum(event["bytes_received"] for event in group),
+            "histogram": {bucket: histogram[bucket] for bucket in
+                          [f"<{limit}ms" for limit in BUCKETS_MS] + [f">={BUCKETS_MS[-1]}ms"]
+                          if histogram[bucket]},
+        })
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+
+def print_summary(rows):
+    print(f"{'kind':<8} {'name':<28} {'count':>6} {'err':>4} {'total s':>8} {'median ms':>10} "
+          f"{'p95 ms':>8} {'max ms':>8} {'sent':>9} {'recv':>9}")
+    for row in rows:
+        print(f"{row['kind']:<8} {row['name'][:28]:<28} {row['count']:>6} {row['errors']:>4} "
+              f"{row['total_s']:>8.2f} {row['median_ms']:>10.1f} {row['p95_ms']:>8.1f} {row['max_ms']:>8.1f} "
+              f"{row['bytes_sent']:>9} {row['bytes_received']:>9}")
+        print(" " * 14 + "  ".join(f"{bucket}:{count}" for bucket, count in row["histogram"].items()))
+
+
+def load_jsonl(path):
+    with open(path, mode="r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+COMMAND_ARGUMENTS = ("config_commands", "command_string", "out_data")
+
+
+def _materialize_commands(args, kwargs):
+    """
+    Turn an iterator of commands (e.g. a generator passed to send_config_set) into a list,
+    so it can be counted and still be passed on; returns (commands, args, kwargs).
+    """
+    if args:
+        commands = args[0]
+    else:
+        key = next((key for key in COMMAND_ARGUMENTS if key in kwargs), None)
+        commands = kwargs.get(key)
+    if commands is None or isinstance(commands, (str, list, tuple)):
+        return commands, args, kwargs
+    commands = list(commands)
+    if args:
+        args = (commands,) + args[1:]
+    else:
+        kwargs = dict(kwargs, **{key: commands})
+    return commands, args, kwargs
+
+
+def _command_bytes(name, commands):
+    """(bytes sent, lines) of a call; write_channel sends its data as is, the others add a newline per command."""
+    if not commands:
+        return 0, 0
+    if name == "write_channel":
+        return len(commands), commands.count("\n") or 1
+    if isinstance(commands, str):
+        return len(commands) + 1, 1
+    return sum(len(command) + 1 for command in commands), len(commands)
+
+
+class InstrumentedConnection:
+    """
+    Wraps a Netmiko connection and records one 'command' event per call of the methods
+    that talk to the device (config sets, show commands, prompt checks, saves and the raw
+    channel writes/reads of the fast path), with the bytes sent and the bytes of output
+    received. A read_channel poll that returned nothing is not recorded. Everything else
+    is passed through.
+    """
+
+    TIMED_METHODS = ("send_config_set", "send_command", "send_command_timing",
+                     "find_prompt", "config_mode", "exit_config_mode", "check_config_mode", "enable",
+                     "write_channel", "read_channel")
+
+    def __init__(self, connection, device, recorder):
+        self._connection = connection
+        self._device = device
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connection, name)
+        if name not in self.TIMED_METHODS or not callable(attribute):
+            return attribute
+
+        if name == "read_channel":
+            return self._timed_read(attribute)
+
+        def timed_call(*args, **kwargs):
+            commands, args, kwargs = _materialize_commands(args, kwargs)
+            bytes_sent, lines = _command_bytes(name, commands)
+            with self._recorder.timed("command", self._device, name, bytes_sent=bytes_sent,
+                                      lines=lines) as fields:
+                output = attribute(*args, **kwargs)
+                if isinstance(output, str):
+                    fields["bytes_received"] = len(output)
+                return output
+        return timed_call
+
+    def _timed_read(self, read_channel):
+        def timed_read(*args, **kwargs):
+            start = time.perf_counter()
+            output = read_channel(*args, **kwargs)
+            if output:
+                self._recorder.record("command", self._device, "read_channel", time.perf_counter() - start,
+                                      bytes_received=len(output))
+            return output
+        return timed_read
+
+
+RECORDER = Recorder()
+
+
+def _export_at_exit():
+    path = os.environ.get(LOG_ENV)
+    if path and RECORDER.events:
+        RECORDER.export_jsonl(path)
+
+
+atexit.register(_export_at_exit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize an instrumentation JSONL log.")
+    parser.add_argument("logs", nargs="+", help="JSONL files written via INSTRUMENTATION_LOG")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    all_events = [event for log in args.logs for event in load_jsonl(log)]
+    summary = summarize(all_events)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from common.paths import REPO_ROOT
+from common.render_cache import evict_lru, touch
+
+CACHE_DIR = os.path.join(REPO_ROOT, ".intent_cache")
+CACHE_ENV = "INTENT_CACHE_DIR"  # set to another directory to cache there, or to "" to turn the cache off
+MAX_ENTRIES = 64
+MAX_BYTES = 256 * 1024 * 1024
+SUFFIX = ".pickle"
+
+
+def default_cache_dir():
+    return os.environ.get(CACHE_ENV, CACHE_DIR) or None
+
+
+def load_or_compile(csv_file, kind, version, compile_func, cache_dir=None, max_entries=MAX_ENTRIES,
+                    max_bytes=MAX_BYTES):
+    """
+    Return the compiled intent for a CSV file.
+    The result is cached on disk keyed by the CSV content hash, so an unchanged CSV is
+    never parsed or validated twice. `compile_func` receives the CSV text. Pickles are
+    evicted least recently used first like the render cache. Without `cache_dir` the
+    default from default_cache_dir() is used; when that is None nothing is cached.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    with open(csv_file, mode="rb") as file:
+        data = file.read()
+    if cache_dir is None:
+        return compile_func(data.decode("utf-8-sig"))
+    key = hashlib.sha256(f"{kind}:{version}:".encode() + data).hexdigest()
+    cache_file = os.path.join(cache_dir, f"{kind}-{key}{SUFFIX}")
+
+    try:
+        with open(cache_file, mode="rb") as file:
+            intent = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    else:
+        try:
+            touch(cache_file)
+        except FileNotFoundError:  # evicted by another process meanwhile; the intent is still good
+            pass
+        return intent
+
+    intent = compile_func(data.decode("utf-8-sig"))
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, mode="wb") as file:
+        pickle.dump(intent, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_file)
+    touch(cache_file)
+    evict_lru(cache_dir, SUFFIX, max_entries, max_bytes)
+    return intent
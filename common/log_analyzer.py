@@ -0,0 +1,378 @@
+import argparse
+import ast
+import heapq
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from common.paths import CISCO_DIR
+
+SESSION_MARKER = b"starting thread (client mode)"
+# "DEBUG:netmiko:..." (logging's default format), optionally preceded by an asctime timestamp
+ENTRY = re.compile(rb"^(?:(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?)\s+(?:- )?)?"
+                   rb"(?:DEBUG|INFO|WARNING|ERROR|CRITICAL):([\w.]+):(.*)")
+HOST_KEY = re.compile(r"host key for \[?([^\]:\s]+)")
+PROMPT = re.compile(r"([\w.\-]+)(?:\([\w\-]+\))?[#>]\s*$")
+# Without timestamps the time is estimated from Netmiko's read loop: every read is one poll
+# of loop_delay (0.1 s), and read_channel_timing waits its final delay (2 s) before the
+# second empty read that ends it.
+POLL_SECONDS = 0.1
+FINAL_DELAY = 2.0
+MIN_SPLIT_BYTES = 8 * 1024 * 1024  # smaller files are parsed by a single worker
+TOP = 15
+
+
+def command_key(command):
+    """Group commands that only differ in numbers: 'vlan 1982' and 'vlan 10' -> 'vlan N'."""
+    return re.sub(r"\d+", "N", command)
+
+
+class LogStats:
+    """Mergeable aggregates of one or more log ranges (picklable, returned by the workers)."""
+
+    def __init__(self, top=TOP):
+        self.top = top
+        self.bytes = 0
+        self.sessions = 0
+        self.commands = 0
+        self.timestamped = 0  # commands timed from log timestamps instead of read polls
+        self.by_command = {}  # key -> [count, total s, max s, prompt wait s, errors, example]
+        self.by_device = {}  # device -> [sessions, commands, total s, prompt wait s, errors]
+        self.errors = {}  # error line -> [count, example command]
+        self.slowest = []  # min-heap of (latency, device, command, file)
+
+    def add_session(self, device, commands, timestamped):
+        device_stats = self.by_device.setdefault(device, [0, 0, 0.0, 0.0, 0])
+        device_stats[0] += 1
+        self.sessions += 1
+        for path, command, latency, prompt_wait, errors in commands:
+            self.commands += 1
+            self.timestamped += timestamped
+            entry = self.by_command.setdefault(command_key(command), [0, 0.0, 0.0, 0.0, 0, command])
+            entry[0] += 1
+            entry[1] += latency
+            entry[2] = max(entry[2], latency)
+            entry[3] += prompt_wait
+            entry[4] += len(errors)
+            device_stats[1] += 1
+            device_stats[2] += latency
+            device_stats[3] += prompt_wait
+            device_stats[4] += len(errors)
+            for error in errors:
+                self.errors.setdefault(error, [0, command])[0] += 1
+            item = (latency, device, command, path)
+            if len(self.slowest) < self.top:
+                heapq.heappush(self.slowest, item)
+            elif item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def merge(self, other):
+        self.bytes += other.bytes
+        self.sessions += other.sessions
+        self.commands += other.commands
+        self.timestamped += other.timestamped
+        for key, (count, total, longest, wait, errors, example) in other.by_command.items():
+            entry = self.by_command.setdefault(key, [0, 0.0, 0.0, 0.0, 0, example])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], longest)
+            entry[3] += wait
+            entry[4] += errors
+        for device, values in other.by_device.items():
+            entry = self.by_device.setdefault(device, [0, 0, 0.0, 0.0, 0])
+            for index, value in enumerate(values):
+                entry[index] += value
+        for error, (count, example) in other.errors.items():
+            self.errors.setdefault(error, [0, example])[0] += count
+        for item in other.slowest:
+            if len(self.slowest) < self.top:
+                heapq.heappush(self.slowest, item)
+            elif item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+        return self
+
+
+@lru_cache(maxsize=4096)
+def decode_write(literal):
+    """b"b'vlan 10\\n'" (how write_channel logs its bytes) -> 'vlan 10'; a bare newline -> '<enter>'."""
+    try:
+        command = ast.literal_eval(literal.decode(errors="replace"))
+    except (ValueError, SyntaxError):
+        command = literal
+    if isinstance(command, bytes):
+        command = command.decode(errors="replace")
+    return command.strip() or "<enter>"
+
+
+def _parse_timestamp(text):
+    return datetime.fromisoformat(text.decode().replace(",", ".")).timestamp()
+
+
+class SessionParser:
+    """
+    Splits a stream of log lines into sessions (at paramiko's 'starting thread') and
+    commands (at every write_channel). A command's latency runs from its write to the next
+    write, its prompt wait to the first read that ends in a prompt. Lines written back to
+    back without a read in between (send_config_set) share the reads that follow them;
+    '% ...' error lines are attributed to the command whose echo precedes them.
+    """
+
+    def __init__(self, stats, path, poll_seconds=POLL_SECONDS, final_delay=FINAL_DELAY):
+        self.stats = stats
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.final_delay = final_delay
+        self._entry = None  # (timestamp, kind, [data parts]) of the entry being read
+        self._start_session()
+
+    def _start_session(self):
+        self.host = None
+        self.prompt_name = None
+        self.clock = 0.0
+        self.timestamped = False
+        self.last_read_empty = False
+        self.commands = []
+        self.burst = []  # commands written since the last read
+        self.burst_start = None
+        self.burst_output = []
+        self.burst_prompt = None
+        self.burst_read = False
+        self.last_time = 0.0
+        self.active = False
+
+    def feed(self, line):
+        match = ENTRY.match(line)
+        if match is None:
+            if self._entry is not None:
+                self._entry[2].append(line)  # continuation of multi-line read data
+            return
+        self._finish_entry()
+        timestamp, logger, message = match.groups()
+        if logger == b"paramiko.transport":
+            if SESSION_MARKER in message:
+                self._end_session()
+                self.active = True
+            elif b"host key for" in message:
+                host = HOST_KEY.search(message.decode(errors="replace"))
+                self.host = host.group(1) if host else self.host
+            return
+        if message.startswith(b"write_channel: "):
+            self._entry = (timestamp, "write", [message[len(b"write_channel: "):]])
+        elif message.startswith(b"read_channel: "):
+            self._entry = (timestamp, "read_channel", [message[len(b"read_channel: "):]])
+        elif message.startswith(b"_read_channel_expect read_data: "):
+            self._entry = (timestamp, "read_expect", [message[len(b"_read_channel_expect read_data: "):]])
+
+    def _time(self, timestamp, advance):
+        if timestamp is not None:
+            self.timestamped = True
+            return _parse_timestamp(timestamp)
+        self.clock += advance
+        return self.clock
+
+    def _finish_entry(self):
+        if self._entry is None:
+            return
+        timestamp, kind, parts = self._entry
+        self._entry = None
+        if kind == "write":
+            self._write(self._time(timestamp, 0.0), b"".join(parts).strip())
+            return
+        text = b"".join(parts).decode(errors="replace").rstrip("\r\n")
+        empty = not text.strip()
+        advance = self.poll_seconds
+        if kind == "read_channel":
+            if empty and self.last_read_empty:
+                advance = self.final_delay
+            self.last_read_empty = empty
+        now = self._time(timestamp, advance)
+        self.last_time = now
+        if not self.burst:
+            return
+        self.burst_read = True
+        self.burst_output.append(text)
+        if self.burst_prompt is None and not empty:
+            prompt = PROMPT.search("".join(self.burst_output[-2:]))
+            if prompt:
+                self.burst_prompt = now
+                self.prompt_name = self.prompt_name or prompt.group(1)
+
+    def _write(self, now, literal):
+        command = decode_write(literal)
+        if self.burst and self.burst_read:
+            self._close_burst(now)
+        if not self.burst:
+            self.burst_start = now
+        self.burst.append(command)
+        self.active = True
+
+    def _close_burst(self, end):
+        """Split the burst's time over its commands and attribute its error lines."""
+        count = len(self.burst)
+        latency = max(0.0, end - self.burst_start) / count
+        prompt_at = self.burst_prompt if self.burst_prompt is not None else end
+        prompt_wait = max(0.0, prompt_at - self.burst_start) / count
+        errors = [[] for _ in self.burst]
+        current = 0
+        for line in "".join(self.burst_output).splitlines():
+            stripped = line.strip()
+            if stripped.startswith("% "):
+                errors[current].append(stripped)
+                continue
+            for index in range(current, count):
+                if self.burst[index] != "<enter>" and stripped.endswith(self.burst[index]):
+                    current = index
+                    break
+        self.commands += [(self.path, command, latency, prompt_wait, command_errors)
+                          for command, command_errors in zip(self.burst, errors)]
+        self.burst = []
+        self.burst_output = []
+        self.burst_prompt = None
+        self.burst_read = False
+
+    def _end_session(self):
+        self._finish_entry()
+        if self.burst:
+            self._close_burst(self.last_time)
+        if self.active:
+            device = self.host or self.prompt_name or "unknown"
+            if self.host and self.prompt_name:
+                device = f"{self.host} ({self.prompt_name})"
+            self.stats.add_session(device, self.commands, self.timestamped)
+        self._start_session()
+
+    def close(self):
+        self._end_session()
+
+
+def analyze_range(task):
+    """Worker: memory-map one file and parse bytes [start, end) of it; returns LogStats."""
+    path, start, end, poll_seconds, final_delay, top = task
+    stats = LogStats(top)
+    if end <= start:
+        return stats
+    parser = SessionParser(stats, os.path.basename(path), poll_seconds, final_delay)
+    with open(path, mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        data.seek(start)
+        while data.tell() < end:
+            parser.feed(data.readline())
+    parser.close()
+    stats.bytes = end - start
+    return stats
+
+
+def split_file(path, parts):
+    """Byte ranges of a log that start at a session boundary, about `parts` of them."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    if parts <= 1 or size < MIN_SPLIT_BYTES:
+        return [(path, 0, size)]
+    bounds = [0]
+    with open(path, mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for part in range(1, parts):
+            position = data.find(SESSION_MARKER, size * part // parts)
+            if position < 0:
+                break
+            position = data.rfind(b"\n", 0, position) + 1
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return [(path, start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def analyze_logs(paths, workers=None, poll_seconds=POLL_SECONDS, final_delay=FINAL_DELAY, top=TOP):
+    """
+    Parse many debug logs (large ones split at session boundaries) in worker processes
+    and merge their aggregates. Returns the merged LogStats.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, start, end, poll_seconds, final_delay, top)
+             for log in paths for path, start, end in split_file(log, workers)]
+    stats = LogStats(top)
+    if workers == 1 or len(tasks) <= 1:
+        for result in map(analyze_range, tasks):
+            stats.merge(result)
+        return stats
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        for result in executor.map(analyze_range, tasks):
+            stats.merge(result)
+    return stats
+
+
+def print_report(stats, seconds=None):
+    timing = "from log timestamps" if stats.timestamped == stats.commands and stats.commands else \
+        "estimated from read polls" if not stats.timestamped else "mixed"
+    speed = f" in {seconds:.2f} s ({stats.bytes / seconds / 1e6:.1f} MB/s)" if seconds else ""
+    print(f"{stats.bytes} bytes, {stats.sessions} sessions, {stats.commands} commands{speed}; times {timing}")
+
+    print("\nSlowest commands (total time):")
+    print(f"  {'total s':>8} {'count':>6} {'mean ms':>8} {'max ms':>8} {'prompt s':>9} {'errors':>6}  command")
+    for key, (count, total, longest, wait, errors, example) in sorted(
+            stats.by_command.items(), key=lambda item: item[1][1], reverse=True)[:stats.top]:
+        print(f"  {total:>8.2f} {count:>6} {total / count * 1000:>8.0f} {longest * 1000:>8.0f} {wait:>9.2f} "
+              f"{errors:>6}  {example[:60]}")
+
+    print("\nSlowest devices:")
+    print(f"  {'total s':>8} {'sessions':>8} {'commands':>8} {'prompt s':>9} {'errors':>6}  device")
+    for device, (sessions, commands, total, wait, errors) in sorted(
+            stats.by_device.items(), key=lambda item: item[1][2], reverse=True)[:stats.top]:
+        print(f"  {total:>8.2f} {sessions:>8} {commands:>8} {wait:>9.2f} {errors:>6}  {device}")
+
+    print("\nSlowest single commands:")
+    for latency, device, command, path in sorted(stats.slowest, reverse=True):
+        print(f"  {latency * 1000:>8.0f} ms  {device:<28} {path:<20} {command[:50]}")
+
+    if stats.errors:
+        print("\nError lines:")
+        for error, (count, command) in sorted(stats.errors.items(), key=lambda item: item[1][0],
+                                              reverse=True)[:stats.top]:
+            print(f"  {count:>6}x  {error[:60]}  (e.g. after '{command[:40]}')")
+
+
+def write_fleet_log(sample_log, output_file, copies):
+    """A large log for benchmarks: the sample log `copies` times, every copy from another host."""
+    with open(sample_log, mode="rb") as file:
+        sample = file.read()
+    with open(output_file, mode="wb") as target:
+        for copy in range(copies):
+            host = f"10.{copy // 65536 % 256}.{copy // 256 % 256}.{copy % 256}".encode()
+            target.write(sample.replace(b"host key for 192.168.100.100", b"host key for " + host))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the slowest commands and devices in netmiko debug logs.")
+    parser.add_argument("logs", nargs="*", default=[os.path.join(CISCO_DIR, "netmiko_debug.log")],
+                        help="netmiko debug logs (default: Oef2-CiscoScripting/netmiko_debug.log)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=TOP, help="rows per ranking")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="estimated seconds per read poll")
+    parser.add_argument("--final-delay", type=float, default=FINAL_DELAY,
+                        help="estimated wait before the closing empty read of a timing read")
+    parser.add_argument("--bench", type=int, metavar="COPIES",
+                        help="benchmark on a log of COPIES sessions-worth of the sample log")
+    args = parser.parse_args()
+
+    if args.bench:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fleet_log = os.path.join(tmp_dir, "fleet_debug.log")
+            write_fleet_log(args.logs[0], fleet_log, args.bench)
+            for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+                start = time.perf_counter()
+                stats = analyze_logs([fleet_log], workers, args.poll, args.final_delay, args.top)
+                seconds = time.perf_counter() - start
+                print(f"{workers} worker(s): {stats.bytes / 1e6:.1f} MB, {stats.sessions} sessions, "
+                      f"{stats.commands} commands in {seconds:.2f} s ({stats.bytes / seconds / 1e6:.1f} MB/s)")
+        finally:
+            shutil.rmtree(tmp_dir)
+    else:
+        start = time.perf_counter()
+        stats = analyze_logs(args.logs, args.workers, args.poll, args.final_delay, args.top)
+        print_report(stats, time.perf_counter() - start)
@@ -0,0 +1,484 @@
+import hashlib
+import ipaddress
+import re
+import threading
+import time
+
+from common.running_config import (canonical_interface, expand_interface_range, line_key, normalize_line,
+                                   short_interface)
+from common.vlan_ranges import VlanRangeSet
+
+INVALID_INPUT = "% Invalid input detected at '^' marker."
+
+
+SHOW_COMMANDS = {
+    "show running-config": "running_config",
+    "show run": "running_config",
+    "show vlan brief": "show_vlan_brief",
+    "show interfaces switchport": "show_interfaces_switchport",
+    "show ip interface brief": "show_ip_interface_brief",
+    "show ip int br": "show_ip_interface_brief",
+    "show ip route static": "show_ip_route_static",
+}
+
+
+class MockIOSDevice:
+    """
+    Simulated running-config of one IOS switch/router. Commands are interpreted the way
+    IOS config mode would (vlan / interface / interface range / ip route / vtp ...).
+    The state outlives connections, so a second run sees what the first one pushed.
+    """
+
+    def __init__(self, hostname="Catalyst3560"):
+        self.hostname = hostname
+        self.lock = threading.Lock()
+        self.global_lines = {}  # key -> line (vtp, hostname, ...)
+        self.vlans = {1: "default"}
+        self.interfaces = {}  # canonical name -> {key: line}
+        self.shutdown = set()
+        self.routes = []
+        self.saved = 0
+        self.flash = {}  # 'flash:name' -> bytes
+
+    def interface(self, name):
+        return self.interfaces.setdefault(name, {})
+
+    def running_config(self):
+        lines = ["Building configuration...", "", "!", f"hostname {self.hostname}", "!"]
+        for line in self.global_lines.values():
+            if not line.startswith("vtp password"):
+                lines.append(line)
+        lines.append("!")
+        for vlan_id in sorted(self.vlans):
+            if vlan_id == 1:
+                continue
+            lines.append(f"vlan {vlan_id}")
+            if self.vlans[vlan_id]:
+                lines.append(f" name {self.vlans[vlan_id]}")
+            lines.append("!")
+        for name, settings in self.interfaces.items():
+            lines.append(f"interface {name}")
+            lines += [f" {line}" for line in settings.values()]
+            if name in self.shutdown:
+                lines.append(" shutdown")
+            lines.append("!")
+        lines += self.routes
+        lines += ["!", "end"]
+        return "\n".join(lines)
+
+    def _is_switchport(self, name):
+        return not name.startswith(("Vlan", "Loopback")) and "." not in name
+
+    def _access_vlan(self, settings):
+        if settings.get("switchport mode") == "switchport mode trunk":
+            return None
+        access = settings.get("switchport access vlan")
+        return int(access.split()[-1]) if access else 1
+
+    def show_vlan_brief(self):
+        lines = ["", "VLAN Name                             Status    Ports",
+                 "---- -------------------------------- --------- -------------------------------"]
+        members = {}
+        for name, settings in self.interfaces.items():
+            if self._is_switchport(name):
+                members.setdefault(self._access_vlan(settings), []).append(short_interface(name))
+        for vlan_id in sorted(self.vlans):
+            ports = members.get(vlan_id, [])
+            chunks = [", ".join(ports[i:i + 4]) for i in range(0, len(ports), 4)] or [""]
+            name = (self.vlans[vlan_id] or f"VLAN{vlan_id:04d}")[:32]
+            lines.append(f"{vlan_id:<4} {name:<32} {'active':<9} {chunks[0]}".rstrip())
+            lines += [" " * 48 + chunk for chunk in chunks[1:]]
+        return "\n".join(lines)
+
+    def show_interfaces_switchport(self):
+        lines = []
+        for name, settings in self.interfaces.items():
+            if not self._is_switchport(name):
+                continue
+            mode = {"switchport mode access": "static access", "switchport mode trunk": "trunk"}.get(
+                settings.get("switchport mode"), "dynamic auto")
+            access = self._access_vlan(settings) or 1
+            allowed = settings.get("switchport trunk allowed vlan")
+            lines += [
+                f"Name: {short_interface(name)}",
+                "Switchport: Enabled",
+                f"Administrative Mode: {mode}",
+                f"Operational Mode: {mode if name not in self.shutdown else 'down'}",
+                "Administrative Trunking Encapsulation: dot1q",
+                f"Access Mode VLAN: {access} ({self.vlans.get(access) or f'VLAN{access:04d}'})",
+                "Trunking Native Mode VLAN: 1 (default)",
+                f"Trunking VLANs Enabled: {allowed.split()[-1] if allowed else 'ALL'}",
+                "Pruning VLANs Enabled: 2-1001",
+                "",
+            ]
+        return "\n".join(lines)
+
+    def show_ip_interface_brief(self):
+        lines = [f"{'Interface':<22} {'IP-Address':<15} OK? Method Status                Protocol"]
+        for name, settings in self.interfaces.items():
+            address = settings.get("ip address", "")
+            if address == "ip address dhcp":
+                ip, method = "unassigned", "DHCP"
+            elif address:
+                ip, method = address.split()[2], "manual"
+            else:
+                ip, method = "unassigned", "unset"
+            status, protocol = ("administratively down", "down") if name in self.shutdown else ("up", "up")
+            lines.append(f"{name:<22} {ip:<15} YES {method:<6} {status:<21} {protocol}")
+        return "\n".join(lines)
+
+    def show_ip_route_static(self):
+        """Static routes the way IOS prints them, classful subnets grouped under 'is subnetted'."""
+        lines = ["Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP", ""]
+        groups = {}
+        for route in self.routes:
+            _, _, network, mask, gateway = route.split()[:5]
+            network = ipaddress.IPv4Network(f"{network}/{mask}", strict=False)
+            first = network.network_address.packed[0]
+            classful = 8 if first < 128 else 16 if first < 192 else 24
+            key = (network.supernet(new_prefix=classful), network.prefixlen) \
+                if network.prefixlen > classful else (None, None)
+            groups.setdefault(key, []).append((network, gateway))
+        for (classful, prefixlen), routes in groups.items():
+            if classful is None:
+                for network, gateway in routes:
+                    code = "S*" if network.prefixlen == 0 else "S "
+                    lines.append(f"{code}    {network} [1/0] via {gateway}")
+                continue
+            lines.append(f"      {classful.network_address}/{prefixlen} is subnetted, {len(routes)} subnets")
+            lines += [f"S        {network.network_address} [1/0] via {gateway}" for network, gateway in routes]
+        return "\n".join(lines)
+
+
+class MockIOSConnection:
+    """
+    Netmiko-compatible stand-in for ConnectHandler(...) talking to a MockIOSDevice.
+    Every exchange with the "device" costs `latency` seconds (one round trip) and every
+    config line `line_delay` seconds, like Netmiko's per-line pacing. Counters record
+    commands sent, round trips and bytes so apply paths can be compared offline.
+    """
+
+    def __init__(self, device=None, latency=0.0, line_delay=0.0, **connect_params):
+        self.device = device or MockIOSDevice()
+        self.host = connect_params.get("host", "mock")
+        self.latency = latency
+        self.line_delay = line_delay
+        self.mode = "exec"  # exec, config, config-if, config-vlan
+        self.context = []
+        self.connected = True
+        self.commands_sent = 0
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._channel = ""  # echoed output waiting to be read by read_channel()
+        self._pending_copy = None  # flash file of a 'copy' waiting for its destination prompt
+        self._round_trip()  # SSH handshake + prompt detection
+
+    # --- helpers -------------------------------------------------------------------
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def prompt(self):
+        suffix = {"exec": "#", "config": "(config)#", "config-if": "(config-if)#",
+                  "config-if-range": "(config-if-range)#", "config-vlan": "(config-vlan)#"}[self.mode]
+        return self.device.hostname + suffix
+
+    def _execute(self, command):
+        """Run one line against the device and return the echoed output."""
+        self.commands_sent += 1
+        self.bytes_sent += len(command) + 1
+        prompt = self.prompt
+        with self.device.lock:
+            error = self._apply(command.strip())
+        output = f"{prompt}{command}\n" + (f"{error}\n" if error else "")
+        self.bytes_received += len(output)
+        return output
+
+    def _apply(self, line):
+        if not line or line.startswith("!"):  # IOS ignores comment lines
+            return None
+        words = line.split()
+        if self.mode == "exec":
+            if line in ("conf t", "config term", "configure terminal"):
+                self.mode = "config"
+                return None
+            if line in ("wr mem", "write mem", "write memory", "copy running-config startup-config"):
+                self.device.saved += 1
+                return None
+            if line == "end":
+                return None
+            return INVALID_INPUT
+        if line == "end":
+            self.mode, self.context = "exec", []
+            return None
+        if line == "exit":
+            self.mode = "config" if self.mode != "config" else "exec"
+            self.context = []
+            return None
+        if line.startswith("do "):
+            return self._apply_exec(line[3:])
+
+        # global commands are accepted in every config sub-mode, like IOS does
+        if words[0] == "vlan" and len(words) == 2 and re.match(r"[\d,-]+$", words[1]):
+            vlans = list(VlanRangeSet.parse(words[1]))
+            if not vlans or vlans[0] < 1 or vlans[-1] > 4094:
+                return INVALID_INPUT
+            for vlan_id in vlans:
+                self.device.vlans.setdefault(vlan_id, None)
+            self.mode, self.context = "config-vlan", vlans
+            return None
+        if words[0] == "interface" and len(words) > 1:
+            if words[1] == "range":
+                members = expand_interface_range(line[len("interface range "):])
+                self.mode = "config-if-range"
+            else:
+                members = [canonical_interface(line[len("interface "):])]
+                self.mode = "config-if"
+            for member in members:
+                self.device.interface(member)
+            self.context = members
+            return None
+        if line.startswith("ip route "):
+            line = normalize_line(line)
+            if line not in self.device.routes:
+                self.device.routes.append(line)
+            return None
+        if words[0] == "vtp" and len(words) == 3:
+            self.device.global_lines[f"vtp {words[1]}"] = line
+            return None
+        if words[0] == "hostname" and len(words) == 2:
+            self.device.hostname = words[1]
+            return None
+
+        if self.mode == "config-vlan":
+            if words[0] == "name" and len(words) > 1:
+                for vlan_id in self.context:
+                    self.device.vlans[vlan_id] = line[len("name "):].strip()  # a name may contain spaces
+                return None
+            return INVALID_INPUT
+        if self.mode in ("config-if", "config-if-range"):
+            return self._apply_interface(normalize_line(line))
+        return INVALID_INPUT
+
+    def _apply_interface(self, line):
+        if line == "no shutdown":
+            self.device.shutdown.difference_update(self.context)
+            return None
+        if line == "shutdown":
+            self.device.shutdown.update(self.context)
+            return None
+        if not line.startswith(("description ", "ip address ", "switchport ", "no ip address")):
+            return INVALID_INPUT
+        if line.startswith("switchport access vlan "):
+            vlan_id = line.split()[-1]
+            if not vlan_id.isdigit():
+                return INVALID_INPUT
+            self.device.vlans.setdefault(int(vlan_id), None)
+        for member in self.context:
+            settings = self.device.interface(member)
+            if line == "no ip address":
+                settings.pop("ip address", None)
+            else:
+                settings[line_key(line)] = line
+        return None
+
+    def _apply_exec(self, command):
+        if command in ("wr mem", "write mem", "write memory"):
+            self.device.saved += 1
+            return None
+        return INVALID_INPUT
+
+    # --- Netmiko API -----------------------------------------------------------------
+
+    def find_prompt(self):
+        self._round_trip()
+        return self.prompt
+
+    def is_alive(self):
+        return self.connected
+
+    def enable(self):
+        self._round_trip()
+        return ""
+
+    def check_config_mode(self):
+        self._round_trip()
+        return self.mode != "exec"
+
+    def config_mode(self):
+        if self.check_config_mode():
+            return ""
+        self._round_trip()
+        self.mode = "config"
+        return f"{self.device.hostname}#config term\nEnter configuration commands, one per line.  End with CNTL/Z.\n"
+
+    def exit_config_mode(self):
+        if not self.check_config_mode():
+            return ""
+        self._round_trip()
+        self.mode, self.context = "exec", []
+        return f"end\n{self.prompt}"
+
+    def send_config_set(self, config_commands=None, exit_config_mode=True, **kwargs):
+        if config_commands is None:
+            return ""
+        if isinstance(config_commands, str):
+            config_commands = (config_commands,)
+        output = self.config_mode()
+        for command in config_commands:
+            if self.line_delay:
+                time.sleep(self.line_delay)
+            output += self._execute(command)
+        self._round_trip()  # read back the echoed output
+        if exit_config_mode:
+            output += self.exit_config_mode()
+        return output
+
+    def send_command(self, command_string, **kwargs):
+        self._round_trip()
+        self.commands_sent += 1
+        self.bytes_sent += len(command_string) + 1
+        command = command_string.strip()
+        show = SHOW_COMMANDS.get(" ".join(command.split()))
+        file_output = self._file_command(command)
+        copy_output = self._interactive_copy(command)
+        if copy_output is not None:
+            output = copy_output
+        elif file_output is not None:
+            output = file_output
+        elif show:
+            with self.device.lock:
+                output = getattr(self.device, show)()
+        elif command == "end":
+            self.mode, self.context = "exec", []
+            output = ""
+        else:
+            with self.device.lock:
+                output = self._apply(command) or ""
+        self.bytes_received += len(output)
+        return output
+
+    def _file_command(self, command):
+        """'verify /md5', 'delete /force' and 'dir' on the simulated flash; None for other commands."""
+        words = command.split()
+        if command.startswith("verify /md5 ") and len(words) == 3:
+            data = self.device.flash.get(words[2])
+            if data is None:
+                return f"%Error opening {words[2]} (No such file or directory)"
+            return f"verify /md5 ({words[2]}) = {hashlib.md5(data).hexdigest()}"
+        if command.startswith("delete /force ") and len(words) == 3:
+            self.device.flash.pop(words[2], None)
+            return ""
+        if command in ("dir", "dir flash:"):
+            return "\n".join(f"{len(data):>10}  {name}" for name, data in self.device.flash.items())
+        return None
+
+    def _copy_to_running(self, path):
+        """Merge a flash file into the running-config line by line, like 'copy flash:x running-config'."""
+        data = self.device.flash.get(path)
+        if data is None:
+            return f"%Error opening {path} (No such file or directory)"
+        output = ""
+        self.mode, self.context = "config", []
+        with self.device.lock:
+            for line in data.decode().splitlines():
+                self.commands_sent += 1
+                error = self._apply(line.strip())
+                if error:
+                    output += f"{line}\n{error}\n"
+                if self.mode == "exec":  # the file ended with 'end'
+                    break
+        self.mode, self.context = "exec", []
+        return output + f"{len(data)} bytes copied in 0.100 secs"
+
+    def _interactive_copy(self, command):
+        """The interactive 'copy <file> running-config' and the answer to its prompt; None otherwise."""
+        pending, self._pending_copy = self._pending_copy, None
+        if pending and not command:
+            return self._copy_to_running(pending)
+        match = re.match(r"copy (\S+) running-config$", command)
+        if match:
+            self._pending_copy = match.group(1)
+            return "Destination filename [running-config]? "
+        return None
+
+    def send_command_timing(self, command_string, **kwargs):
+        self._round_trip()
+        self.bytes_sent += len(command_string) + 1
+        output = self._interactive_copy(command_string.strip())
+        if output is None:
+            output = self.send_command(command_string)
+        else:
+            self.bytes_received += len(output)
+        return output
+
+    def write_channel(self, out_data):
+        """Raw channel write: every line is processed, its echo and the next prompt are queued."""
+        self.bytes_sent += len(out_data)
+        for command in out_data.splitlines():
+            self.commands_sent += 1
+            with self.device.lock:
+                error = self._apply(command.strip())
+            self._channel += f"{command}\n" + (f"{error}\n" if error else "") + self.prompt
+
+    def read_channel(self):
+        self._round_trip()
+        data, self._channel = self._channel, ""
+        self.bytes_received += len(data)
+        return data
+
+    def disconnect(self):
+        self.connected = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disconnect()
+
+
+def flash_transfer(net_connect, source_file, dest_file, file_system="flash:"):
+    """
+    Stand-in for file_apply.scp_transfer: copies the local file onto the simulated flash of
+    the mock device behind `net_connect` as one bulk transfer (one round trip).
+    """
+    connection = getattr(net_connect, "_connection", net_connect)  # unwrap an InstrumentedConnection
+    with open(source_file, mode="rb") as file:
+        data = file.read()
+    connection._round_trip()
+    connection.bytes_sent += len(data)
+    connection.device.flash[f"{file_system}{dest_file}"] = data
+
+
+class MockFleet:
+    """
+    Connect factory for ConnectionPool: one persistent MockIOSDevice per host, a fresh
+    MockIOSConnection per session. Keeps every connection so counters can be summed.
+    """
+
+    def __init__(self, latency=0.0, line_delay=0.0):
+        self.latency = latency
+        self.line_delay = line_delay
+        self.devices = {}
+        self.connections = []
+        self._lock = threading.Lock()
+
+    def __call__(self, **device_params):
+        with self._lock:
+            device = self.devices.setdefault(device_params["host"], MockIOSDevice())
+        connection = MockIOSConnection(device, self.latency, self.line_delay, **device_params)
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+    def totals(self):
+        return {
+            "connections": len(self.connections),
+            "commands": sum(connection.commands_sent for connection in self.connections),
+            "round_trips": sum(connection.round_trips for connection in self.connections),
+            "bytes_sent": sum(connection.bytes_sent for connection in self.connections),
+        }
@@ -0,0 +1,13 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CISCO_DIR = os.path.join(REPO_ROOT, "Oef2-CiscoScripting")
+ROUTER_DIR = os.path.join(REPO_ROOT, "Oef3-BroadBandRouter")
+SHELLY_DIR = os.path.join(REPO_ROOT, "Oef4-ShellySmartPlug")
+
+def add_exercise_paths():
+    """Make the exercise scripts importable (their folder names are not valid package names)."""
+    for path in (CISCO_DIR, ROUTER_DIR, SHELLY_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
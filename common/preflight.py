@@ -0,0 +1,402 @@
+import argparse
+import array
+import bisect
+import csv
+import ipaddress
+import os
+import socket
+import tempfile
+import time
+
+from common.vlan_ranges import VlanRangeSet
+
+KIND_ACCESS, KIND_SVI, KIND_TRUNK, KIND_INTERFACE, KIND_ROUTE = range(5)
+INTERFACE_KINDS = (KIND_SVI, KIND_INTERFACE)
+# netmask text -> (prefix length, host bits)
+MASKS = {str(ipaddress.IPv4Network(f"0.0.0.0/{length}").netmask): (length, (1 << (32 - length)) - 1)
+         for length in range(33)}
+NO_ADDRESS = 0  # 0.0.0.0 stands for 'no address' (or DHCP) in the address columns
+MAX_SHOWN = 50  # problems printed before the rest is only counted
+EXIT_PREFLIGHT_FAILED = 3
+
+# column name -> array typecode; every row of every CSV is one position in each array
+COLUMNS = {
+    "file": "I", "row": "I", "device": "I", "kind": "B", "vlan_first": "H", "vlan_last": "H",
+    "address": "I", "prefix": "B", "network": "I", "broadcast": "I", "gateway": "I",
+}
+
+
+def _parse_ip(text):
+    """Dotted quad -> int, None when it is not a plain IPv4 address."""
+    if text.count(".") != 3:
+        return None
+    try:
+        return int.from_bytes(socket.inet_aton(text), "big")
+    except OSError:
+        return None
+
+
+def _format_ip(value):
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+def _parse_ports(text):
+    """'1-9' or '1,3-4' -> [(1, 9)] / [(1, 1), (3, 4)]; raises ValueError."""
+    if text.isdigit():
+        return [(int(text), int(text))]
+    intervals = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        if not start.isdigit() or (end and not end.isdigit()) or int(end or start) < int(start):
+            raise ValueError(f"invalid port range '{text}'")
+        intervals.append((int(start), int(end or start)))
+    return intervals
+
+
+class FleetTable:
+    """
+    All rows of a set of switch and router CSVs as parallel arrays (one array per column),
+    so the fleet-wide checks sort and sweep flat integer columns instead of row objects.
+    Row-level problems (bad VLAN, IP, mask, port syntax) are collected while loading.
+    """
+
+    def __init__(self):
+        self.files = []  # file column -> path
+        self.devices = []  # device column -> 'path' or 'path switch N'
+        self._device_ids = {}
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array.array(typecode))
+        self.dhcp_devices = set()
+        # port intervals live in their own columns, a row can have several
+        self.port_owner = array.array("I")  # index into the row columns
+        self.port_first = array.array("H")
+        self.port_last = array.array("H")
+        self.interfaces = []  # rows with an interface address, filled in by index()
+        self.problems = []  # (file, row, check, message)
+
+    def __len__(self):
+        return len(self.row)
+
+    def _device_id(self, name):
+        device_id = self._device_ids.get(name)
+        if device_id is None:
+            device_id = self._device_ids[name] = len(self.devices)
+            self.devices.append(name)
+        return device_id
+
+    def problem(self, file_id, row_num, check, message):
+        self.problems.append((self.files[file_id], row_num, check, message))
+
+    def _extend(self, records):
+        """Append row tuples (in COLUMNS order) column by column."""
+        for name, values in zip(COLUMNS, zip(*records)):
+            getattr(self, name).extend(values)
+
+    def _address_and_mask(self, file_id, row_num, ip_text, mask_text):
+        """Parse an IP/netmask pair; returns (address, prefix, network, broadcast) or None."""
+        address = _parse_ip(ip_text)
+        if address is None:
+            self.problem(file_id, row_num, "ip", f"invalid IP address '{ip_text}'")
+            return None
+        mask = MASKS.get(mask_text)
+        if mask is None:
+            self.problem(file_id, row_num, "mask", f"invalid netmask '{mask_text}'")
+            return None
+        prefix, host_bits = mask
+        return address, prefix, address & ~host_bits & 0xFFFFFFFF, address | host_bits
+
+    def load(self, csv_file):
+        """Load a layer 2/layer 3 switch CSV or a router CSV (recognised by its header)."""
+        file_id = len(self.files)
+        self.files.append(csv_file)
+        with open(csv_file, mode="r", newline="") as file:
+            reader = csv.reader(file, delimiter=";")
+            header = [name.strip() for name in next(reader, [])]
+            if "network" in header:
+                self._load_router(file_id, reader, header)
+            else:
+                self._load_switch(file_id, reader, header)
+
+    def _load_switch(self, file_id, reader, header):
+        column = {name: header.index(name) for name in header}
+        vlan_col, description_col, ports_col = column["Vlan"], column["Description"], column["Ports"]
+        ip_col, mask_col, switch_col = column.get("IP Address"), column.get("Netmask"), column.get("Switch")
+        path = self.files[file_id]
+        base = len(self)
+        records = []
+        for row_num, values in enumerate(reader, start=1):
+            values += [""] * (len(header) - len(values))
+            vlan_text = values[vlan_col].strip()
+            if vlan_text.isdigit():
+                vlan_first = vlan_last = int(vlan_text)
+            else:
+                try:
+                    parsed = VlanRangeSet.parse(vlan_text)
+                    vlan_first, vlan_last = (parsed.first(), parsed.last()) if parsed else (0, 0)
+                except ValueError:
+                    vlan_first = vlan_last = 0
+            if vlan_first < 1 or vlan_last > 4094:
+                self.problem(file_id, row_num, "vlan", f"VLAN '{vlan_text}' outside 1-4094")
+                continue
+
+            ip_text = values[ip_col].strip() if ip_col is not None else ""
+            mask_text = values[mask_col].strip() if mask_col is not None else ""
+            if ip_text and mask_text:
+                parsed = self._address_and_mask(file_id, row_num, ip_text, mask_text)
+                if parsed is None:
+                    continue
+                address, prefix, network, broadcast = parsed
+                kind = KIND_SVI
+            else:
+                address = prefix = network = broadcast = NO_ADDRESS
+                description = values[description_col].lower()
+                kind = KIND_TRUNK if "trunk" in description or "uplink" in description else KIND_ACCESS
+
+            switch = (values[switch_col].strip() if switch_col is not None else "") or "1"
+            device_id = self._device_id(f"{path} switch {switch}")
+            records.append((file_id, row_num, device_id, kind, vlan_first, vlan_last,
+                            address, prefix, network, broadcast, NO_ADDRESS))
+
+            ports_text = values[ports_col].strip()
+            if not ports_text:
+                continue
+            try:
+                intervals = _parse_ports(ports_text)
+            except ValueError as e:
+                self.problem(file_id, row_num, "ports", str(e))
+                continue
+            for start, end in intervals:
+                self.port_owner.append(base + len(records) - 1)
+                self.port_first.append(start)
+                self.port_last.append(end)
+        self._extend(records)
+
+    def _load_router(self, file_id, reader, header):
+        column = {name: header.index(name) for name in header}
+        network_col, interface_col, vlan_col = column["network"], column["interface"], column["vlan"]
+        ip_col, mask_col, gateway_col = column["ipaddress"], column["subnetmask"], column["defaultgateway"]
+        device_id = self._device_id(self.files[file_id])
+        records = []
+        for row_num, values in enumerate(reader, start=1):
+            values += [""] * (len(header) - len(values))
+            vlan_text = values[vlan_col].strip()
+            if not vlan_text.isdigit() or int(vlan_text) > 4094:
+                self.problem(file_id, row_num, "vlan", f"VLAN '{vlan_text}' outside 0-4094")
+                continue
+            vlan = int(vlan_text)
+            ip_text = values[ip_col].strip()
+            mask_text = values[mask_col].strip()
+            gateway_text = values[gateway_col].strip()
+
+            gateway = NO_ADDRESS
+            if gateway_text:
+                gateway = _parse_ip(gateway_text)
+                if gateway is None:
+                    self.problem(file_id, row_num, "gateway", f"invalid gateway '{gateway_text}'")
+                    continue
+            if ip_text.lower() == "dhcp":
+                self.dhcp_devices.add(device_id)
+                ip_text = ""
+            address = prefix = network = broadcast = NO_ADDRESS
+            if ip_text and mask_text:
+                parsed = self._address_and_mask(file_id, row_num, ip_text, mask_text)
+                if parsed is None:
+                    continue
+                address, prefix, network, broadcast = parsed
+            elif ip_text:
+                self.problem(file_id, row_num, "mask", f"IP address '{ip_text}' without netmask")
+                continue
+
+            if values[interface_col].strip():
+                records.append((file_id, row_num, device_id, KIND_INTERFACE, vlan, vlan,
+                                address, prefix, network, broadcast, gateway))
+            # a LAN row with a gateway is also rendered as 'ip route <ipaddress> <mask> <gateway>'
+            if gateway and address and values[network_col].strip().lower() == "lan":
+                records.append((file_id, row_num, device_id, KIND_ROUTE, vlan, vlan,
+                                address, prefix, network, broadcast, gateway))
+        self._extend(records)
+
+    def index(self):
+        """Collect the rows that carry an interface address (used by most checks)."""
+        address, kind = self.address, self.kind
+        self.interfaces = [i for i in range(len(self)) if address[i] and kind[i] in INTERFACE_KINDS]
+
+
+def check_host_addresses(table):
+    """Interface addresses must not be the network or broadcast address of their subnet."""
+    address, network, broadcast, prefix = table.address, table.network, table.broadcast, table.prefix
+    for i in table.interfaces:
+        if prefix[i] < 31 and (address[i] == network[i] or address[i] == broadcast[i]):
+            table.problem(table.file[i], table.row[i], "ip",
+                          f"{_format_ip(address[i])}/{prefix[i]} is not a host address")
+
+
+def check_duplicate_ips(table):
+    """Sort every interface address of the fleet once; equal neighbours are duplicates."""
+    address = table.address
+    rows = sorted(table.interfaces, key=address.__getitem__)
+    for previous, current in zip(rows, rows[1:]):
+        if address[previous] == address[current]:
+            table.problem(table.file[current], table.row[current], "duplicate ip",
+                          f"{_format_ip(address[current])} also used in "
+                          f"{table.files[table.file[previous]]} row {table.row[previous]}")
+
+
+def check_subnet_overlaps(table):
+    """
+    Interval sweep per device: the connected subnets sorted by (device, network address);
+    a subnet that starts before the furthest broadcast address seen so far overlaps it.
+    """
+    device, network, broadcast = table.device, table.network, table.broadcast
+    keys = {i: (device[i] << 32) | network[i] for i in table.interfaces}
+    current, reach, owner = None, -1, None
+    for i in sorted(table.interfaces, key=keys.__getitem__):
+        if device[i] != current:
+            current, reach, owner = device[i], -1, None
+        if network[i] <= reach:
+            table.problem(table.file[i], table.row[i], "subnet overlap",
+                          f"{_format_ip(network[i])}/{table.prefix[i]} overlaps the subnet of row {table.row[owner]}")
+        if broadcast[i] > reach:
+            reach, owner = broadcast[i], i
+
+
+def check_port_conflicts(table):
+    """
+    Interval sweep over the port ranges per switch. Trunk rows for exactly the same ports
+    are merged by the configurators (their VLANs are added up), so they do not conflict.
+    """
+    owners, first, last = table.port_owner, table.port_first, table.port_last
+    keys = [(table.device[owners[e]] << 32) | (first[e] << 16) | last[e] for e in range(len(owners))]
+    current, reach, owner = None, -1, None
+    for e in sorted(range(len(owners)), key=keys.__getitem__):
+        i = owners[e]
+        if table.device[i] != current:
+            current, reach, owner = table.device[i], -1, None
+        if first[e] <= reach:
+            o = owners[owner]
+            same_trunk = (table.kind[i] == table.kind[o] == KIND_TRUNK and
+                          first[e] == first[owner] and last[e] == last[owner])
+            if not same_trunk:
+                table.problem(table.file[i], table.row[i], "port conflict",
+                              f"ports {first[e]}-{last[e]} already assigned "
+                              f"in row {table.row[o]} of {table.devices[current]}")
+        if last[e] > reach:
+            reach, owner = last[e], e
+
+
+def _merge_intervals(intervals):
+    """Sorted, merged (start, end) intervals as two arrays for bisect lookups."""
+    starts, ends = array.array("I"), array.array("I")
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def check_gateways(table):
+    """
+    Every gateway must lie in a connected subnet of its router (the WAN gateway in the WAN
+    subnet, so a wrong mask is caught) and route networks must have no host bits set.
+    Routers with a DHCP interface learn their subnet at runtime and are only partly checked.
+    """
+    device, address, network, gateway = table.device, table.address, table.network, table.gateway
+    connected = {}
+    for i in table.interfaces:
+        connected.setdefault(device[i], []).append((network[i], table.broadcast[i]))
+    index = {device_id: _merge_intervals(subnets) for device_id, subnets in connected.items()}
+    for i in range(len(table)):
+        if table.kind[i] == KIND_ROUTE and network[i] != address[i]:
+            table.problem(table.file[i], table.row[i], "route",
+                          f"route {_format_ip(address[i])}/{table.prefix[i]} has host bits set "
+                          f"(network is {_format_ip(network[i])})")
+        if not gateway[i] or device[i] in table.dhcp_devices:
+            continue
+        starts, ends = index.get(device[i], ((), ()))
+        position = bisect.bisect_right(starts, gateway[i]) - 1
+        if position < 0 or gateway[i] > ends[position]:
+            table.problem(table.file[i], table.row[i], "gateway",
+                          f"gateway {_format_ip(gateway[i])} is not in a connected subnet of the router")
+
+
+CHECKS = (check_host_addresses, check_duplicate_ips, check_subnet_overlaps, check_port_conflicts,
+          check_gateways)
+
+
+def preflight(csv_files):
+    """Load all CSVs (each file once) into one FleetTable, run every check and return the table."""
+    table = FleetTable()
+    for csv_file in dict.fromkeys(csv_files):
+        table.load(csv_file)
+    table.index()
+    for check in CHECKS:
+        check(table)
+    return table
+
+
+def print_problems(problems, max_shown=MAX_SHOWN):
+    for path, row_num, check, message in problems[:max_shown]:
+        print(f"  {path}:{row_num}: [{check}] {message}")
+    if len(problems) > max_shown:
+        print(f"  ... and {len(problems) - max_shown} more")
+
+
+def write_clean_fleet_csvs(switch_csv, router_csv, rows):
+    """
+    Synthetic CSVs without problems (unique /30 SVIs, one port per row on 48-port switches,
+    reachable gateways), so the benchmark times the checks and not the problem reports.
+    """
+    with open(switch_csv, mode="w") as file:
+        file.write("Vlan;Description;IP Address;Netmask;Switch;Ports\n")
+        for i in range(rows):
+            address = _format_ip((10 << 24) + i * 4 + 1)
+            file.write(f"{100 + i % 3900};SVI-{i};{address};255.255.255.252;{i // 48 + 1};{i % 48 + 1}\n")
+    with open(router_csv, mode="w") as file:
+        file.write("network;interface;description;vlan;ipaddress;subnetmask;defaultgateway\n")
+        file.write("wan;gi0/0;WAN;0;172.23.80.200;255.255.254.0;172.23.80.1\n")
+        for i in range(rows - 1):
+            if i % 2 == 0:
+                address = _format_ip((11 << 24) + i * 4 + 1)
+                file.write(f"lan;gi0/1.{i + 10};LAN-{i};{i % 4000 + 10};{address};255.255.255.252;\n")
+            else:
+                network = _format_ip((12 << 24) + i * 256)
+                file.write(f"lan;;ROUTE-{i};0;{network};255.255.255.0;{_format_ip((11 << 24) + i * 4 - 2)}\n")
+
+
+def benchmark(rows):
+    """Time the pre-flight on a synthetic switch CSV and router CSV of `rows` rows each."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        switch_csv = os.path.join(tmp_dir, "layer3.csv")
+        router_csv = os.path.join(tmp_dir, "router.csv")
+        write_clean_fleet_csvs(switch_csv, router_csv, rows)
+        start = time.perf_counter()
+        table = preflight([switch_csv, router_csv])
+        seconds = time.perf_counter() - start
+    print(f"{len(table)} rows checked in {seconds:.2f} s ({len(table) / seconds:,.0f} rows/s), "
+          f"{len(table.problems)} problems.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check switch and router CSVs before any device is touched.")
+    parser.add_argument("csv", nargs="*", help="layer2/layer3/router CSV files")
+    parser.add_argument("--inventory", help="check every CSV referenced by a fleet inventory")
+    parser.add_argument("--bench", type=int, metavar="ROWS", help="time the checks on synthetic CSVs")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+        raise SystemExit(0)
+    csv_files = list(args.csv)
+    if args.inventory:
+        from common.fleet_runner import load_inventory
+        csv_files += [device["csv"] for device in load_inventory(args.inventory)]
+    if not csv_files:
+        parser.error("no CSV files given")
+    result = preflight(csv_files)
+    if result.problems:
+        print(f"{len(result.problems)} problems in {len(result.files)} files:")
+        print_problems(result.problems)
+        raise SystemExit(EXIT_PREFLIGHT_FAILED)
+    print(f"{len(result)} rows in {len(result.files)} files OK.")
@@ -0,0 +1,174 @@
+import argparse
+import atexit
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from common.paths import REPO_ROOT
+
+CACHE_DIR = os.path.join(REPO_ROOT, ".render_cache")
+MAX_ENTRIES = 256
+MAX_BYTES = 256 * 1024 * 1024
+STATS_FILE = "stats.jsonl"  # one line of counts appended per process
+COUNTERS = ("hits", "misses", "evictions")
+
+
+def _file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, mode="rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def touch(path):
+    """Mark a cache entry as recently used; set explicitly because file system clocks can be coarse."""
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def cache_entries(cache_dir, suffix):
+    """Return (mtime, size, path) of the files ending in `suffix`, least recently used first."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(suffix):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+    return sorted(entries)
+
+
+def evict_lru(cache_dir, suffix, max_entries, max_bytes):
+    """Remove least recently used entries until at most `max_entries` / `max_bytes` remain; returns the count."""
+    entries = cache_entries(cache_dir, suffix)
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    while entries and (len(entries) > max_entries or total > max_bytes):
+        _, size, path = entries.pop(0)
+        total -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # another process evicted it first
+            continue
+        evicted += 1
+    return evicted
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered config files. The key is the hash of the CSV
+    bytes, the render parameters and the renderer version, so an unchanged input is
+    copied from the cache instead of being parsed and rendered again. Entries are
+    evicted least recently used first once there are more than `max_entries` of them
+    or they take more than `max_bytes`. Hit/miss/eviction counts are kept in memory and
+    appended to stats.jsonl as one line by flush_stats() at the end of a run (and at exit),
+    so parallel renders never overwrite each other's counts.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._counts = collections.Counter()
+        atexit.register(self.flush_stats)
+
+    def key(self, csv_file, kind, version, params=None):
+        params = json.dumps(params or {}, sort_keys=True)
+        return hashlib.sha256(f"{kind}:{version}:{params}:{_file_digest(csv_file)}".encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def render(self, csv_file, output_file, kind, version, render_func, params=None):
+        """
+        Write the rendered config for `csv_file` to `output_file`, from the cache when
+        possible; otherwise `render_func(csv_file, path, **params)` renders it. Returns True on a hit.
+        """
+        params = params or {}
+        entry = self._entry(self.key(csv_file, kind, version, params))
+        try:
+            shutil.copyfile(entry, output_file)
+            touch(entry)
+        except FileNotFoundError:
+            pass  # not cached, or evicted by another process just now: render it
+        else:
+            self._counts["hits"] += 1
+            return True
+
+        render_func(csv_file, output_file, **params)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(output_file, tmp_path)
+        os.replace(tmp_path, entry)
+        touch(entry)
+        self._counts["misses"] += 1
+        self.evict()
+        return False
+
+    def entries(self):
+        """Return (mtime, size, path) of the cached files, least recently used first."""
+        return cache_entries(self.cache_dir, ".txt")
+
+    def evict(self):
+        evicted = evict_lru(self.cache_dir, ".txt", self.max_entries, self.max_bytes)
+        self._counts["evictions"] += evicted
+        return evicted
+
+    def stats(self):
+        """Counts of all earlier runs (stats.jsonl) plus this process, and the current cache size."""
+        counts = collections.Counter(self._counts)
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), mode="r") as file:
+                for line in file:
+                    try:
+                        counts.update(json.loads(line))
+                    except ValueError:
+                        continue  # torn line of a process that died while writing
+        except OSError:
+            pass
+        entries = self.entries()
+        return dict({name: counts[name] for name in COUNTERS}, entries=len(entries),
+                    bytes=sum(size for _, size, _ in entries))
+
+    def flush_stats(self):
+        """Append this process's counts as one line; a single append does not clash with other processes."""
+        counts = {name: self._counts[name] for name in COUNTERS if self._counts[name]}
+        if not counts or not os.path.isdir(self.cache_dir):
+            return
+        with open(os.path.join(self.cache_dir, STATS_FILE), mode="a") as file:
+            file.write(json.dumps(counts) + "\n")
+        self._counts.clear()
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._counts.clear()
+
+
+def format_stats(stats):
+    lookups = stats["hits"] + stats["misses"]
+    ratio = stats["hits"] / lookups if lookups else 0.0
+    return (f"render cache: {stats['hits']} hits, {stats['misses']} misses ({ratio:.0%} hit rate), "
+            f"{stats['evictions']} evictions, {stats['entries']} entries, {stats['bytes'] / 1024:.1f} KiB")
+
+
+DEFAULT_RENDER_CACHE = RenderCache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or clear the render cache.")
+    parser.add_argument("--clear", action="store_true", help="remove all cached configs and statistics")
+    args = parser.parse_args()
+
+    if args.clear:
+        DEFAULT_RENDER_CACHE.clear()
+    print(format_stats(DEFAULT_RENDER_CACHE.stats()))
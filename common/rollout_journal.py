@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from common.connection_pool import write_memory
+
+SAVE_EVERY = 25  # blocks between two 'write mem' checkpoints
+
+
+def csv_digest(csv_file):
+    with open(csv_file, mode="rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class RolloutJournal:
+    """
+    Append-only JSONL log of a rollout: which blocks (CSV rows) are confirmed per device
+    and which devices finished. Replayed on start, so a rerun resumes every device from its
+    last confirmed checkpoint and skips finished devices. When a device's CSV changed since
+    the journal entry, its progress is discarded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.devices = {}  # key -> {"csv": digest, "confirmed": set, "finished": bool}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            good = 0
+            with open(path, mode="rb") as file:
+                for line in file:
+                    try:
+                        self._replay(json.loads(line))
+                    except ValueError:
+                        break  # a torn last line from a crash; everything before it counts
+                    good += len(line)
+            with open(path, mode="r+b") as file:
+                file.truncate(good)  # new records must not be appended to the torn line
+        self._file = open(path, mode="a")
+
+    def _replay(self, record):
+        key = record["device"]
+        if record["event"] == "start":
+            entry = self.devices.get(key)
+            if entry is None or entry["csv"] != record["csv"]:
+                self.devices[key] = {"csv": record["csv"], "confirmed": set(), "finished": False}
+        elif record["event"] == "confirmed":
+            self.devices[key]["confirmed"].update(record["labels"])
+        elif record["event"] == "finished":
+            self.devices[key]["finished"] = True
+
+    def _append(self, record):
+        record["ts"] = time.time()
+        with self._lock:
+            self._replay(record)
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def is_finished(self, key, csv_hash):
+        entry = self.devices.get(key)
+        return entry is not None and entry["finished"] and entry["csv"] == csv_hash
+
+    def checkpoint(self, key, csv_hash):
+        """Start (or resume) a device and return its DeviceCheckpoint."""
+        resumed = key in self.devices and self.devices[key]["csv"] == csv_hash
+        self._append({"device": key, "event": "start", "csv": csv_hash})
+        return DeviceCheckpoint(self, key, resumed)
+
+    def close(self):
+        with self._lock:  # not in the middle of a worker's write
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DeviceCheckpoint:
+    """Progress of one device inside a RolloutJournal."""
+
+    def __init__(self, journal, key, resumed):
+        self.journal = journal
+        self.key = key
+        self.resumed = resumed  # the device was started before with the same CSV
+
+    @property
+    def confirmed(self):
+        return self.journal.devices[self.key]["confirmed"]
+
+    def confirm(self, labels):
+        """Record blocks as confirmed; call only after they were saved on the device."""
+        labels = [label for label in labels if label not in self.confirmed]
+        if labels:
+            self.journal._append({"device": self.key, "event": "confirmed", "labels": labels})
+
+    def finish(self):
+        self.journal._append({"device": self.key, "event": "finished"})
+
+
+def push_blocks_with_checkpoints(net_connect, blocks, checkpoint, save_every=SAVE_EVERY):
+    """
+    Send labeled config blocks [(label, commands), ...] in one config session, skipping
+    the blocks the checkpoint already confirmed. Every `save_every` blocks the config is
+    saved and those blocks are confirmed, so a crash or reboot loses at most that many.
+    Returns the labels that were sent.
+    """
+    sent = []
+    pending = []
+
+    def save_and_confirm():
+        net_connect.exit_config_mode()
+        write_memory(net_connect)
+        checkpoint.confirm(pending)
+        pending.clear()
+
+    net_connect.config_mode()
+    for label, commands in blocks:
+        if label in checkpoint.confirmed:
+            continue
+        net_connect.send_config_set(commands, exit_config_mode=False)
+        sent.append(label)
+        pending.append(label)
+        if len(pending) >= save_every:
+            save_and_confirm()
+            net_connect.config_mode()
+    save_and_confirm()
+    return sent
@@ -0,0 +1,281 @@
+import re
+
+from common.vlan_ranges import VlanRangeSet
+
+INTERFACE_PREFIXES = {
+    "fa": "FastEthernet",
+    "fastethernet": "FastEthernet",
+    "gi": "GigabitEthernet",
+    "gigabitethernet": "GigabitEthernet",
+    "te": "TenGigabitEthernet",
+    "tengigabitethernet": "TenGigabitEthernet",
+    "vlan": "Vlan",
+    "vl": "Vlan",
+    "po": "Port-channel",
+    "port-channel": "Port-channel",
+    "lo": "Loopback",
+    "loopback": "Loopback",
+}
+
+# Lines IOS never shows in the running-config; they are only resent together with other changes.
+UNVERIFIABLE_LINES = ("vtp password",)
+
+# Lines that replace an earlier value instead of adding to it (matched on the leading words).
+REPLACING_KEYS = (
+    "switchport trunk allowed vlan",
+    "switchport access vlan",
+    "switchport mode",
+    "ip address",
+    "description",
+    "name",
+    "vtp mode",
+    "vtp domain",
+    "vtp password",
+)
+
+
+class RunningConfig:
+    """Structured view of a 'show running-config': interfaces, VLANs, routes and global lines."""
+
+    def __init__(self):
+        self.interfaces = {}  # canonical name -> set of normalized child lines
+        self.shutdown = set()  # canonical names of shut interfaces
+        self.vlans = {}  # vlan id -> name (None when unnamed)
+        self.routes = set()  # normalized 'ip route ...' lines
+        self.global_lines = set()  # other normalized top-level lines (vtp, hostname, ...)
+
+    def trunk_vlans(self, interface):
+        """Return the allowed VLANs of a trunk port as a VlanRangeSet (None = all VLANs)."""
+        allowed = None
+        for line in self.interfaces.get(interface, ()):
+            if line.startswith("switchport trunk allowed vlan "):
+                vlans = line[len("switchport trunk allowed vlan "):]
+                if vlans == "all":
+                    return None
+                if vlans == "none":
+                    allowed = allowed or VlanRangeSet()
+                elif vlans.startswith("add "):
+                    allowed = (allowed or VlanRangeSet()) | VlanRangeSet.parse(vlans[len("add "):])
+                else:
+                    allowed = VlanRangeSet.parse(vlans) | (allowed or VlanRangeSet())
+        return allowed
+
+
+def normalize_line(line):
+    """Normalize a config line so CSV output and running-config output compare equal."""
+    line = " ".join(line.split())
+    if line.startswith("desc "):
+        line = "description " + line[len("desc "):]
+    if line in ("no shut", "no shutdown"):
+        return "no shutdown"
+    if line == "shut":
+        return "shutdown"
+    return line
+
+
+def line_key(line):
+    """Return the part of a line that identifies which setting it changes."""
+    for key in REPLACING_KEYS:
+        if line == key or line.startswith(key + " "):
+            return key
+    return line
+
+
+def canonical_interface(name):
+    """Turn 'gi0/0', 'FastEthernet 0/1' or 'vlan1982' into the running-config spelling."""
+    name = name.replace(" ", "")
+    match = re.match(r"([A-Za-z-]+)(.*)", name)
+    if not match:
+        return name
+    prefix, number = match.groups()
+    return INTERFACE_PREFIXES.get(prefix.lower(), prefix) + number
+
+
+SHORT_PREFIXES = {
+    "FastEthernet": "Fa",
+    "GigabitEthernet": "Gi",
+    "TenGigabitEthernet": "Te",
+    "Port-channel": "Po",
+}
+
+
+def short_interface(name):
+    """Turn 'FastEthernet0/1' into the 'Fa0/1' spelling of show vlan / show interfaces switchport."""
+    match = re.match(r"([A-Za-z-]+)(.*)", name)
+    if not match:
+        return name
+    prefix, number = match.groups()
+    return SHORT_PREFIXES.get(prefix, prefix) + number
+
+
+def expand_interface_range(range_spec):
+    """Expand 'FastEthernet 0/1-9, FastEthernet 0/12' into canonical interface names."""
+    members = []
+    prefix = ""
+    for part in range_spec.split(","):
+        part = canonical_interface(part.strip())
+        match = re.match(r"([A-Za-z-]*)((?:\d+/)*)(\d+)(?:-(\d+))?$", part)
+        if not match:
+            members.append(part)
+            continue
+        kind, slot, start, end = match.groups()
+        prefix = kind or prefix
+        for port in range(int(start), int(end or start) + 1):
+            members.append(f"{prefix}{slot}{port}")
+    return members
+
+
+def parse_running_config(text):
+    """Parse 'show running-config' output into a RunningConfig."""
+    config = RunningConfig()
+    section = None
+    for raw_line in text.splitlines():
+        if not raw_line.strip() or raw_line.startswith("!"):
+            section = None
+            continue
+        if raw_line[0] == " ":
+            line = normalize_line(raw_line)
+            if section is None:
+                continue
+            kind, key = section
+            if kind == "interface":
+                if line == "shutdown":
+                    config.shutdown.add(key)
+                config.interfaces[key].add(line)
+            elif kind == "vlan" and line.startswith("name "):
+                for vlan_id in key:
+                    config.vlans[vlan_id] = line[len("name "):]
+            continue
+
+        line = normalize_line(raw_line)
+        if line.startswith("interface "):
+            name = canonical_interface(line[len("interface "):])
+            config.interfaces.setdefault(name, set())
+            section = ("interface", name)
+        elif re.match(r"vlan [\d,-]+$", line):
+            vlan_ids = list(VlanRangeSet.parse(line[len("vlan "):]))
+            for vlan_id in vlan_ids:
+                config.vlans.setdefault(vlan_id, None)
+            section = ("vlan", vlan_ids)
+        elif line.startswith("ip route "):
+            config.routes.add(line)
+            section = None
+        else:
+            config.global_lines.add(line)
+            section = None
+    return config
+
+
+def split_sections(commands):
+    """
+    Split a flat command list ('vlan 10', 'name X', 'interface ...', ...) into
+    (header, lines) blocks; lines before the first section header get header None.
+    """
+    blocks = []
+    header, lines = None, []
+    for command in commands:
+        command = command.strip()
+        if command in ("conf t", "configure terminal", "end", "!"):
+            continue
+        if command.startswith("interface ") or re.match(r"vlan [\d,-]+$", command):
+            if header or lines:
+                blocks.append((header, lines))
+            header, lines = command, []
+        elif header and command.startswith("ip route "):
+            blocks.append((header, lines))
+            header, lines = None, [command]
+        else:
+            lines.append(command)
+    if header or lines:
+        blocks.append((header, lines))
+    return blocks
+
+
+def merge_labeled_blocks(blocks):
+    """
+    merge_blocks for (label, header, lines) blocks, where the label says where a block came
+    from (e.g. the CSV row). Returns (header, header_label, [(label, line), ...]); every line
+    keeps the label of the block that set its final value.
+    """
+    merged = {}
+    for label, header, lines in blocks:
+        header = normalize_line(header) if header else None
+        header_label, section = merged.setdefault(header, (label, {}))
+        for line in lines:
+            line = normalize_line(line)
+            key = line_key(line)
+            section.pop(key, None)
+            section[key] = (label, line)
+    return [(header, header_label, list(section.values())) for header, (header_label, section) in merged.items()]
+
+
+def merge_blocks(blocks):
+    """
+    Merge (header, lines) blocks that target the same section, keeping the last value of
+    settings that replace each other so the result matches what the device ends up with.
+    """
+    return [(header, [line for _, line in lines])
+            for header, _, lines in merge_labeled_blocks((None, header, lines) for header, lines in blocks)]
+
+
+def _interface_has_line(config, interface, line):
+    """Check whether one interface in the running-config already has a line."""
+    if line == "no shutdown":
+        return interface in config.interfaces and interface not in config.shutdown
+    if line.startswith("switchport trunk allowed vlan "):
+        allowed = config.trunk_vlans(interface)
+        return allowed is not None and allowed == VlanRangeSet.parse(line.split()[-1])
+    return line in config.interfaces.get(interface, ())
+
+
+def _missing_lines(config, header, lines):
+    """Return the lines of one intent block that the running-config does not have yet."""
+    if header is None:
+        verifiable = [line for line in lines if not line.startswith(UNVERIFIABLE_LINES)]
+        missing = [line for line in verifiable
+                   if line not in config.routes and line not in config.global_lines]
+        if missing:
+            missing += [line for line in lines if line.startswith(UNVERIFIABLE_LINES)]
+        return missing
+
+    if header.startswith("vlan "):
+        vlan_ids = VlanRangeSet.parse(header[len("vlan "):])
+        missing = []
+        for line in lines:
+            name = line[len("name "):] if line.startswith("name ") else None
+            if any(vlan_id not in config.vlans or (name and config.vlans[vlan_id] != name)
+                   for vlan_id in vlan_ids):
+                missing.append(line)
+        if not lines and any(vlan_id not in config.vlans for vlan_id in vlan_ids):
+            missing.append(None)  # the VLAN itself is missing
+        return missing
+
+    if header.startswith("interface range "):
+        members = expand_interface_range(header[len("interface range "):])
+    elif header.startswith("interface "):
+        members = [canonical_interface(header[len("interface "):])]
+    else:
+        return list(lines)
+    return [line for line in lines
+            if not all(_interface_has_line(config, member, line) for member in members)]
+
+
+def diff_config(blocks, config):
+    """
+    Compare intent blocks [(header, lines), ...] with a parsed running-config and return
+    only the config-mode commands that are missing or changed (empty when converged).
+    """
+    commands = []
+    for header, lines in merge_blocks(blocks):
+        missing = _missing_lines(config, header, lines)
+        if not missing:
+            continue
+        if header:
+            commands.append(header)
+        commands += [line for line in missing if line is not None]
+    return commands
+
+
+def fetch_running_config(net_connect):
+    """Pull the running-config once and parse it."""
+    return parse_running_config(net_connect.send_command("show running-config"))
@@ -0,0 +1,120 @@
+import sys
+
+CHUNK_SIZE = 256 * 1024  # characters buffered per output file before one write() call
+
+
+class ChunkedWriter:
+    """
+    Collects configuration lines and writes them to the file in large chunks instead of
+    one write() per line. Memory stays bounded by `chunk_size` per open file.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.lines = 0
+        self._buffer = []
+        self._size = 0
+
+    def write_line(self, line):
+        self._buffer.append(line)
+        self._size += len(line) + 1
+        self.lines += 1
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def write_lines(self, lines):
+        for line in lines:
+            self.write_line(line)
+
+    def flush(self):
+        if self._buffer:
+            self.file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+            self._size = 0
+
+
+def write_lines(path, lines, chunk_size=CHUNK_SIZE):
+    """Stream an iterable of lines to `path` in chunks and return the number of lines written."""
+    with open(path, mode="w") as file:
+        writer = ChunkedWriter(file, chunk_size)
+        writer.write_lines(lines)
+        writer.flush()
+    return writer.lines
+
+
+class DeviceWriters:
+    """
+    One ChunkedWriter per device, so a single pass over a site-wide CSV can fan its rows
+    out to one config file per device. A file is opened on the first line for its device;
+    `header(device)` and `footer(device)` return the lines written first and last.
+    """
+
+    def __init__(self, path_for, header=None, footer=None, chunk_size=CHUNK_SIZE):
+        self.path_for = path_for
+        self.header = header
+        self.footer = footer
+        self.chunk_size = chunk_size
+        self._writers = {}
+
+    def writer(self, device):
+        writer = self._writers.get(device)
+        if writer is None:
+            file = open(self.path_for(device), mode="w")
+            writer = self._writers[device] = ChunkedWriter(file, self.chunk_size)
+            if self.header:
+                writer.write_lines(self.header(device))
+        return writer
+
+    def close(self):
+        """Write the footers, flush and close every file; return {device: path}."""
+        paths = {}
+        for device, writer in self._writers.items():
+            if self.footer:
+                writer.write_lines(self.footer(device))
+            writer.flush()
+            writer.file.close()
+            paths[device] = writer.file.name
+        self._writers = {}
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _peak_working_set_kb():
+    """Peak working set of this process on Windows (GetProcessMemoryInfo), in KiB."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize // 1024
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (None where it cannot be measured)."""
+    try:
+        import resource
+    except ImportError:
+        if sys.platform != "win32":
+            return None
+        try:
+            return _peak_working_set_kb()
+        except (OSError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
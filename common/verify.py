@@ -0,0 +1,260 @@
+import argparse
+import ipaddress
+import re
+
+from common.connection_pool import DEFAULT_PASSWORD, DEFAULT_POOL, DEFAULT_USERNAME, cisco_device
+from common.paths import add_exercise_paths
+from common.running_config import canonical_interface, expand_interface_range
+from common.vlan_ranges import VlanRangeSet
+
+add_exercise_paths()
+
+SWITCH_SHOW_COMMANDS = ("show vlan brief", "show interfaces switchport", "show ip interface brief")
+ROUTER_SHOW_COMMANDS = ("show ip interface brief", "show ip route static")
+# start of the VLAN, Name, Status and Ports columns of 'show vlan brief' (IOS default layout)
+VLAN_BRIEF_COLUMNS = (0, 5, 38, 48)
+VLAN_NAME_WIDTH = 32  # 'show vlan brief' cuts longer names off
+
+
+def parse_vlan_brief(text):
+    """
+    'show vlan brief' -> {vlan_id: {"name": ..., "status": ..., "ports": set of canonical names}}.
+    The table has fixed-width columns (taken from the '---- ----' line under the header), so
+    names with spaces are read as a whole instead of being split on whitespace.
+    """
+    vlans = {}
+    current = None
+    _, name_start, status_start, ports_start = VLAN_BRIEF_COLUMNS
+    for line in text.splitlines():
+        if line.startswith("----"):
+            starts = [match.start() for match in re.finditer(r"-+", line)]
+            if len(starts) == 4:
+                _, name_start, status_start, ports_start = starts
+            continue
+        vlan_id = line[:name_start].strip()
+        if vlan_id.isdigit():
+            name = line[name_start:status_start].strip()
+            status = line[status_start:ports_start].strip()
+            current = vlans[int(vlan_id)] = {"name": name, "status": status, "ports": set()}
+        elif current is None or not line.strip() or line[:ports_start].strip():
+            current = None
+            continue
+        ports = line[ports_start:]
+        current["ports"].update(canonical_interface(port) for port in ports.split(",") if port.strip())
+    return vlans
+
+
+def parse_interfaces_switchport(text):
+    """
+    'show interfaces switchport' -> {interface: {"mode": ..., "access_vlan": int,
+    "trunk_vlans": VlanRangeSet or None (= ALL)}}.
+    """
+    interfaces = {}
+    current = None
+    trunk_lists = {}  # interface -> raw 'Trunking VLANs Enabled' text
+    wrapping = False
+    for line in text.splitlines():
+        if wrapping and line.startswith(" ") and line.strip():
+            trunk_lists[current["name"]] += line.strip()  # the VLAN list wraps onto indented lines
+            continue
+        wrapping = False
+        key, _, value = line.partition(":")
+        value = value.strip()
+        if key == "Name":
+            name = canonical_interface(value)
+            current = interfaces[name] = {"name": name, "mode": None, "access_vlan": None, "trunk_vlans": None}
+        elif current is None:
+            continue
+        elif key == "Administrative Mode":
+            current["mode"] = value
+        elif key == "Access Mode VLAN" and value.split()[0].isdigit():
+            current["access_vlan"] = int(value.split()[0])
+        elif key == "Trunking VLANs Enabled":
+            trunk_lists[current["name"]] = value
+            wrapping = True
+    for name, vlans in trunk_lists.items():
+        interfaces[name]["trunk_vlans"] = None if vlans.upper() == "ALL" else VlanRangeSet.parse(vlans)
+    return interfaces
+
+
+def parse_ip_interface_brief(text):
+    """'show ip interface brief' -> {interface: {"ip": ..., "method": ..., "status": ..., "protocol": ...}}."""
+    interfaces = {}
+    for line in text.splitlines():
+        match = re.match(r"(\S+)\s+(\S+)\s+(YES|NO)\s+(\S+)\s+(administratively down|\S+)\s+(\S+)\s*$", line)
+        if match:
+            name, ip, _, method, status, protocol = match.groups()
+            interfaces[canonical_interface(name)] = {"ip": ip, "method": method, "status": status,
+                                                     "protocol": protocol}
+    return interfaces
+
+
+def parse_ip_route_static(text):
+    """
+    'show ip route static' -> {IPv4Network: set of next hops}. Handles both '10.1.0.0/24'
+    entries and the bare networks IOS lists under an 'x.x.x.x/len is subnetted' line.
+    """
+    routes = {}
+    subnet_len = None
+    for line in text.splitlines():
+        header = re.match(r"\s+\S+/(\d+) is (?:variably )?subnetted", line)
+        if header:
+            subnet_len = int(header.group(1))
+            continue
+        match = re.match(r"S\*?\s+(\d+\.\d+\.\d+\.\d+)(?:/(\d+))?\s+\[\d+/\d+\]\s+via\s+(\d+\.\d+\.\d+\.\d+)", line)
+        if not match:
+            continue
+        network, prefixlen, gateway = match.groups()
+        prefixlen = prefixlen or subnet_len or 32
+        routes.setdefault(ipaddress.IPv4Network(f"{network}/{prefixlen}", strict=False), set()).add(gateway)
+    return routes
+
+
+PARSERS = {
+    "show vlan brief": ("vlans", parse_vlan_brief),
+    "show interfaces switchport": ("switchports", parse_interfaces_switchport),
+    "show ip interface brief": ("ip_interfaces", parse_ip_interface_brief),
+    "show ip route static": ("routes", parse_ip_route_static),
+}
+
+
+class DeviceState:
+    """The show outputs of one device, parsed into dicts keyed by VLAN id, interface or network."""
+
+    def __init__(self):
+        self.vlans = {}
+        self.switchports = {}
+        self.ip_interfaces = {}
+        self.routes = {}
+
+
+def collect_state(net_connect, commands):
+    """Run all show commands over one (already open) session and parse them."""
+    state = DeviceState()
+    for command in commands:
+        attribute, parse = PARSERS[command]
+        setattr(state, attribute, parse(net_connect.send_command(command)))
+    return state
+
+
+def _failure(failures, row_num, check, expected, actual):
+    failures.append({"row": row_num, "check": check, "expected": expected, "actual": actual})
+
+
+def _check_vlan(failures, row, state):
+    vlan = state.vlans.get(row.vlan_id)
+    if vlan is None:
+        _failure(failures, row.row_num, f"vlan {row.vlan_id}", row.description, "missing")
+    elif vlan["name"] != row.description[:VLAN_NAME_WIDTH]:
+        _failure(failures, row.row_num, f"vlan {row.vlan_id} name", row.description, vlan["name"])
+
+
+def _check_up(failures, row_num, interface, state):
+    entry = state.ip_interfaces.get(interface)
+    if entry is not None and entry["status"] == "administratively down":
+        _failure(failures, row_num, f"{interface} status", "up", entry["status"])
+
+
+def check_switch_rows(rows, state, port_prefix):
+    """Check every compiled SwitchRow against the indexed device state; returns the failures."""
+    failures = []
+    for row in rows:
+        if row.kind != "trunk":
+            _check_vlan(failures, row, state)
+        if row.kind == "svi":
+            svi = f"Vlan{row.vlan_id}"
+            entry = state.ip_interfaces.get(svi)
+            if entry is None or entry["ip"] != row.ip_address:
+                _failure(failures, row.row_num, f"{svi} ip", row.ip_address, entry and entry["ip"])
+            _check_up(failures, row.row_num, svi, state)
+        if not row.ports:
+            continue
+        for port in expand_interface_range(port_prefix.format(switch=row.switch or "1") + row.ports):
+            switchport = state.switchports.get(port)
+            if switchport is None:
+                _failure(failures, row.row_num, f"{port}", "switchport", "missing")
+            elif row.kind == "trunk":
+                if switchport["mode"] != "trunk":
+                    _failure(failures, row.row_num, f"{port} mode", "trunk", switchport["mode"])
+                allowed = switchport["trunk_vlans"]
+                if allowed is not None and (allowed & row.vlans) != row.vlans:
+                    _failure(failures, row.row_num, f"{port} trunk vlans", str(row.vlans), str(allowed))
+            else:
+                if switchport["mode"] != "static access":
+                    _failure(failures, row.row_num, f"{port} mode", "static access", switchport["mode"])
+                if switchport["access_vlan"] != row.vlan_id:
+                    _failure(failures, row.row_num, f"{port} access vlan", row.vlan_id, switchport["access_vlan"])
+            _check_up(failures, row.row_num, port, state)
+    return failures
+
+
+def check_router(intent, state):
+    """Check the interfaces and routes of a RouterIntent against the indexed device state."""
+    failures = []
+    interfaces = {canonical_interface(interface.name): interface for interface in intent.interfaces}
+    for name, interface in interfaces.items():
+        entry = state.ip_interfaces.get(name)
+        if entry is None:
+            _failure(failures, None, name, "present", "missing")
+            continue
+        if interface.ip_address.lower() == "dhcp":
+            if entry["method"] != "DHCP":
+                _failure(failures, None, f"{name} method", "DHCP", entry["method"])
+        elif interface.ip_address and entry["ip"] != interface.ip_address:
+            _failure(failures, None, f"{name} ip", interface.ip_address, entry["ip"])
+        _check_up(failures, None, name, state)
+
+    expected = list(intent.static_routes)
+    if intent.wan_gateway:
+        expected.append(("0.0.0.0", "0.0.0.0", intent.wan_gateway))
+    for network, mask, gateway in expected:
+        prefix = ipaddress.IPv4Network(f"{network}/{mask}", strict=False)
+        if gateway not in state.routes.get(prefix, ()):
+            _failure(failures, None, f"route {prefix}", gateway, sorted(state.routes.get(prefix, ())) or "missing")
+    return failures
+
+
+def verify_switch(csv_file, switch_ip, pool=DEFAULT_POOL, port_prefix=None, username=DEFAULT_USERNAME,
+                  password=DEFAULT_PASSWORD, connect_options=None):
+    """Verify a layer 2 or layer 3 switch CSV against the switch with one batch of show commands."""
+    from switch_intent import PORT_PREFIX, compile_switch_csv
+    intent = compile_switch_csv(csv_file)
+    with pool.session(cisco_device(switch_ip, username, password, **(connect_options or {}))) as net_connect:
+        state = collect_state(net_connect, SWITCH_SHOW_COMMANDS)
+    return check_switch_rows(intent.rows, state, port_prefix or PORT_PREFIX)
+
+
+def verify_router(csv_file, router_ip, username, password, pool=DEFAULT_POOL, connect_options=None):
+    """Verify a router CSV against the router with one batch of show commands."""
+    from router_intent import compile_router_csv
+    intent = compile_router_csv(csv_file)
+    with pool.session(cisco_device(router_ip, username, password, **(connect_options or {}))) as net_connect:
+        state = collect_state(net_connect, ROUTER_SHOW_COMMANDS)
+    return check_router(intent, state)
+
+
+def print_failures(host, failures):
+    if not failures:
+        print(f"{host}: verified, device matches the CSV.")
+        return
+    print(f"{host}: {len(failures)} mismatches")
+    for failure in failures:
+        row = f"row {failure['row']}" if failure["row"] else "csv"
+        print(f"  {row:<8} {failure['check']:<32} expected {failure['expected']!s:<18} got {failure['actual']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify a device against its CSV with bulk show commands.")
+    parser.add_argument("kind", choices=("layer2", "layer3", "router"))
+    parser.add_argument("csv", help="CSV file the device was configured from")
+    parser.add_argument("host", help="management IP of the device")
+    parser.add_argument("--username", default=DEFAULT_USERNAME)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    args = parser.parse_args()
+
+    if args.kind == "router":
+        result = verify_router(args.csv, args.host, args.username, args.password)
+    else:
+        result = verify_switch(args.csv, args.host, username=args.username, password=args.password)
+    print_failures(args.host, result)
+    raise SystemExit(1 if result else 0)
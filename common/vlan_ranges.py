@@ -0,0 +1,114 @@
+class VlanRangeSet:
+    """
+    Set of VLAN IDs stored as sorted, non-overlapping (start, end) intervals.
+    '1-4094' is one interval instead of 4094 strings, and str() gives the
+    shortest IOS syntax ('300-400,500').
+    """
+    __slots__ = ("_intervals",)
+
+    def __init__(self, intervals=()):
+        self._intervals = self._normalize(intervals)
+
+    @staticmethod
+    def _normalize(intervals):
+        """Sort the intervals and merge the ones that overlap or touch."""
+        merged = []
+        for start, end in sorted(intervals):
+            if start > end:
+                raise ValueError(f"Invalid VLAN range {start}-{end}")
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return tuple(merged)
+
+    @classmethod
+    def parse(cls, text):
+        """Parse IOS/CSV syntax such as '300-400', '10' or '1,10-12,20'."""
+        intervals = []
+        for part in text.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, sep, end = part.partition("-")
+            if not start.strip().isdigit() or (sep and not end.strip().isdigit()):
+                raise ValueError(f"Invalid VLAN range '{text}'")
+            intervals.append((int(start), int(end or start)))
+        return cls(intervals)
+
+    @property
+    def intervals(self):
+        return self._intervals
+
+    def first(self):
+        """Lowest VLAN ID in the set."""
+        return self._intervals[0][0]
+
+    def last(self):
+        """Highest VLAN ID in the set."""
+        return self._intervals[-1][1]
+
+    def union(self, other):
+        return VlanRangeSet(self._intervals + other._intervals)
+
+    def intersection(self, other):
+        result = []
+        i = j = 0
+        while i < len(self._intervals) and j < len(other._intervals):
+            start = max(self._intervals[i][0], other._intervals[j][0])
+            end = min(self._intervals[i][1], other._intervals[j][1])
+            if start <= end:
+                result.append((start, end))
+            if self._intervals[i][1] < other._intervals[j][1]:
+                i += 1
+            else:
+                j += 1
+        return VlanRangeSet(result)
+
+    __or__ = union
+    __and__ = intersection
+
+    def __contains__(self, vlan_id):
+        vlan_id = int(vlan_id)
+        low, high = 0, len(self._intervals)
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self._intervals[middle]
+            if vlan_id < start:
+                high = middle
+            elif vlan_id > end:
+                low = middle + 1
+            else:
+                return True
+        return False
+
+    def __iter__(self):
+        for start, end in self._intervals:
+            yield from range(start, end + 1)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self._intervals)
+
+    def __bool__(self):
+        return bool(self._intervals)
+
+    def __eq__(self, other):
+        return isinstance(other, VlanRangeSet) and self._intervals == other._intervals
+
+    def __hash__(self):
+        return hash(self._intervals)
+
+    def __str__(self):
+        parts = []
+        for start, end in self._intervals:
+            if start == end:
+                parts.append(str(start))
+            elif end == start + 1:
+                parts.append(f"{start},{end}")
+            else:
+                parts.append(f"{start}-{end}")
+        return ",".join(parts)
+
+    def __repr__(self):
+        return f"VlanRangeSet('{self}')"
@@ -0,0 +1,47 @@
+import threading
+
+from common.connection_pool import ConnectionPool, cisco_device
+from common.mock_ios import MockFleet
+
+
+def test_close_host_while_connecting_closes_the_new_connection():
+    fleet = MockFleet()
+    connecting = threading.Event()
+    closed = threading.Event()
+
+    def slow_connect(**device):
+        connecting.set()
+        closed.wait(5)
+        return fleet(**device)
+
+    pool = ConnectionPool(connect=slow_connect, recorder=None)
+    errors = []
+
+    def borrow():
+        try:
+            with pool.session(cisco_device("10.0.0.1")):
+                pass
+        except ConnectionError as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=borrow)
+    worker.start()
+    assert connecting.wait(5)
+    pool.close_host("10.0.0.1", force=True)
+    closed.set()
+    worker.join(5)
+
+    assert len(errors) == 1
+    assert [connection.connected for connection in fleet.connections] == [False]
+    assert pool.opened == 0
+
+
+def test_sessions_are_reused_per_host():
+    fleet = MockFleet()
+    pool = ConnectionPool(connect=fleet, recorder=None)
+    for _ in range(3):
+        with pool.session(cisco_device("10.0.0.1")) as connection:
+            connection.send_command("show vlan brief")
+    assert (pool.opened, pool.reused) == (1, 2)
+    pool.close_all()
+    assert not fleet.connections[0].connected
@@ -0,0 +1,44 @@
+import pytest
+
+from common.fast_apply import ConfigApplyError, send_config_chunked
+from common.mock_ios import INVALID_INPUT, MockFleet
+
+COMMANDS = [
+    (2, "vlan 10"),
+    (2, "name Staff"),
+    (3, "interface FastEthernet0/1"),
+    (3, "switchport access vlan 10"),
+    (4, "interface FastEthernet0/2"),
+    (4, "bogus command"),
+    (5, "interface FastEthernet0/3"),
+    (5, "description never sent"),
+]
+
+
+def test_error_is_attributed_to_its_row():
+    connection = MockFleet()(host="10.0.0.1")
+    with pytest.raises(ConfigApplyError) as excinfo:
+        send_config_chunked(connection, COMMANDS, chunk_lines=2)
+    assert excinfo.value.errors == [(4, "bogus command", INVALID_INPUT)]
+    # the chunk with the error finished, the chunks after it were not sent
+    assert connection.device.interface("FastEthernet0/1")["switchport access vlan"] == "switchport access vlan 10"
+    assert "FastEthernet0/3" not in connection.device.interfaces
+    assert connection.mode == "exec"
+
+
+def test_all_errors_are_collected_without_stop_on_error():
+    connection = MockFleet()(host="10.0.0.1")
+    commands = COMMANDS + [(6, "vlan 20"), (6, "shutdown now")]
+    with pytest.raises(ConfigApplyError) as excinfo:
+        send_config_chunked(connection, commands, chunk_lines=3, stop_on_error=False)
+    assert [(label, command) for label, command, _ in excinfo.value.errors] == [(4, "bogus command"),
+                                                                                (6, "shutdown now")]
+    assert connection.device.interface("FastEthernet0/3")["description"] == "description never sent"
+
+
+def test_clean_apply_sends_every_line_once():
+    connection = MockFleet()(host="10.0.0.1")
+    commands = [(row, command) for row, command in COMMANDS if command != "bogus command"]
+    send_config_chunked(connection, commands, chunk_lines=64)
+    assert connection.device.vlans[10] == "Staff"
+    assert connection.commands_sent == len(commands)
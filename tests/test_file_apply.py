@@ -0,0 +1,60 @@
+import pytest
+
+from common.fast_apply import ConfigApplyError
+from common.file_apply import FileTransferError, apply_config_file
+from common.mock_ios import INVALID_INPUT, MockFleet, flash_transfer
+
+RENDERED = """conf t
+! Generated from CSV
+vlan 10
+ name Staff
+interface FastEthernet0/1
+ switchport access vlan 10
+end
+"""
+
+
+@pytest.fixture
+def connection():
+    return MockFleet()(host="10.0.0.1")
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "switch_config.txt"
+    path.write_text(RENDERED)
+    return str(path)
+
+
+def test_file_is_verified_merged_and_deleted(connection, config_file):
+    count = apply_config_file(connection, config_file, "switch_config.txt", flash_transfer)
+    assert count == 6  # 'conf t' and the first 'end' dropped, one closing 'end' added
+    assert connection.device.vlans[10] == "Staff"
+    assert connection.device.interface("FastEthernet0/1")["switchport access vlan"] == "switchport access vlan 10"
+    assert connection.device.flash == {}
+
+
+def test_keep_file_leaves_the_sanitized_copy_on_flash(connection, config_file):
+    apply_config_file(connection, config_file, "switch_config.txt", flash_transfer, keep_file=True)
+    data = connection.device.flash["flash:switch_config.txt"].decode()
+    assert data.splitlines()[0] == "! Generated from CSV" and data.endswith("end\n")
+
+
+def test_md5_mismatch_is_not_merged(connection, config_file):
+    def corrupting_transfer(net_connect, source_file, dest_file, file_system):
+        flash_transfer(net_connect, source_file, dest_file, file_system)
+        net_connect.device.flash[f"{file_system}{dest_file}"] += b"garbage\n"
+
+    with pytest.raises(FileTransferError):
+        apply_config_file(connection, config_file, "switch_config.txt", corrupting_transfer)
+    assert 10 not in connection.device.vlans
+    assert connection.device.flash == {}
+
+
+def test_rejected_lines_raise_after_the_merge(connection, tmp_path):
+    path = tmp_path / "bad_config.txt"
+    path.write_text("vlan 20\ninterface FastEthernet0/2\n bogus command\n")
+    with pytest.raises(ConfigApplyError) as excinfo:
+        apply_config_file(connection, str(path), "bad_config.txt", flash_transfer)
+    assert excinfo.value.errors == [("flash:bad_config.txt", "bogus command", INVALID_INPUT)]
+    assert 20 in connection.device.vlans
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from common.preflight import preflight
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "preflight")
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def reported(table):
+    """(file name, row, check) of every problem, without the message."""
+    return [(os.path.basename(path), row_num, check) for path, row_num, check, _ in table.problems]
+
+
+@pytest.mark.parametrize("name, row_num, check", [
+    ("overlap.csv", 2, "subnet overlap"),
+    ("port_conflict.csv", 2, "port conflict"),
+    ("duplicate_ip.csv", 2, "duplicate ip"),
+    ("gateway.csv", 1, "gateway"),
+])
+def test_one_known_problem_per_fixture(name, row_num, check):
+    assert reported(preflight([fixture(name)])) == [(name, row_num, check)]
+
+
+def test_clean_fleet_has_no_problems():
+    assert preflight([fixture("clean_switch.csv"), fixture("clean_router.csv")]).problems == []
+
+
+def test_duplicate_ip_across_files_names_the_other_file():
+    table = preflight([fixture("clean_switch.csv"), fixture("overlap.csv")])
+    assert reported(table) == [("overlap.csv", 1, "duplicate ip"), ("overlap.csv", 2, "subnet overlap")]
+    assert "clean_switch.csv row 1" in table.problems[0][3]
+
+
+def test_same_file_is_loaded_once():
+    assert len(preflight([fixture("port_conflict.csv"), fixture("port_conflict.csv")]).problems) == 1
@@ -0,0 +1,80 @@
+from common.running_config import diff_config, parse_running_config
+from common.vlan_ranges import VlanRangeSet
+
+RUNNING_CONFIG = """
+Building configuration...
+!
+hostname Switch
+!
+vtp mode transparent
+!
+vlan 10
+ name Staff
+!
+vlan 20
+!
+interface FastEthernet0/1
+ description Uplink
+ switchport mode trunk
+ switchport trunk allowed vlan 10,20
+!
+interface FastEthernet0/2
+ switchport access vlan 10
+ shutdown
+!
+interface Vlan10
+ ip address 10.0.10.1 255.255.255.0
+!
+ip route 0.0.0.0 0.0.0.0 10.0.0.254
+!
+end
+"""
+
+BLOCKS = [
+    (None, ["vtp mode transparent", "vtp password secret"]),
+    ("vlan 10", ["name Staff"]),
+    ("vlan 20", []),
+    ("interface fa0/1", ["desc Uplink", "switchport mode trunk", "switchport trunk allowed vlan 10,20"]),
+    ("interface Vlan10", ["ip address 10.0.10.1 255.255.255.0", "no shut"]),
+    (None, ["ip route 0.0.0.0 0.0.0.0 10.0.0.254"]),
+]
+
+
+def test_converged_config_sends_nothing():
+    assert diff_config(BLOCKS, parse_running_config(RUNNING_CONFIG)) == []
+
+
+def test_partly_converged_config_sends_only_the_changes():
+    blocks = BLOCKS + [
+        ("vlan 10", ["name Office"]),  # renamed: the later value wins
+        ("vlan 30", []),
+        ("interface range FastEthernet 0/2-3", ["switchport access vlan 10", "no shutdown"]),
+        (None, ["ip route 10.1.0.0 255.255.0.0 10.0.0.253"]),
+    ]
+    assert diff_config(blocks, parse_running_config(RUNNING_CONFIG)) == [
+        # global lines are merged into one block; the hidden vtp password is resent with a change
+        "ip route 10.1.0.0 255.255.0.0 10.0.0.253", "vtp password secret",
+        "vlan 10", "name Office",
+        "vlan 30",
+        # Fa0/2 has the access VLAN but is shut, Fa0/3 has neither
+        "interface range FastEthernet 0/2-3", "switchport access vlan 10", "no shutdown",
+    ]
+
+
+def test_trunk_vlans_follows_add_and_none():
+    config = parse_running_config("""
+interface FastEthernet0/1
+ switchport trunk allowed vlan 10,20
+ switchport trunk allowed vlan add 30-40
+interface FastEthernet0/2
+ switchport trunk allowed vlan none
+interface FastEthernet0/3
+ switchport trunk allowed vlan none
+ switchport trunk allowed vlan add 5
+interface FastEthernet0/4
+ switchport mode trunk
+""")
+    assert str(config.trunk_vlans("FastEthernet0/1")) == "10,20,30-40"
+    assert config.trunk_vlans("FastEthernet0/2") == VlanRangeSet()
+    assert str(config.trunk_vlans("FastEthernet0/3")) == "5"
+    assert config.trunk_vlans("FastEthernet0/4") is None  # no allowed list: all VLANs
@@ -0,0 +1,22 @@
+import asyncio
+
+from fake_shelly import FakeShelly, stop_all
+from shelly_client import PLUG_SETTINGS, provision_many
+
+
+def test_provision_many_uses_a_private_executor():
+    fakes = [FakeShelly().start() for _ in range(3)]
+
+    async def provision():
+        loop = asyncio.get_running_loop()
+        default_executor = loop._default_executor
+        outcome = await provision_many([fake.url for fake in fakes], PLUG_SETTINGS, concurrency=2)
+        assert loop._default_executor is default_executor
+        return outcome
+
+    try:
+        results, report = asyncio.run(provision())
+    finally:
+        stop_all(fakes)
+    assert set(results.values()) == {"ok"}
+    assert report["plugs"] == 3 and report["calls"] == 6
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from fake_shelly import FakeShelly, stop_all
+from status_poller import (BASE_INTERVAL, IDLE_FACTOR, MAX_INTERVAL, MIN_INTERVAL, POWER_CHANGE, StatusPoller,
+                           next_interval, parse_status)
+from timeseries_store import TimeSeriesStore
+
+
+@pytest.mark.parametrize("interval, previous, sample, expected", [
+    (BASE_INTERVAL, None, (10.0, True, 1), MIN_INTERVAL),  # first sample
+    (BASE_INTERVAL, (10.0, True, 1), (10.0, False, 2), MIN_INTERVAL),  # relay flipped
+    (BASE_INTERVAL, (10.0, True, 1), (10.0 + POWER_CHANGE, True, 2), MIN_INTERVAL),
+    (BASE_INTERVAL, (10.0, True, 1), (10.0 + POWER_CHANGE / 2, True, 2), BASE_INTERVAL * IDLE_FACTOR),
+    (MAX_INTERVAL, (10.0, True, 1), (10.0, True, 2), MAX_INTERVAL),  # idle, capped
+    (BASE_INTERVAL, (10.0, True, 1), None, BASE_INTERVAL * 2),  # unreachable backs off
+    (MAX_INTERVAL, None, None, MAX_INTERVAL),
+])
+def test_next_interval(interval, previous, sample, expected):
+    assert next_interval(interval, previous, sample) == expected
+
+
+def test_parse_status_without_meters():
+    assert parse_status({"uptime": 7}) == (0.0, False, 7)
+
+
+def test_poller_stores_the_fake_plugs_status(tmp_path):
+    fakes = [FakeShelly().start() for _ in range(2)]
+    fakes[0].set_meter(123.4, True)
+    try:
+        with TimeSeriesStore(str(tmp_path)) as store:
+            poller = StatusPoller([fake.url for fake in fakes], store)
+            report = asyncio.run(poller.run(BASE_INTERVAL + 1))
+            samples = store.samples(poller.clients[0].host, 0, 2 ** 31)
+    finally:
+        stop_all(fakes)
+    assert report["failures"] == 0
+    assert report["polls"] >= 2
+    assert samples and {(power, on) for _, power, on, _ in samples} == {(123.4, True)}
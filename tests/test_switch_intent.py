@@ -0,0 +1,29 @@
+import io
+
+from switch_intent import compile_switch_csv_text
+from test2 import render_layer3_switch_config, stream_layer3_switch_config
+
+CSV = """Vlan;Description;IP Address;Netmask;Switch;Ports
+10;Staff;10.0.10.1;255.255.255.0;1;1-4
+99;Uplink trunk;;;1;24
+20;Cameras;;;1;5-8
+200-210;Uplink trunk;;;1;24
+30;Printers;10.0.30.1;255.255.255.0;1;9
+"""
+
+
+def test_trunk_rows_are_merged_and_moved_last():
+    rows = compile_switch_csv_text(CSV).rows
+    assert [row.row_num for row in rows] == [1, 3, 5, 2]
+    assert str(rows[-1].vlans) == "99,200-210"
+
+
+def test_intent_render_matches_the_streamed_render(tmp_path):
+    csv_file = tmp_path / "layer3.csv"
+    csv_file.write_text(CSV)
+    streamed = tmp_path / "streamed.txt"
+    stream_layer3_switch_config(str(csv_file), str(streamed), "transparent", "howest")
+
+    rendered = io.StringIO()
+    render_layer3_switch_config(compile_switch_csv_text(CSV), rendered, "transparent", "howest")
+    assert rendered.getvalue() == streamed.read_text()
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from timeseries_store import (BLOCK_HEADER, DEVICES_FILE, SEGMENT_SECONDS, TimeSeriesStore, _encode_deltas,
+                              decode_block, encode_block)
+
+HOUR = 1_700_000_000 // SEGMENT_SECONDS * SEGMENT_SECONDS
+
+
+def test_block_round_trip_with_negative_deltas():
+    ts = [1_000, 6_000, 11_000, 16_000, 16_500]
+    power = [0, 12_000, 3, 3, -7]  # deciwatt: load switched on, off, and a negative reading
+    relay = [0, 1, 1, 0, 0]
+    uptime = [500, 505, 0, 5, 10]  # reboot: uptime goes back to 0
+    assert decode_block(encode_block(ts, power, relay, uptime)) == (ts, power, relay, uptime)
+
+
+def test_single_sample_block():
+    assert decode_block(encode_block([42], [7], [1], [3])) == ([42], [7], [1], [3])
+
+
+@pytest.mark.parametrize("values, typecode", [
+    ([0, 127, 0], b"b"),
+    ([0, 128], b"h"),
+    ([0, -129], b"h"),
+    ([0, 2 ** 15], b"i"),
+    ([0, -(2 ** 31) - 1], b"q"),
+    ([0, 2 ** 40, 0], b"q"),
+])
+def test_narrowest_typecode_is_chosen(values, typecode):
+    assert _encode_deltas(values)[:1] == typecode
+
+
+@pytest.mark.parametrize("step", [1, 300, 70_000, 5_000_000_000])
+def test_round_trip_over_every_typecode(step):
+    ts = [HOUR * 1000 + i * step for i in range(5)]
+    power = [0, step, -step, step, 0]
+    block = encode_block(ts, power, [1, 0, 1, 0, 1], [0] * 5)
+    assert decode_block(block)[:2] == (ts, power)
+    assert len(block) > BLOCK_HEADER.size
+
+
+def test_append_rolls_over_to_the_next_segment(tmp_path):
+    with TimeSeriesStore(str(tmp_path), block_samples=100) as store:
+        store.append("plug1", HOUR + SEGMENT_SECONDS - 1, 10.0, True, 1)
+        store.append("plug1", HOUR + SEGMENT_SECONDS, 20.0, False, 2)
+        # the first sample of the new hour wrote the old buffer as a block of the old segment
+        assert os.path.exists(tmp_path / f"{HOUR}.dat")
+        assert not os.path.exists(tmp_path / f"{HOUR + SEGMENT_SECONDS}.dat")
+    assert os.path.exists(tmp_path / f"{HOUR + SEGMENT_SECONDS}.dat")
+    with TimeSeriesStore(str(tmp_path)) as store:
+        assert store.samples("plug1", HOUR, HOUR + 2 * SEGMENT_SECONDS) == [
+            (HOUR + SEGMENT_SECONDS - 1, 10.0, True, 1),
+            (HOUR + SEGMENT_SECONDS, 20.0, False, 2),
+        ]
+
+
+def test_full_buffer_is_written_as_a_block(tmp_path):
+    with TimeSeriesStore(str(tmp_path), block_samples=4) as store:
+        store.append_many([("plug1", HOUR + i, float(i), True, i) for i in range(6)])
+        assert len(store._index(HOUR)[store.devices["plug1"]]) == 1
+        assert len(store.samples("plug1", HOUR, HOUR + 10)) == 6  # 4 on disk + 2 still buffered
+
+
+def test_rollups_of_buffered_samples_do_not_register_the_device(tmp_path):
+    with TimeSeriesStore(str(tmp_path)) as store:
+        store.append("plug1", HOUR + 1, 100.0, True, 1)
+        store.append("plug1", HOUR + 2, 300.0, False, 2)
+        rollups = store.rollups(HOUR, HOUR + 60)
+        assert rollups == {"plug1": [(HOUR, 100.0, 300.0, 200.0, 2, 0.5)]}
+        assert (tmp_path / DEVICES_FILE).read_text() == ""
+    assert (tmp_path / DEVICES_FILE).read_text() == "plug1\n"
+
+
+def test_rollups_merge_disk_and_buffer(tmp_path):
+    with TimeSeriesStore(str(tmp_path), block_samples=2) as store:
+        store.append_many([("plug1", HOUR + 1, 10.0, True, 1), ("plug1", HOUR + 2, 30.0, True, 2),
+                           ("plug1", HOUR + 3, 50.0, False, 3), ("plug2", HOUR + 4, 5.0, True, 4)])
+        rollups = store.rollups(HOUR, HOUR + 60, devices=["plug1"])
+    assert rollups == {"plug1": [(HOUR, 10.0, 50.0, 30.0, 3, 2 / 3)]}
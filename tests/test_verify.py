@@ -0,0 +1,28 @@
+from common.mock_ios import MockFleet
+from common.verify import parse_vlan_brief
+
+SHOW_VLAN_BRIEF = """
+VLAN Name                             Status    Ports
+---- -------------------------------- --------- -------------------------------
+1    default                          active    Fa0/1, Fa0/2, Fa0/3, Fa0/4
+                                                Fa0/5
+10   CD WIFI Guests                   active    Fa0/6
+20   Cameras                          act/lshut
+1002 fddi-default                     act/unsup
+"""
+
+
+def test_parse_vlan_brief_reads_fixed_columns():
+    vlans = parse_vlan_brief(SHOW_VLAN_BRIEF)
+    assert vlans[10] == {"name": "CD WIFI Guests", "status": "active", "ports": {"FastEthernet0/6"}}
+    assert vlans[1]["ports"] == {f"FastEthernet0/{port}" for port in range(1, 6)}
+    assert vlans[20] == {"name": "Cameras", "status": "act/lshut", "ports": set()}
+    assert vlans[1002]["status"] == "act/unsup"
+
+
+def test_mock_names_with_spaces_round_trip():
+    connection = MockFleet()(host="10.0.0.1")
+    connection.send_config_set(["vlan 30", "name Lockers and HVAC", "vlan 40", "name " + "x" * 40])
+    vlans = parse_vlan_brief(connection.send_command("show vlan brief"))
+    assert vlans[30]["name"] == "Lockers and HVAC"
+    assert vlans[40]["name"] == "x" * 32
@@ -0,0 +1,32 @@
+import pytest
+
+from common.vlan_ranges import VlanRangeSet
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("10", "10"),
+    ("300-400", "300-400"),
+    ("1,10-12,20", "1,10-12,20"),
+    ("10,11", "10,11"),  # two adjacent VLANs are shorter as a list
+    ("12,10,11", "10-12"),
+    ("1-10,5-20, 21", "1-21"),
+    ("1-4094", "1-4094"),
+])
+def test_parse_str_round_trip(text, expected):
+    vlans = VlanRangeSet.parse(text)
+    assert str(vlans) == expected
+    assert VlanRangeSet.parse(str(vlans)) == vlans
+
+
+@pytest.mark.parametrize("text", ["10-", "a", "20-10", "1-x"])
+def test_parse_rejects_invalid_ranges(text):
+    with pytest.raises(ValueError):
+        VlanRangeSet.parse(text)
+
+
+def test_set_operations():
+    vlans = VlanRangeSet.parse("1-100")
+    assert len(vlans) == 100 and 100 in vlans and 101 not in vlans
+    assert str(vlans | VlanRangeSet.parse("101-110,200")) == "1-110,200"
+    assert str(vlans & VlanRangeSet.parse("50-150")) == "50-100"
+    assert not VlanRangeSet.parse("")
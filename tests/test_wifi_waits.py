@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from pywifi import Profile
+
+from fake_wifi import FakeInterface
+from set_shelly_plug import WIFI_SSID, connect_to_ap, connect_to_originl_network, scan_shelly_devices
+from wifi_waits import DEFAULT_INTERVAL, MAX_INTERVAL, ScanCache, connect
+
+PLUGS = ["shellyplug-s-1", "shellyplug-s-2", "shellyplug-s-3"]
+
+
+class FakeClock:
+    """Clock whose sleep() only advances the time, and remembers every sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def no_fixed_sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(time, "sleep", calls.append)
+    yield calls
+    assert calls == [], "time.sleep() called outside the polling waits"
+
+
+def test_batch_scans_once_and_returns_when_connected(no_fixed_sleeps):
+    delay = 0.05
+    iface = FakeInterface(PLUGS + [WIFI_SSID], scan_delay=delay, connect_delay=delay, disconnect_delay=delay)
+    scan_cache = ScanCache(iface)
+
+    started = time.monotonic()
+    devices = scan_shelly_devices(iface, scan_cache)
+    for ssid in devices:
+        assert connect_to_ap(ssid, iface, scan_cache)
+        assert iface.connected_ssid == ssid
+    assert connect_to_originl_network(iface=iface, scan_cache=scan_cache)
+    elapsed = time.monotonic() - started
+
+    assert devices == PLUGS
+    assert iface.scans == scan_cache.scans == 1
+    # one scan plus a disconnect and a connect per network, each done shortly after its delay
+    waits = 1 + 2 * (len(PLUGS) + 1)
+    assert elapsed < waits * (delay + MAX_INTERVAL / 2)
+
+
+def test_connect_polls_with_backoff_until_connected():
+    clock = FakeClock()
+    iface = FakeInterface(PLUGS, connect_delay=2.0, clock=clock)
+    profile = Profile()
+    profile.ssid = PLUGS[0]
+
+    assert connect(iface, profile, sleep=clock.sleep, clock=clock)
+    assert clock.sleeps[0] == DEFAULT_INTERVAL
+    assert clock.sleeps == sorted(clock.sleeps) and max(clock.sleeps) <= MAX_INTERVAL
+    assert 2.0 <= clock.now < 2.0 + MAX_INTERVAL
+
+
+def test_connect_gives_up_at_the_deadline():
+    clock = FakeClock()
+    iface = FakeInterface(PLUGS, clock=clock)
+    profile = Profile()
+    profile.ssid = "not-there"
+
+    assert not connect(iface, profile, deadline=3.0, sleep=clock.sleep, clock=clock)
+    assert clock.now == pytest.approx(3.0)
+
+
+def test_scan_cache_rescans_once_for_a_missing_ssid(no_fixed_sleeps):
+    iface = FakeInterface(PLUGS, scan_delay=0.01)
+    scan_cache = ScanCache(iface)
+
+    assert scan_cache.find(PLUGS[1]).ssid == PLUGS[1]
+    assert scan_cache.find(PLUGS[2]).ssid == PLUGS[2]
+    assert iface.scans == 1
+    assert scan_cache.find("shellyplug-s-9") is None
+    assert iface.scans == 2